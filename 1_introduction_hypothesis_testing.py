@@ -1,13 +1,19 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
+import stats_core as stats
+import hypothesis_tests
+import profiling
+import trace_reduction
 
 # Set page config
 st.set_page_config(page_title="Introduction to Hypothesis Testing", layout="wide")
 
+profiling.start()
+
 # Custom CSS for better styling
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     body {
         color: #333;
@@ -46,40 +52,16 @@ st.markdown("""
         margin-top: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Title
 st.title("🔬 Introduction to Hypothesis Testing")
 st.write ('**Developed by : Venugopal Adep**')
 
-# Custom z-test function
-def proportions_ztest(count, nobs, value=None, alternative='two-sided', prop_var=False):
-    count = np.asarray(count)
-    nobs = np.asarray(nobs)
-    
-    prop = count / nobs
-    value = 0 if value is None else value
-
-    p_pool = np.sum(count) / np.sum(nobs)
-    var = p_pool * (1 - p_pool) * np.sum(1/nobs)
-    
-    z_stat = (prop[0] - prop[1] - value) / np.sqrt(var)
-    
-    if alternative == 'two-sided':
-        p_value = 2 * (1 - stats.norm.cdf(np.abs(z_stat)))
-    elif alternative == 'larger':
-        p_value = 1 - stats.norm.cdf(z_stat)
-    elif alternative == 'smaller':
-        p_value = stats.norm.cdf(z_stat)
-    else:
-        raise ValueError('alternative must be "two-sided", "larger" or "smaller"')
-
-    return z_stat, p_value
-
 # Tabs
 tab1, tab2, tab3 = st.tabs(["📚 Basics", "🧪 Interactive Example", "🧠 Quiz"])
 
-with tab1:
+with tab1, profiling.section("Basics"):
     st.header("📚 Hypothesis Testing Basics")
     
     st.subheader("What is Hypothesis Testing?")
@@ -109,7 +91,7 @@ with tab1:
     5. 🏆 Make a decision: reject H₀ if p-value < significance level
     """)
 
-with tab2:
+with tab2, profiling.section("Interactive Example"):
     st.header("🧪 Interactive Example: New Ad Campaign")
     
     st.markdown("""
@@ -130,7 +112,7 @@ with tab2:
     old_successes = int(old_rate / 100 * sample_size)
     new_successes = int(new_rate / 100 * sample_size)
     
-    z_stat, p_value = proportions_ztest([new_successes, old_successes], [sample_size, sample_size], 
+    z_stat, p_value = hypothesis_tests.proportions_ztest([new_successes, old_successes], [sample_size, sample_size], 
                                         alternative='larger')
     
     # Visualization
@@ -165,7 +147,7 @@ with tab2:
                       legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
     
     with col2:
-        st.plotly_chart(fig, use_container_width=True)
+        trace_reduction.plotly_chart(fig, use_container_width=True)
     
     # Results
     st.subheader("📊 Test Results")
@@ -211,7 +193,7 @@ with tab2:
         """)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab3:
+with tab3, profiling.section("Quiz"):
     st.header("🧠 Quiz Time!")
     
     st.markdown("Test your newfound knowledge with this quick quiz!")
@@ -259,4 +241,6 @@ with tab3:
             st.error("Not quite. A larger sample size generally increases the power of the test, making it more likely to detect a real effect if one exists.")
 
 st.markdown("---")
-st.markdown("© 2024 Introduction to Hypothesis Testing. Developed by Venugopal Adep.")
\ No newline at end of file
+st.markdown("© 2024 Introduction to Hypothesis Testing. Developed by Venugopal Adep.")
+
+profiling.report()
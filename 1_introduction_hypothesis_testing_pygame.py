@@ -2,7 +2,7 @@ import pygame
 import sys
 import random
 import math
-from scipy import stats
+import stats_core as stats
 
 # Initialize Pygame
 pygame.init()
@@ -111,7 +111,7 @@ def calculate_test_statistic(sample):
     return (sample_mean - null_hypothesis) / standard_error
 
 def calculate_p_value(test_statistic):
-    return 1 - stats.norm.cdf(test_statistic)
+    return stats.norm.sf(test_statistic)
 
 # Initialize test_statistic and p_value
 sample = generate_sample()
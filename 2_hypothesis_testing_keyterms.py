@@ -1,16 +1,23 @@
 import streamlit as st
 import numpy as np
-from scipy import stats
+import stats_core as stats
 import plotly.graph_objects as go
+import pvalue_surface
+import datasets
+import hypothesis_tests
+import profiling
+import trace_reduction
 
 st.set_page_config(page_title="Understanding Evidence in Justice", layout="wide")
 
+profiling.start()
+
 st.title("⚖️ Understanding Evidence in Justice")
 st.write("**Developed by: Venugopal Adep**")
 
 tab1, tab2, tab3, tab4 = st.tabs(["📚 Key Ideas", "🎮 Try It Yourself", "🧑‍⚖️ Real Example", "🧠 Quiz"])
 
-with tab1:
+with tab1, profiling.section("Key Ideas"):
     st.header("Key Ideas in Evaluating Evidence")
     
     st.subheader("Null Hypothesis (H₀)")
@@ -34,7 +41,7 @@ with tab1:
     st.subheader("The Final Decision")
     st.write("We either 'reject H₀' (conclude guilt/change) or 'fail to reject H₀' (not enough evidence for guilt/change).")
 
-with tab2:
+with tab2, profiling.section("Try It Yourself"):
     st.header("Try It Yourself: Evaluating Evidence")
 
     st.write("This interactive tool shows how the amount of evidence affects our decision.")
@@ -46,7 +53,7 @@ with tab2:
         incriminating_evidence = st.slider("Pieces of strong evidence", 0, total_evidence, total_evidence // 2, key="incriminating_evidence_1")
         alpha = st.select_slider("Significance Level (α)", options=[0.01, 0.05, 0.1], value=0.05, key="alpha_1")
 
-        p_value = 1 - stats.binom.cdf(incriminating_evidence - 1, total_evidence, 0.5)
+        p_value = hypothesis_tests.binomial_pvalue(incriminating_evidence, total_evidence, 0.5)
 
         st.write(f"p-value: {p_value:.4f}")
         
@@ -56,8 +63,7 @@ with tab2:
             st.success("Fail to reject H₀ (Not enough evidence to conclude guilt)")
 
     with col2:
-        x = np.linspace(0, total_evidence, 1000)
-        y = stats.norm.pdf(x, total_evidence/2, np.sqrt(total_evidence/4))
+        x, y = datasets.load_normal_curve(total_evidence/2, np.sqrt(total_evidence/4), 0, total_evidence)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='Evidence Distribution', line=dict(color='blue', width=2)))
@@ -97,7 +103,7 @@ with tab2:
             showlegend=True
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        trace_reduction.plotly_chart(fig, use_container_width=True)
 
     st.write("""
     What this shows:
@@ -112,7 +118,7 @@ with tab2:
     - If the black line is in the red area, we reject H₀ (conclude guilt)
     """)
 
-with tab3:
+with tab3, profiling.section("Real Example"):
     st.header("Real Example: Investigating a Traffic Claim")
 
     st.write("""
@@ -128,8 +134,9 @@ with tab3:
         speeders_observed = st.slider("Number of speeders observed", 0, cars_observed, 25, key="speeders_observed")
         alpha = st.select_slider("Significance Level (α)", options=[0.01, 0.05, 0.1], value=0.05, key="alpha_2")
 
-        # Calculate p-value using binomial test
-        p_value = 1 - stats.binom.cdf(speeders_observed - 1, cars_observed, usual_speeding_rate / 100)
+        # Look up the binomial test p-value in the precomputed surface
+        speeding_surface = datasets.load_speeding_surface()
+        p_value = pvalue_surface.p_value(speeding_surface, usual_speeding_rate, cars_observed, speeders_observed)
 
         st.write(f"p-value: {p_value:.4f}")
         
@@ -139,8 +146,7 @@ with tab3:
             st.success("Fail to reject H₀ (Not enough evidence to conclude speeding has increased)")
 
     with col2:
-        x = np.linspace(0, cars_observed, 1000)
-        y = stats.norm.pdf(x, cars_observed * usual_speeding_rate / 100, np.sqrt(cars_observed * usual_speeding_rate / 100 * (1 - usual_speeding_rate / 100)))
+        x, y = datasets.load_normal_curve(cars_observed * usual_speeding_rate / 100, np.sqrt(cars_observed * usual_speeding_rate / 100 * (1 - usual_speeding_rate / 100)), 0, cars_observed)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='Speeding Distribution', line=dict(color='blue', width=2)))
@@ -180,7 +186,31 @@ with tab3:
             showlegend=True
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        trace_reduction.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Reject Region Across All Speeding Rates")
+
+    reject = pvalue_surface.reject_region(speeding_surface, cars_observed, alpha)
+
+    heatmap = go.Figure()
+    heatmap.add_trace(go.Heatmap(
+        x=pvalue_surface.SPEEDERS[:cars_observed + 1], y=pvalue_surface.RATES, z=reject.astype(np.int8),
+        colorscale=[[0, 'rgba(0,255,0,0.3)'], [1, 'rgba(255,0,0,0.3)']], showscale=False,
+        hovertemplate="Speeders: %{x}<br>Usual rate: %{y}%<extra></extra>"
+    ))
+    heatmap.add_trace(go.Scatter(
+        x=[speeders_observed], y=[usual_speeding_rate], mode='markers', name='Current Setting',
+        marker=dict(size=12, color='black', symbol='x')
+    ))
+    heatmap.update_layout(
+        title=f'Reject H₀ (red) vs Fail to Reject H₀ (green) for {cars_observed} cars at α={alpha}',
+        xaxis_title='Number of Speeders Observed',
+        yaxis_title='Usual Speeding Rate (%)',
+        height=500,
+        showlegend=False
+    )
+
+    trace_reduction.plotly_chart(heatmap, use_container_width=True)
 
     st.write("""
     How to interpret this:
@@ -195,7 +225,7 @@ with tab3:
     - If the black line is in the red area, we reject H₀ (conclude speeding has increased)
     """)
 
-with tab4:
+with tab4, profiling.section("Quiz"):
     st.header("Quick Quiz")
     
     q1 = st.radio("1. What does a small p-value suggest?", 
@@ -223,3 +253,5 @@ with tab4:
             st.error("Remember, we start with H₀ and only reject it if we have strong evidence against it.")
 
 st.markdown("---")
+
+profiling.report()
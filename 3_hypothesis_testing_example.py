@@ -1,13 +1,18 @@
 import streamlit as st
 import numpy as np
-from scipy import stats
+import stats_core as stats
 import plotly.graph_objects as go
+import profiling
+import trace_reduction
 
 # Set page config
 st.set_page_config(page_title="Store Checkout Time Analysis", layout="wide")
 
+profiling.start()
+
 # Custom CSS for better styling
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     body {
         color: #333;
@@ -53,7 +58,7 @@ st.markdown("""
         width: 100%;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Title
 st.title("🛒 Hypothesis Example : Store Checkout Time Analysis")
@@ -67,7 +72,7 @@ if customers are waiting too long in line. Don't worry if you're not a math whiz
 # Create tabs
 tabs = st.tabs(["📝 Problem", "🔬 Hypothesis", "🧪 Test It!", "⚠️ Possible Errors", "🧠 Quiz Time"])
 
-with tabs[0]:
+with tabs[0], profiling.section("Problem"):
     st.header("📝 The Problem: Long Lines at Checkout")
     
     st.markdown("""
@@ -86,7 +91,7 @@ with tabs[0]:
     </div>
     """, unsafe_allow_html=True)
 
-with tabs[1]:
+with tabs[1], profiling.section("Hypothesis"):
     st.header("🔬 Our Hypothesis: What Are We Testing?")
     
     col1, col2 = st.columns(2)
@@ -130,7 +135,7 @@ with tabs[1]:
     </div>
     """, unsafe_allow_html=True)
 
-with tabs[2]:
+with tabs[2], profiling.section("Test It!"):
     st.header("🧪 Let's Test It!")
     
     col1, col2 = st.columns([1, 2])
@@ -149,7 +154,7 @@ with tabs[2]:
         # Calculate test statistic and p-value
         null_mean = 15
         z_stat = (sample_mean - null_mean) / (population_std / np.sqrt(sample_size))
-        p_value = 1 - stats.norm.cdf(z_stat)
+        p_value = stats.norm.sf(z_stat)
 
         # Visualization
         x = np.linspace(-4, 4, 1000)
@@ -187,7 +192,7 @@ with tabs[2]:
                           yaxis_title="Probability",
                           height=400)
 
-        st.plotly_chart(fig, use_container_width=True)
+        trace_reduction.plotly_chart(fig, use_container_width=True)
 
     st.markdown(f"""
     **Test Results:**
@@ -204,7 +209,7 @@ with tabs[2]:
     </div>
     """, unsafe_allow_html=True)
 
-with tabs[3]:
+with tabs[3], profiling.section("Possible Errors"):
     st.header("⚠️ When Things Go Wrong: Possible Errors")
     
     st.markdown("""
@@ -247,7 +252,7 @@ with tabs[3]:
     </div>
     """, unsafe_allow_html=True)
 
-with tabs[4]:
+with tabs[4], profiling.section("Quiz Time"):
     st.header("🧠 Quiz Time!")
     
     questions = [
@@ -355,4 +360,6 @@ with tabs[4]:
         st.markdown("---")
 
 st.markdown("---")
-st.markdown("© 2024 Store Checkout Time Analysis. Developed by Venugopal Adep.")
\ No newline at end of file
+st.markdown("© 2024 Store Checkout Time Analysis. Developed by Venugopal Adep.")
+
+profiling.report()
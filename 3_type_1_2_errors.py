@@ -1,13 +1,19 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
+import stats_core as stats
+import hypothesis_tests
+import profiling
+import trace_reduction
 
 # Set page config
 st.set_page_config(layout="wide", page_title="Justice System Error Explorer", page_icon="⚖️")
 
+profiling.start()
+
 # Custom CSS
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     body {font-family: Arial, sans-serif;}
     .main {padding: 1rem;}
@@ -25,83 +31,16 @@ st.markdown("""
     h1, h2, h3 {color: #2c3e50;}
     .stSlider {margin-bottom: 20px;}
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Title and introduction
 st.title("⚖️ Type I and Type II Errors : Justice System Error Explorer")
 st.write("**Developed by: Venugopal Adep**")
 st.markdown("Dive into the world of legal decision-making and discover how errors can occur in the justice system.")
 
-# Create tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📚 Concept", "📊 Interactive Demo", "🧮 Real-World Examples", "🧠 Quiz"])
-
-with tab1:
-    st.header("Understanding Errors in the Justice System")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div class="info-box">
-        <h3>🚨 Type I Error: The Innocent Goes to Jail</h3>
-        <ul>
-        <li>What it is: Convicting an innocent person</li>
-        <li>In stats speak: False Positive (α)</li>
-        <li>Real-world impact: An innocent person loses their freedom</li>
-        </ul>
-        </div>
-        """, unsafe_allow_html=True)
-        
-    with col2:
-        st.markdown("""
-        <div class="info-box">
-        <h3>😴 Type II Error: The Guilty Walks Free</h3>
-        <ul>
-        <li>What it is: Failing to convict a guilty person</li>
-        <li>In stats speak: False Negative (β)</li>
-        <li>Real-world impact: A criminal remains in society</li>
-        </ul>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="info-box">
-    <h3>🔑 Key Ideas to Remember</h3>
-    <ul>
-        <li>Balance is crucial: Reducing one type of error often increases the other</li>
-        <li>The justice system's strength (Power) = Its ability to correctly convict the guilty</li>
-        <li>Being too strict can lead to more innocent people in jail</li>
-        <li>Being too lenient can let more criminals go free</li>
-        <li>Better evidence and thorough investigations are the best way to improve accuracy</li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("""
-    <div class="example-box">
-    <h4>Real-life Example: The Coffee Shop Thief</h4>
-    Imagine you're a cafe owner trying to catch a thief who's been stealing from the tip jar.
-
-    <b>Type I Error (False Conviction):</b> You accuse and ban a regular customer based on shaky evidence. 
-    You've just lost an innocent customer and potentially damaged your reputation.
-
-    <b>Type II Error (False Acquittal):</b> You see someone suspicious but decide not to act. 
-    If they were the thief, they'll continue stealing, harming your business and staff.
-
-    <b>The Dilemma:</b> How strict should your policy be? Very strict policies might scare away innocent customers, 
-    while very lenient ones might embolden the thief.
-
-    Just like in the justice system, the key is finding the right balance and gathering solid evidence!
-    </div>
-    """, unsafe_allow_html=True)
-
-with tab2:
-    st.header("Interactive Demo: Justice System in Action")
-    
-    st.markdown("""
-    Imagine you're designing a justice system. Use the sliders to adjust how the system works and see the impact on innocent and guilty individuals.
-    """)
-    
+# Widget changes in this panel rerun only the panel, not the whole page
+@st.fragment
+def justice_demo():
     col1, col2 = st.columns([3, 7])
     
     with col1:
@@ -117,17 +56,13 @@ with tab2:
     
     with col2:
         # Calculate critical value and probabilities
-        z_crit = stats.norm.ppf(1 - conviction_threshold)
-        evidence_threshold = innocence_mean + z_crit * evidence_variability
+        evidence_threshold, false_conviction_rate, false_acquittal_rate, conviction_power = \
+            hypothesis_tests.error_rates(innocence_mean, guilt_mean, evidence_variability, conviction_threshold)
         
         x = np.linspace(0, 5, 1000)
         y_innocent = stats.norm.pdf(x, innocence_mean, evidence_variability)
         y_guilty = stats.norm.pdf(x, guilt_mean, evidence_variability)
         
-        false_conviction_rate = 1 - stats.norm.cdf(evidence_threshold, innocence_mean, evidence_variability)
-        false_acquittal_rate = stats.norm.cdf(evidence_threshold, guilt_mean, evidence_variability)
-        conviction_power = 1 - false_acquittal_rate
-        
         # Create plot
         fig = go.Figure()
         
@@ -180,7 +115,80 @@ with tab2:
             ]
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        trace_reduction.plotly_chart(fig, use_container_width=True)
+
+
+# Create tabs
+tab1, tab2, tab3, tab4 = st.tabs(["📚 Concept", "📊 Interactive Demo", "🧮 Real-World Examples", "🧠 Quiz"])
+
+with tab1, profiling.section("Concept"):
+    st.header("Understanding Errors in the Justice System")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div class="info-box">
+        <h3>🚨 Type I Error: The Innocent Goes to Jail</h3>
+        <ul>
+        <li>What it is: Convicting an innocent person</li>
+        <li>In stats speak: False Positive (α)</li>
+        <li>Real-world impact: An innocent person loses their freedom</li>
+        </ul>
+        </div>
+        """, unsafe_allow_html=True)
+        
+    with col2:
+        st.markdown("""
+        <div class="info-box">
+        <h3>😴 Type II Error: The Guilty Walks Free</h3>
+        <ul>
+        <li>What it is: Failing to convict a guilty person</li>
+        <li>In stats speak: False Negative (β)</li>
+        <li>Real-world impact: A criminal remains in society</li>
+        </ul>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="info-box">
+    <h3>🔑 Key Ideas to Remember</h3>
+    <ul>
+        <li>Balance is crucial: Reducing one type of error often increases the other</li>
+        <li>The justice system's strength (Power) = Its ability to correctly convict the guilty</li>
+        <li>Being too strict can lead to more innocent people in jail</li>
+        <li>Being too lenient can let more criminals go free</li>
+        <li>Better evidence and thorough investigations are the best way to improve accuracy</li>
+    </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    <div class="example-box">
+    <h4>Real-life Example: The Coffee Shop Thief</h4>
+    Imagine you're a cafe owner trying to catch a thief who's been stealing from the tip jar.
+
+    <b>Type I Error (False Conviction):</b> You accuse and ban a regular customer based on shaky evidence. 
+    You've just lost an innocent customer and potentially damaged your reputation.
+
+    <b>Type II Error (False Acquittal):</b> You see someone suspicious but decide not to act. 
+    If they were the thief, they'll continue stealing, harming your business and staff.
+
+    <b>The Dilemma:</b> How strict should your policy be? Very strict policies might scare away innocent customers, 
+    while very lenient ones might embolden the thief.
+
+    Just like in the justice system, the key is finding the right balance and gathering solid evidence!
+    </div>
+    """, unsafe_allow_html=True)
+
+with tab2, profiling.section("Interactive Demo"):
+    st.header("Interactive Demo: Justice System in Action")
+    
+    st.markdown("""
+    Imagine you're designing a justice system. Use the sliders to adjust how the system works and see the impact on innocent and guilty individuals.
+    """)
+    
+    justice_demo()
     
     st.subheader("What's Going On in This Picture?")
     st.markdown("""
@@ -201,7 +209,7 @@ with tab2:
     This picture helps us understand why mistakes can happen and how we might make fewer of them!
     """)
 
-with tab3:
+with tab3, profiling.section("Real-World Examples"):
     st.header("Real-World Justice Scenarios")
     
     st.markdown("""
@@ -240,7 +248,7 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
 
-with tab4:
+with tab4, profiling.section("Quiz"):
     st.header("Test Your Justice System Smarts!")
     
     st.markdown("""
@@ -344,3 +352,5 @@ st.markdown("""
 This interactive tool is for educational purposes only and does not represent any specific legal system.
 </div>
 """, unsafe_allow_html=True)
+
+profiling.report()
@@ -1,13 +1,18 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
+import stats_core as stats
+import profiling
+import trace_reduction
 
 # Set page config
 st.set_page_config(layout="wide", page_title="Type I and Type II Errors in Medical Diagnosis", page_icon="🏥")
 
+profiling.start()
+
 # Custom CSS
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     .main {max-width: 1200px; margin: 0 auto;}
     .stApp {padding-top: 2rem;}
@@ -16,7 +21,7 @@ st.markdown("""
     .quiz-container {background-color: #e1e5eb; padding: 20px; border-radius: 10px; margin-top: 20px;}
     .example-box {border: 1px solid #4CAF50; padding: 10px; border-radius: 5px; margin-bottom: 10px;}
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Title and introduction
 st.title("🏥 Type I and Type II Errors in Medical Diagnosis")
@@ -102,7 +107,7 @@ elif page == "Interactive Visualization":
     ])
     confusion_matrix.update_layout(width=500, height=300, margin=dict(l=40, r=40, t=20, b=20))
     
-    st.plotly_chart(confusion_matrix)
+    trace_reduction.plotly_chart(confusion_matrix)
     
     col1, col2 = st.columns(2)
     
@@ -186,4 +191,6 @@ elif page == "Quiz":
 
 # Footer
 st.markdown("---")
-st.markdown("© 2024 Type I and Type II Errors in Medical Diagnosis. Created with Streamlit and Plotly.")
\ No newline at end of file
+st.markdown("© 2024 Type I and Type II Errors in Medical Diagnosis. Created with Streamlit and Plotly.")
+
+profiling.report()
@@ -1,12 +1,18 @@
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
+import stats_core as stats
+import profiling
+import trace_reduction
+import navigation
 
 st.set_page_config(layout="wide", page_title="One-tailed and Two-tailed Tests", page_icon="🎯")
 
+profiling.start()
+
 # Custom CSS for better styling
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     body {
         color: #333;
@@ -50,7 +56,7 @@ st.markdown("""
         border-radius: 5px;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 st.title("🎯 One-tailed and Two-tailed Tests")
 st.write("**Developed by : Venugopal Adep**")
@@ -60,9 +66,14 @@ Welcome to this exciting journey into the world of hypothesis testing!
 Get ready to explore the fascinating differences between one-tailed and two-tailed tests through interactive examples and quizzes.
 """)
 
-tabs = st.tabs(["📚 Introduction", "👆 One-tailed Tests", "👆👇 Two-tailed Tests", "🧪 Interactive Example", "🧮 Solved Numericals", "🧠 Quiz"])
+# Only the selected section runs on each rerun
+sections = ["📚 Introduction", "👆 One-tailed Tests", "👆👇 Two-tailed Tests", "🧪 Interactive Example", "🧮 Solved Numericals", "🧠 Quiz"]
+section = navigation.section_picker(sections)
 
-with tabs[0]:
+# Keep the interactive settings while their section is hidden
+navigation.keep_widget_state({"tail": "Right-tailed", "sample_mean": 102.5, "sample_size": 50, "pop_std": 10.0})
+
+if section == sections[0]:
     st.header("📚 Introduction to One-tailed and Two-tailed Tests")
     
     st.markdown("""
@@ -89,7 +100,7 @@ with tabs[0]:
     st.image("https://raw.githubusercontent.com/venugopal-adep/streamlit-demo/main/One-tailed%20and%20Two-tailed%20Tests.png", 
              caption="Visual comparison of One-tailed and Two-tailed Tests")
 
-with tabs[1]:
+elif section == sections[1]:
     st.header("👆 One-tailed Tests")
     
     st.markdown("""
@@ -132,7 +143,7 @@ with tabs[1]:
 
     # Interactive visualization for one-tailed test
     st.subheader("🔍 Interactive One-tailed Test Visualization")
-    tail = st.radio("Select the tail:", ["Right-tailed", "Left-tailed"])
+    tail = st.radio("Select the tail:", ["Right-tailed", "Left-tailed"], key="tail")
     
     x = np.linspace(-4, 4, 1000)
     y = stats.norm.pdf(x, 0, 1)
@@ -159,9 +170,9 @@ with tabs[1]:
                       xaxis_title="Z-score",
                       yaxis_title="Probability Density")
     
-    st.plotly_chart(fig, use_container_width=True)
+    trace_reduction.plotly_chart(fig, use_container_width=True)
 
-with tabs[2]:
+elif section == sections[2]:
     st.header("👆👇 Two-tailed Tests")
     
     st.markdown("""
@@ -212,9 +223,9 @@ with tabs[2]:
                       xaxis_title="Z-score",
                       yaxis_title="Probability Density")
     
-    st.plotly_chart(fig, use_container_width=True)
+    trace_reduction.plotly_chart(fig, use_container_width=True)
 
-with tabs[3]:
+elif section == sections[3]:
     st.header("🧪 Interactive Example: Coffee and Productivity")
 
     st.markdown("""
@@ -230,17 +241,18 @@ with tabs[3]:
     """)
 
     # User inputs
-    sample_mean = st.slider("Sample Mean Productivity", min_value=90.0, max_value=110.0, value=102.5, step=0.1)
-    sample_size = st.slider("Sample Size", min_value=30, max_value=100, value=50, step=1)
-    pop_std = st.slider("Population Standard Deviation", min_value=5.0, max_value=20.0, value=10.0, step=0.1)
+    sample_mean = st.slider("Sample Mean Productivity", min_value=90.0, max_value=110.0, step=0.1, key="sample_mean")
+    sample_size = st.slider("Sample Size", min_value=30, max_value=100, step=1, key="sample_size")
+    pop_std = st.slider("Population Standard Deviation", min_value=5.0, max_value=20.0, step=0.1, key="pop_std")
     null_mean = 100  # The average productivity score
 
-    # Calculate Z-score
-    z_score = (sample_mean - null_mean) / (pop_std / np.sqrt(sample_size))
+    with profiling.section("Calculations"):
+        # Calculate Z-score
+        z_score = (sample_mean - null_mean) / (pop_std / np.sqrt(sample_size))
 
-    # Calculate p-values
-    p_value_one_tailed = 1 - stats.norm.cdf(z_score)
-    p_value_two_tailed = 2 * (1 - stats.norm.cdf(abs(z_score)))
+        # Calculate p-values
+        p_value_one_tailed = stats.norm.sf(z_score)
+        p_value_two_tailed = 2 * stats.norm.sf(abs(z_score))
 
     st.markdown(f"""
     **Results:**
@@ -249,35 +261,36 @@ with tabs[3]:
     - Two-tailed p-value: {p_value_two_tailed:.4f}
     """)
 
-    # Plotting
-    x = np.linspace(-4, 4, 1000)
-    y = stats.norm.pdf(x, 0, 1)
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='Standard Normal Distribution'))
-    fig.add_trace(go.Scatter(x=[z_score, z_score], y=[0, stats.norm.pdf(z_score, 0, 1)], 
-                             mode='lines', name='Observed Z-score', line=dict(color='red', dash='dash')))
-
-    # One-tailed test
-    critical_value_one_tailed = stats.norm.ppf(0.95)  # For α = 0.05
-    fig.add_trace(go.Scatter(x=[critical_value_one_tailed, critical_value_one_tailed], 
-                             y=[0, stats.norm.pdf(critical_value_one_tailed, 0, 1)], 
-                             mode='lines', name='One-tailed Critical Value', line=dict(color='green', dash='dash')))
-
-    # Two-tailed test
-    critical_value_two_tailed = stats.norm.ppf(0.975)  # For α = 0.05
-    fig.add_trace(go.Scatter(x=[-critical_value_two_tailed, -critical_value_two_tailed], 
-                             y=[0, stats.norm.pdf(critical_value_two_tailed, 0, 1)], 
-                             mode='lines', name='Two-tailed Critical Values', line=dict(color='orange', dash='dash')))
-    fig.add_trace(go.Scatter(x=[critical_value_two_tailed, critical_value_two_tailed], 
-                             y=[0, stats.norm.pdf(critical_value_two_tailed, 0, 1)], 
-                             mode='lines', showlegend=False, line=dict(color='orange', dash='dash')))
-
-    fig.update_layout(title="One-tailed vs Two-tailed Test Visualization",
-                      xaxis_title="Z-score",
-                      yaxis_title="Probability Density")
-
-    st.plotly_chart(fig, use_container_width=True)
+    with profiling.section("Figure"):
+        # Plotting
+        x = np.linspace(-4, 4, 1000)
+        y = stats.norm.pdf(x, 0, 1)
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='Standard Normal Distribution'))
+        fig.add_trace(go.Scatter(x=[z_score, z_score], y=[0, stats.norm.pdf(z_score, 0, 1)], 
+                                 mode='lines', name='Observed Z-score', line=dict(color='red', dash='dash')))
+
+        # One-tailed test
+        critical_value_one_tailed = stats.norm.ppf(0.95)  # For α = 0.05
+        fig.add_trace(go.Scatter(x=[critical_value_one_tailed, critical_value_one_tailed], 
+                                 y=[0, stats.norm.pdf(critical_value_one_tailed, 0, 1)], 
+                                 mode='lines', name='One-tailed Critical Value', line=dict(color='green', dash='dash')))
+
+        # Two-tailed test
+        critical_value_two_tailed = stats.norm.ppf(0.975)  # For α = 0.05
+        fig.add_trace(go.Scatter(x=[-critical_value_two_tailed, -critical_value_two_tailed], 
+                                 y=[0, stats.norm.pdf(critical_value_two_tailed, 0, 1)], 
+                                 mode='lines', name='Two-tailed Critical Values', line=dict(color='orange', dash='dash')))
+        fig.add_trace(go.Scatter(x=[critical_value_two_tailed, critical_value_two_tailed], 
+                                 y=[0, stats.norm.pdf(critical_value_two_tailed, 0, 1)], 
+                                 mode='lines', showlegend=False, line=dict(color='orange', dash='dash')))
+
+        fig.update_layout(title="One-tailed vs Two-tailed Test Visualization",
+                          xaxis_title="Z-score",
+                          yaxis_title="Probability Density")
+
+    trace_reduction.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
     **Interpretation:**
@@ -288,7 +301,7 @@ with tabs[3]:
     Play around with the sliders to see how changes in the sample affect the results!
     """)
 
-with tabs[4]:
+elif section == sections[4]:
     st.header("🧮 Solved Numericals")
 
 
@@ -335,7 +348,7 @@ with tabs[4]:
     Notice how the interpretation changes based on the type of test we're conducting!
     """)
 
-with tabs[5]:
+elif section == sections[5]:
     st.header("🧠 Quiz: Test Your Knowledge")
     
     st.markdown("""
@@ -503,3 +516,5 @@ with tabs[5]:
     Great job on completing the quiz! Remember, understanding when to use one-tailed vs. two-tailed tests is crucial 
     in statistical analysis. Keep practicing with real-world scenarios to reinforce your knowledge.
     """)
+
+profiling.report()
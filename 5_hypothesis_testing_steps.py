@@ -1,13 +1,23 @@
+import time
+
 import streamlit as st
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
+import stats_core as stats
 import pandas as pd
+import profiling
+import trace_reduction
+import navigation
+import classical_tests
+import datasets
 
 st.set_page_config(layout="wide", page_title="Hypothesis Testing Steps")
 
+profiling.start()
+
 # Custom CSS for better styling
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     body {
         color: #333;
@@ -61,7 +71,7 @@ st.markdown("""
         margin-top: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 st.title("🚀 Hypothesis Testing Steps")
 st.write('**Developed by : Venugopal Adep**')
@@ -71,13 +81,93 @@ Welcome, statistical explorer! 🌟 Embark on an exciting journey through the wo
 We'll uncover the mysteries of data analysis using a real-world scenario: testing if a new teaching method improves student test scores.
 """)
 
-# Tabs for navigation
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+# Simulated sample and z-test shared by the Data Analysis and Decision Making sections
+def analyze_scores(n, sigma, effect_size, mu=70):
+    # Simulating data
+    np.random.seed(42)
+    sample_data = np.random.normal(mu + effect_size, sigma, n)
+    sample_mean = np.mean(sample_data)
+    
+    # Calculating Z-score and p-value
+    z_score = (sample_mean - mu) / (sigma / np.sqrt(n))
+    p_value = stats.norm.sf(z_score)
+    return sample_mean, z_score, p_value
+
+# Runs the guide's chi-square, F and ANOVA tests on an uploaded CSV or the
+# simulated survey; files are read in chunks, so large uploads stay cheap
+@st.fragment
+def selection_guide_runner():
+    st.subheader("🧪 Try the Tests on Data")
+    uploaded = st.file_uploader("Upload a CSV file (leave empty to use a simulated survey of 1,000,000 rows)",
+                                type="csv", key="guide_upload")
+    if uploaded is None:
+        source = datasets.load_selection_guide_example()
+        columns = list(source.columns)
+        defaults = {"Chi-Square test": ("gender", "flavor"), "F-test": ("crop_yield", "method"),
+                    "ANOVA": ("salary", "sector")}
+    else:
+        source = uploaded
+        columns = list(pd.read_csv(uploaded, nrows=0).columns)
+        defaults = {}
+
+    test = st.radio("Test", ["Chi-Square test", "F-test", "ANOVA"], horizontal=True, key="guide_test")
+    first, second = defaults.get(test, (columns[0], columns[-1]))
+    col1, col2 = st.columns(2)
+    if test == "Chi-Square test":
+        row = col1.selectbox("First categorical column", columns, index=columns.index(first))
+        col = col2.selectbox("Second categorical column", columns, index=columns.index(second))
+    else:
+        value = col1.selectbox("Numeric column", columns, index=columns.index(first))
+        by = col2.selectbox("Group column", columns, index=columns.index(second))
+
+    try:
+        start = time.perf_counter()
+        if test == "Chi-Square test":
+            table = classical_tests.crosstab(source, row, col)
+            read_seconds = time.perf_counter() - start
+            result = classical_tests.chi2_independence(table.to_numpy())
+            statistic, p_value, df_label = result.statistic, result.pvalue, f"df = {result.df}"
+            rows = int(table.to_numpy().sum())
+        else:
+            groups = classical_tests.group_summary(source, value, by)
+            read_seconds = time.perf_counter() - start
+            if test == "F-test":
+                result = classical_tests.f_test_groups(groups)
+                statistic, p_value = result.statistic, result.pvalue
+                df_label = f"df = ({result.df_num:.0f}, {result.df_den:.0f})"
+            else:
+                result = classical_tests.anova(groups)
+                statistic, p_value = result.statistic, result.pvalue
+                df_label = f"df = ({result.df_between}, {result.df_within})"
+            rows = int(groups.n.sum())
+        test_seconds = time.perf_counter() - start - read_seconds
+    except (ValueError, TypeError, KeyError) as error:
+        st.error(f"Could not run the {test} on these columns: {error}")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Statistic", f"{float(statistic):.4f}", df_label, delta_color="off")
+    col2.metric("p-value", f"{float(p_value):.4g}")
+    col3.metric("Rows used", f"{rows:,}")
+    col4.metric("Time (read + test)", f"{read_seconds:.2f} s + {test_seconds * 1000:.1f} ms")
+
+    if test == "Chi-Square test":
+        st.dataframe(table, use_container_width=True)
+    else:
+        st.dataframe(groups.to_frame(), use_container_width=True)
+    st.write("Reject H₀ at α = 0.05" if p_value < 0.05 else "Fail to reject H₀ at α = 0.05")
+
+# Only the selected section runs on each rerun
+sections = [
     "🌈 Introduction", "🎯 Hypothesis Setup", "📊 Test Statistic", 
     "🔬 Data Analysis", "🧠 Decision Making", "🏆 Quiz Time"
-])
+]
+section = navigation.section_picker(sections)
 
-with tab1:
+# Data Analysis inputs are also read by Decision Making
+navigation.keep_widget_state({"alpha": 0.05, "n_students": 50, "sigma": 15.0, "effect_size": 2.0})
+
+if section == sections[0]:
     st.header("📚 Introduction to Hypothesis Testing")
     
     st.markdown("""
@@ -95,7 +185,7 @@ with tab1:
     
     st.image("https://www.simplypsychology.org/wp-content/uploads/hypothesis-testing.jpg", caption="The Hypothesis Testing Process")
 
-with tab2:
+elif section == sections[1]:
     st.header("1️⃣ Setting up the Hypotheses")
     
     st.markdown("""
@@ -123,7 +213,7 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
 
-with tab3:
+elif section == sections[2]:
     st.header("2️⃣ Choosing a Test Statistic")
     
     st.markdown("""
@@ -179,30 +269,25 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
 
-with tab4:
+    selection_guide_runner()
+
+elif section == sections[3]:
     st.header("3️⃣ Setting the Significance Level & 4️⃣ Analyzing Data")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        alpha = st.slider("Choose how sure you want to be (significance level α):", 0.01, 0.10, 0.05, 0.01)
+        alpha = st.slider("Choose how sure you want to be (significance level α):", 0.01, 0.10, step=0.01, key="alpha")
         st.markdown(f"You've selected α = {alpha} (that's {alpha*100}% chance of being wrong)")
         
-        n = st.number_input("How many students are we testing?", min_value=31, value=50)
-        sigma = st.number_input("How much do scores usually vary? (σ)", min_value=1.0, value=15.0)
-        effect_size = st.slider("How much do you think scores will improve?", -10.0, 10.0, 2.0, 0.1)
+        n = st.number_input("How many students are we testing?", min_value=31, key="n_students")
+        sigma = st.number_input("How much do scores usually vary? (σ)", min_value=1.0, key="sigma")
+        effect_size = st.slider("How much do you think scores will improve?", -10.0, 10.0, step=0.1, key="effect_size")
     
     with col2:
         mu = 70  # null hypothesis mean
         
-        # Simulating data
-        np.random.seed(42)
-        sample_data = np.random.normal(mu + effect_size, sigma, n)
-        sample_mean = np.mean(sample_data)
-        
-        # Calculating Z-score and p-value
-        z_score = (sample_mean - mu) / (sigma / np.sqrt(n))
-        p_value = 1 - stats.norm.cdf(z_score)
+        sample_mean, z_score, p_value = analyze_scores(n, sigma, effect_size, mu)
         
         st.markdown(f"📊 Average score we found: **{sample_mean:.2f}**")
         st.markdown(f"🧮 Z-score (our magic number): **{z_score:.2f}**")
@@ -226,11 +311,14 @@ with tab4:
                       yaxis_title="How likely",
                       legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01))
     
-    st.plotly_chart(fig, use_container_width=True)
+    trace_reduction.plotly_chart(fig, use_container_width=True)
 
-with tab5:
+elif section == sections[4]:
     st.header("5️⃣ Making a Decision")
     
+    alpha = st.session_state["alpha"]
+    _, _, p_value = analyze_scores(st.session_state["n_students"], st.session_state["sigma"], st.session_state["effect_size"])
+    
     if p_value < alpha:
         st.markdown(f"""
         <div class="highlight">
@@ -268,7 +356,7 @@ with tab5:
     </div>
     """, unsafe_allow_html=True)
 
-with tab6:
+elif section == sections[5]:
     st.header("🏆 Quiz Time")
     
     st.markdown("""
@@ -385,4 +473,4 @@ with tab6:
     - [Crash Course Statistics: Hypothesis Testing](https://www.youtube.com/watch?v=WWdpLbbBveo) - Fast, fun, and informative!
     """)
 
-
+profiling.report()
@@ -0,0 +1,89 @@
+"""Single-sampling acceptance plans for a finite lot.
+
+A plan (n, c) inspects n units of a lot of N and accepts the lot when at
+most c of them are defective. Its operating characteristic is
+
+    Pa(p) = P(X <= c),  X ~ Hypergeometric(N, round(p N), n)
+
+or Binomial(n, p) when the lot is treated as infinite. For an acceptable
+quality level AQL and a rejectable quality level LTPD:
+
+    producer's risk  alpha(n, c) = 1 - Pa(AQL)   (good lot rejected)
+    consumer's risk  beta(n, c)  = Pa(LTPD)      (bad lot accepted)
+
+`risk_tables` evaluates both risks for every plan with 1 <= n <= n_max and
+0 <= c <= c_max at once. It builds one log-pmf array over (n, quality
+level, k) from gammaln and cumulative-sums it along k, which gives the
+whole CDF grid in a few numpy passes. About 10^5 plans take
+milliseconds, so the planner can search them on every slider move.
+scipy.special is imported on first use.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+Plan = namedtuple("Plan", ["n", "c", "producer_risk", "consumer_risk"])
+
+MODELS = ("hypergeometric", "binomial")
+
+
+def _gammaln(x):
+    from scipy.special import gammaln
+    return gammaln(x)
+
+
+def _log_choose(n, k):
+    return _gammaln(n + 1) - _gammaln(k + 1) - _gammaln(n - k + 1)
+
+
+def _cdf_grid(n, rates, c_max, lot_size, model):
+    # cdf[i, j, c] = P(X <= c) for sample size n[i] at defect rate rates[j]
+    n = np.asarray(n, dtype=float)[:, None, None]
+    rates = np.asarray(rates, dtype=float)[None, :, None]
+    k = np.arange(c_max + 1, dtype=float)
+
+    if model == "binomial":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_pmf = _log_choose(n, k) + k * np.log(rates) + (n - k) * np.log1p(-rates)
+        log_pmf = np.where(k <= n, log_pmf, -np.inf)
+        # A defect rate of 0 puts all mass on k = 0
+        log_pmf = np.where((rates == 0) & (k == 0), 0.0, log_pmf)
+    elif model == "hypergeometric":
+        if lot_size is None:
+            raise ValueError("the hypergeometric model needs lot_size")
+        n = np.minimum(n, lot_size)
+        defects = np.round(rates * lot_size)
+        with np.errstate(invalid="ignore"):
+            log_pmf = (_log_choose(defects, k) + _log_choose(lot_size - defects, n - k)
+                       - _log_choose(float(lot_size), n))
+        feasible = (k <= defects) & (k <= n) & (n - k <= lot_size - defects)
+        log_pmf = np.where(feasible, log_pmf, -np.inf)
+    else:
+        raise ValueError(f"model must be one of {MODELS}, got {model!r}")
+
+    return np.clip(np.cumsum(np.exp(log_pmf), axis=-1), 0.0, 1.0)
+
+
+def risk_tables(n_max, c_max, aql, ltpd, lot_size=None, model="hypergeometric"):
+    # (producer_risk, consumer_risk), each of shape (n_max, c_max + 1) with
+    # row n - 1 and column c. Plans with c >= n accept every lot.
+    cdf = _cdf_grid(np.arange(1, n_max + 1), [aql, ltpd], c_max, lot_size, model)
+    return 1.0 - cdf[:, 0, :], cdf[:, 1, :]
+
+
+def minimal_plan(producer_risk, consumer_risk, alpha, beta):
+    # Smallest n meeting both targets; among its feasible c the one with
+    # the lowest producer's risk. None when no plan in the tables qualifies.
+    feasible = (producer_risk <= alpha) & (consumer_risk <= beta)
+    rows = np.flatnonzero(feasible.any(axis=1))
+    if not len(rows):
+        return None
+    row = rows[0]
+    candidates = np.flatnonzero(feasible[row])
+    c = int(candidates[np.argmin(producer_risk[row, candidates])])
+    return Plan(int(row) + 1, c, float(producer_risk[row, c]), float(consumer_risk[row, c]))
+
+
+def oc_curve(n, c, rates, lot_size=None, model="hypergeometric"):
+    # Acceptance probability of plan (n, c) at every defect rate in rates
+    return _cdf_grid([n], rates, c, lot_size, model)[0, :, c]
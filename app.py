@@ -0,0 +1,31 @@
+"""All lessons behind one Streamlit server.
+
+    streamlit run app.py
+
+Each lesson script is registered as a page and only executed (and its
+imports only paid for) when a visitor first opens it. Datasets and caches
+in datasets.py are shared by every page and session in the process. The
+lesson scripts still run on their own with `streamlit run <script>`.
+"""
+import streamlit as st
+
+PAGES = {
+    "Foundations": [
+        st.Page("1_introduction_hypothesis_testing.py", title="Introduction", icon="🔬", default=True),
+        st.Page("2_hypothesis_testing_keyterms.py", title="Key Terms", icon="⚖️"),
+        st.Page("3_hypothesis_testing_example.py", title="Worked Example", icon="🛒"),
+        st.Page("5_hypothesis_testing_steps.py", title="Testing Steps", icon="🚀"),
+    ],
+    "Errors and Tests": [
+        st.Page("1_confidence_interval.py", title="Confidence Intervals", icon="🎯"),
+        st.Page("3_type_1_2_errors.py", title="Type I/II Errors: Justice", icon="👩‍⚖️"),
+        st.Page("3_type_1_2_errors_medical.py", title="Type I/II Errors: Medical", icon="🏥"),
+        st.Page("4_one_tailed_two_tailed_test.py", title="One vs Two-tailed Tests", icon="↔️"),
+    ],
+    "Case Studies": [
+        st.Page("internet_usage_streamlit.py", title="Mobile Internet Usage", icon="📱"),
+        st.Page("medicone_streamlit1.py", title="Medicon Doses", icon="💉"),
+    ],
+}
+
+st.navigation(PAGES).run()
@@ -0,0 +1,240 @@
+"""Approximate z- and t-tests from a uniform sample, with error bounds.
+
+On a very large usage log the exact summary needs a full scan. A
+SampleIndex is built once, when the data is ingested, and the
+interactive tests read only the sample while the exact scan runs in the
+background (`background`). The index holds a uniform random sample
+without replacement of up to `size` values, drawn in one chunked pass:
+every value gets a random key, and the sample is the `size` smallest
+keys, kept with np.argpartition per chunk (`add`). Indexes of disjoint
+shards merge the same way (`merge`).
+
+Ingestion saves the index next to the cache (`save_index`), keyed on the
+file's size and modification time, so every later process loads it
+(`load_index`) instead of reading the log:
+
+    python approximate.py usage.csv --column Minutes
+
+A file that was not ingested gets its index from the exact scan itself:
+`summarize_csv` (or sharded_scan.scan_with_index) folds every chunk into
+both the summary and the index, so the exact answer never waits behind
+a separate sampling pass.
+
+The approximate test plugs the sample mean m and standard deviation s
+into the full-data statistic, (m - popmean) / (s / sqrt(N)) for the N
+values in the population. Then it bounds the error. With probability at
+least `confidence`, the exact population mean lies within
+
+    t * s / sqrt(k) * sqrt((N - k) / (N - 1))      (k sampled values)
+
+of m, and the exact variance lies within
+
+    z * sqrt((m4 - s^4 (k - 3) / (k - 1)) / k) * sqrt((N - k) / (N - 1))
+
+of s^2. The variance bound uses the sample's fourth central moment m4, so
+it holds for skewed data as well as normal data. The two bounds split
+1 - confidence between them. The p-value and the confidence interval the
+exact test would report are therefore inside the ranges returned, which
+come from the corners of that box.
+Both bounds are asymptotic in k. When the sample is the whole
+population (N <= size), both widths are 0 and the answer is exact.
+"""
+import argparse
+import hashlib
+import math
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import disk_cache
+import fdr
+import log_pvalues
+import quantile_sketch
+import stats_core as stats
+import summaries
+
+SAMPLE_SIZE = 100_000
+
+SampleIndex = namedtuple("SampleIndex", ["sample", "keys", "population"])
+ApproximateTest = namedtuple("ApproximateTest", [
+    "statistic", "pvalue", "pvalue_bounds", "mean", "mean_bounds", "ci", "ci_error", "sample_size", "population",
+])
+
+
+def _smallest(values, keys, size):
+    if len(keys) <= size:
+        return values, keys
+    keep = np.argpartition(keys, size - 1)[:size]
+    return values[keep], keys[keep]
+
+
+def empty_index():
+    return SampleIndex(np.empty(0), np.empty(0), 0)
+
+
+def add(index, chunk, rng, size=SAMPLE_SIZE):
+    # Folds one chunk of values into the index; NaNs are not part of the population
+    chunk = np.asarray(chunk, dtype=float)
+    chunk = chunk[~np.isnan(chunk)]
+    sample, keys = _smallest(np.concatenate([index.sample, chunk]), np.concatenate([index.keys, rng.random(len(chunk))]), size)
+    return SampleIndex(sample, keys, index.population + len(chunk))
+
+
+def build_index(source, size=SAMPLE_SIZE, seed=0):
+    # source: an fdr-style function returning a fresh iterator of 1-D chunks
+    rng = np.random.default_rng(seed)
+    index = empty_index()
+    for chunk in source():
+        index = add(index, chunk, rng, size)
+    return index
+
+
+def index_csv(path, column, size=SAMPLE_SIZE, seed=0, chunksize=fdr.CHUNKSIZE):
+    return build_index(fdr.csv_chunks(path, column, chunksize), size, seed)
+
+
+def summarize_csv(path, column, size=SAMPLE_SIZE, seed=0, chunksize=summaries.CHUNKSIZE):
+    # The exact summary (with its quantile sketch) and the sample index from
+    # one chunked pass; the same summary summaries.from_csv(sketch=True) gives
+    rng = np.random.default_rng(seed)
+    summary = summaries.SampleSummary(sketch=quantile_sketch.KLLSketch())
+    index = empty_index()
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+        values = chunk[column].to_numpy(dtype=float)
+        summary = summary.merge(summaries.from_values(values, sketch=True))
+        index = add(index, values, rng, size)
+    return summary, index
+
+
+def merge(a, b, size=SAMPLE_SIZE):
+    # Indexes of disjoint shards; their keys must come from different seeds
+    sample, keys = _smallest(np.concatenate([a.sample, b.sample]), np.concatenate([a.keys, b.keys]), size)
+    return SampleIndex(sample, keys, a.population + b.population)
+
+
+def _bounds(index, tail):
+    # (m, s^2, mean margin, variance margin) with each margin at 1 - tail
+    x = index.sample
+    k, n = len(x), index.population
+    if k < 2:
+        raise ValueError("the sample needs at least two values")
+    m = float(x.mean())
+    var = float(x.var(ddof=1))
+    fpc = math.sqrt((n - k) / (n - 1)) if n > 1 else 0.0
+    mean_margin = float(stats.t.ppf(1 - tail / 2, k - 1) * math.sqrt(var / k) * fpc)
+    m4 = float(np.mean((x - m) ** 4))
+    var_se = math.sqrt(max(m4 - var * var * (k - 3) / (k - 1), 0.0) / k)
+    var_margin = float(stats.norm.ppf(1 - tail / 2)) * var_se * fpc
+    return m, var, mean_margin, var_margin
+
+
+def _test(index, popmean, alternative, confidence, ci_level, sigma=None):
+    tail = (1 - confidence) / 2
+    m, var, mean_margin, var_margin = _bounds(index, tail)
+    n = index.population
+    if sigma is None:
+        s = math.sqrt(var)
+        s_bounds = (math.sqrt(max(var - var_margin, 0.0)), math.sqrt(var + var_margin))
+        df, critical = n - 1, float(stats.t.ppf((1 + ci_level) / 2, n - 1))
+    else:
+        s, s_bounds = sigma, (sigma, sigma)
+        df, critical = None, float(stats.norm.ppf((1 + ci_level) / 2))
+
+    root_n = math.sqrt(n)
+    statistic = (m - popmean) / (s / root_n)
+    # The statistic is monotone in the mean and in s, so the corners of
+    # the box hold its extremes (s_lo = 0 means an unbounded statistic)
+    numerators = np.array([m - mean_margin - popmean, m + mean_margin - popmean])
+    with np.errstate(divide="ignore"):
+        corners = (numerators[:, None] / (np.array(s_bounds)[None, :] / root_n)).ravel()
+    corners = np.nan_to_num(corners, nan=0.0)
+    if numerators[0] < 0 < numerators[1]:
+        corners = np.append(corners, 0.0)
+    p_corners = np.exp(log_pvalues.log_p_value(corners, alternative, df))
+    log_p = float(log_pvalues.log_p_value(statistic, alternative, df))
+
+    half_width = critical * s / root_n
+    ci_error = mean_margin + critical * max(s_bounds[1] - s, s - s_bounds[0]) / root_n
+    return ApproximateTest(
+        statistic, math.exp(log_p), (float(p_corners.min()), float(p_corners.max())),
+        m, (m - mean_margin, m + mean_margin), (m - half_width, m + half_width), float(ci_error),
+        len(index.sample), n,
+    )
+
+
+def t_test(index, popmean, alternative="two-sided", confidence=0.99, ci_level=0.95):
+    return _test(index, popmean, alternative, confidence, ci_level)
+
+
+def z_test(index, popmean, sigma, alternative="two-sided", confidence=0.99, ci_level=0.95):
+    return _test(index, popmean, alternative, confidence, ci_level, sigma)
+
+
+def index_path(path, column):
+    # One file per data file and column under the cache directory
+    digest = hashlib.sha1(f"{os.path.abspath(path)}\0{column}".encode()).hexdigest()[:20]
+    return os.path.join(disk_cache.CACHE_DIR, "indexes", f"{digest}.npz")
+
+
+def save_index(index, path, column):
+    # Stored with the file's token; written to a temporary file and renamed,
+    # so readers never see half an index. Failing to write only costs speed.
+    target = index_path(path, column)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f"{target}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, sample=index.sample, keys=index.keys, population=index.population,
+                 token=np.array(disk_cache.file_token(path)))
+        os.replace(temporary, target)
+    except OSError:
+        pass
+
+
+def load_index(path, column):
+    # The ingested index of the file as it is now, or None
+    try:
+        with np.load(index_path(path, column)) as saved:
+            if tuple(saved["token"]) != tuple(disk_cache.file_token(path)):
+                return None
+            return SampleIndex(saved["sample"], saved["keys"], int(saved["population"]))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+_executor = None
+
+
+def background(fn, *args):
+    # Runs fn(*args) on a shared worker thread and returns its Future; the
+    # exact scans queue behind each other instead of competing for the disk
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exact-scan")
+    return _executor.submit(fn, *args)
+
+
+def ready(future, timeout=0.0):
+    # Gives a fast job up to `timeout` seconds before falling back to the sample
+    return bool(wait([future], timeout=timeout).done)
+
+
+def main():
+    # Ingestion: build and save the index of a column
+    parser = argparse.ArgumentParser(description="Build the sample index of a CSV column at ingestion.")
+    parser.add_argument("path")
+    parser.add_argument("--column", required=True)
+    parser.add_argument("--size", type=int, default=SAMPLE_SIZE, help=f"sampled values (default: {SAMPLE_SIZE:,})")
+    args = parser.parse_args()
+
+    index = index_csv(args.path, args.column, args.size)
+    save_index(index, args.path, args.column)
+    print(f"Sampled {len(index.sample):,} of {index.population:,} values into {index_path(args.path, args.column)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Run the lessons' one-sample analyses over a directory tree of CSVs.
+
+For every matching CSV the first of the --column names present in it is
+summarized in one chunked pass (summaries.from_csv). The runner then
+applies the analyses from the apps:
+
+    internet usage   z-test (when --sigma is given) and t-test of the mean
+                     against --popmean, with the decision at --alpha and
+                     -log10 p-values that stay finite when p underflows
+    Medicon          t confidence interval for the mean at --confidence,
+                     and each --percentiles value both from the fitted
+                     normal and empirically from the KLL sketch
+
+Files are processed in a process pool and the results are written to one
+CSV with a row per file, including its processing time and any error.
+A failed analysis is reported in its own column (z_error, t_error, ...)
+and keeps the file's other results; a statistic that is undefined, such
+as the t-test of a constant column on --popmean, is nan with decision
+"undefined".
+With thousands of files the per-file decisions at --alpha are thousands
+of tests, so the runner also adds Benjamini-Hochberg (or, with
+--fdr-method by, Benjamini-Yekutieli) q-values across the files and the
+decision at false discovery rate --fdr.
+
+    python batch_cli.py data/ --popmean 144 --sigma 110 --output results.csv
+    python batch_cli.py doses/ --column time_of_effect --percentiles 10 50 90
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import fdr
+import hypothesis_tests
+import log_pvalues
+import stats_core as stats
+import summaries
+
+DEFAULT_COLUMNS = ["Minutes", "time_of_effect"]
+
+
+def find_csvs(root, pattern_suffix=".csv"):
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(pattern_suffix):
+                yield os.path.join(directory, name)
+
+
+def _decision(log_p, alpha):
+    if math.isnan(log_p):
+        return "undefined"
+    return "reject" if log_p < math.log(alpha) else "fail to reject"
+
+
+def _record(row, name, analysis):
+    # Each analysis fails on its own, so an undefined statistic keeps the
+    # file's other results
+    try:
+        row.update(analysis())
+    except Exception as e:
+        row[f"{name}_error"] = f"{type(e).__name__}: {e}"
+
+
+def analyze_file(path, options):
+    start = time.perf_counter()
+    row = {"file": path}
+    try:
+        header = list(pd.read_csv(path, nrows=0).columns)
+        column = next((c for c in options["columns"] if c in header), None)
+        if column is None:
+            raise ValueError(f"none of the columns {options['columns']} found")
+        summary = summaries.from_csv(path, column, sketch=bool(options["percentiles"]))
+        if not summary.n:
+            raise ValueError(f"no values in {column!r}")
+    except Exception as e:  # one bad file must not stop the batch
+        row["error"] = f"{type(e).__name__}: {e}"
+        row["seconds"] = time.perf_counter() - start
+        return row
+
+    row.update(column=column, n=summary.n, mean=summary.mean, std=summary.std,
+               min=summary.min, max=summary.max)
+    popmean, alpha = options["popmean"], options["alpha"]
+
+    def z_test():
+        z, log_p_z = hypothesis_tests.z_test(summary, popmean, options["sigma"], log_p=True)
+        return dict(z_stat=z, z_pvalue=math.exp(log_p_z), z_neg_log10_p=-log_pvalues.log10(log_p_z).item(),
+                    z_decision=_decision(log_p_z, alpha))
+
+    def t_test():
+        t_stat, log_p_t = hypothesis_tests.t_test(summary, popmean, log_p=True)
+        return dict(t_stat=t_stat, t_pvalue=math.exp(log_p_t), t_neg_log10_p=-log_pvalues.log10(log_p_t).item(),
+                    t_decision=_decision(log_p_t, alpha))
+
+    def interval():
+        lower, upper = hypothesis_tests.t_interval(summary, options["confidence"])
+        return dict(ci_lower=lower, ci_upper=upper)
+
+    def percentiles():
+        values = {}
+        for percentile in options["percentiles"]:
+            values[f"p{percentile:g}_normal"] = float(stats.norm.ppf(percentile / 100, summary.mean, summary.std))
+            values[f"p{percentile:g}_empirical"] = summary.sketch.quantile(percentile / 100)
+        return values
+
+    if options["sigma"]:
+        _record(row, "z", z_test)
+    _record(row, "t", t_test)
+    _record(row, "ci", interval)
+    _record(row, "percentile", percentiles)
+    row["seconds"] = time.perf_counter() - start
+    return row
+
+
+def add_fdr(results, level, method):
+    # q-values across files for each test that was run; failed files are
+    # left out of the family
+    for test in ("z", "t"):
+        column = f"{test}_neg_log10_p"
+        if column not in results:
+            continue
+        ok = results[column].notna()
+        log_p = -results.loc[ok, column].to_numpy() * math.log(10)
+        log_q = fdr.qvalues(log_p, method, log=True)
+        results.loc[ok, f"{test}_qvalue"] = np.exp(log_q)
+        results.loc[ok, f"{test}_fdr_decision"] = np.where(log_q <= math.log(level), "reject", "fail to reject")
+    return results
+
+
+def _analyze(args):
+    return analyze_file(*args)
+
+
+def run(paths, options, workers=None):
+    jobs = [(path, options) for path in paths]
+    if workers == 1 or len(jobs) <= 1:
+        return [_analyze(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Batch many small files per task to keep IPC overhead low
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+        return list(pool.map(_analyze, jobs, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory searched recursively for CSV files")
+    parser.add_argument("--column", action="append", dest="columns",
+                        help=f"column to analyze; repeat to give fallbacks (default: {' then '.join(DEFAULT_COLUMNS)})")
+    parser.add_argument("--popmean", type=float, default=144.0, help="hypothesized mean (default: 144)")
+    parser.add_argument("--sigma", type=float, default=None, help="known population sigma for the z-test")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level (default: 0.05)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence level of the interval")
+    parser.add_argument("--percentiles", type=float, nargs="*", default=[10, 50, 90],
+                        help="percentiles to report, normal and empirical (default: 10 50 90)")
+    parser.add_argument("--fdr", type=float, default=0.05, help="false discovery rate across files (default: 0.05)")
+    parser.add_argument("--fdr-method", choices=fdr.METHODS, default="bh",
+                        help="bh (independent or positively dependent tests) or by (any dependence)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--output", default="batch_results.csv", help="results CSV (default: batch_results.csv)")
+    args = parser.parse_args()
+
+    paths = list(find_csvs(args.root))
+    if not paths:
+        print(f"No CSV files under {args.root}", file=sys.stderr)
+        return 1
+
+    options = {
+        "columns": args.columns or DEFAULT_COLUMNS,
+        "popmean": args.popmean,
+        "sigma": args.sigma,
+        "alpha": args.alpha,
+        "confidence": args.confidence,
+        "percentiles": args.percentiles,
+    }
+    start = time.perf_counter()
+    rows = run(paths, options, args.workers)
+    elapsed = time.perf_counter() - start
+
+    results = add_fdr(pd.DataFrame(rows), args.fdr, args.fdr_method)
+    # Timing and errors last, whichever row happened to come first
+    tail = ["seconds"] + sorted(c for c in results if c.endswith("error"))
+    results = results[[c for c in results if c not in tail] + tail]
+    results.to_csv(args.output, index=False)
+    failed = int(results["error"].notna().sum()) if "error" in results else 0
+    test_errors = [c for c in results if c.endswith("_error")]
+    partial = int(results[test_errors].notna().any(axis=1).sum()) if test_errors else 0
+    print(f"{len(rows):,} files in {elapsed:.2f}s ({len(rows) / elapsed * 60:,.0f} files/min), "
+          f"{failed} failed, {partial} with a failed analysis; results in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Import-time benchmark: scipy.stats vs stats_core, per script.
+
+Each script's top-level imports are timed in fresh interpreters twice:
+as written (stats_core) and with the stats_core imports swapped back to
+their scipy.stats equivalents. The best of --repeat runs is reported.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 internet_usage_streamlit.py
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+def import_statements(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    return [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def with_scipy(node):
+    # Rewrite a stats_core import to the scipy.stats import it replaced
+    if isinstance(node, ast.ImportFrom) and node.module == "stats_core":
+        return ast.ImportFrom(module="scipy.stats", names=node.names, level=0)
+    if isinstance(node, ast.Import) and any(alias.name == "stats_core" for alias in node.names):
+        alias = next(alias for alias in node.names if alias.name == "stats_core")
+        return ast.ImportFrom(module="scipy", names=[ast.alias("stats", alias.asname)], level=0)
+    return node
+
+
+def time_imports(nodes, repeat):
+    code = PROBE.format(imports="\n".join(ast.unparse(node) for node in nodes))
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", help="scripts to measure (default: every script using stats_core)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    scripts = args.scripts or sorted(
+        os.path.basename(path) for path in glob.glob(os.path.join(ROOT, "*.py"))
+        if any(with_scipy(node) is not node for node in import_statements(path))
+    )
+
+    print(f"{'script':45s} {'scipy.stats':>12s} {'stats_core':>12s} {'saved':>10s}")
+    for script in scripts:
+        nodes = import_statements(os.path.join(ROOT, script))
+        before = time_imports([with_scipy(node) for node in nodes], args.repeat)
+        after = time_imports(nodes, args.repeat)
+        if before is None or after is None:
+            print(f"{script:45s} {'n/a':>12s} {'n/a':>12s}   (imports failed in this environment)")
+            continue
+        print(f"{script:45s} {before * 1000:10.0f}ms {after * 1000:10.0f}ms {(before - after) * 1000:8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Load test for kernel_service.py on localhost.
+
+Starts the service in a subprocess (or targets --port of a running one),
+then opens --concurrency keep-alive connections that each send requests
+back to back until --requests have been made. Parameters are drawn so
+that about --unique of the evaluations are new to the cache; the rest
+repeat earlier ones. Each request carries --batch-size evaluations.
+
+Reported: request latency p50/p90/p99/max, requests and evaluations per
+second, and the service's cache hit rate.
+
+    python benchmarks/loadtest_service.py
+    python benchmarks/loadtest_service.py --concurrency 64 --batch-size 100 --unique 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KERNELS = ["calculate_ci", "proportions_ztest", "binomial_pvalue", "error_rates"]
+
+
+def random_params(kernel, rng):
+    if kernel == "calculate_ci":
+        return {"mean": rng.randint(100, 200), "std": rng.randint(5, 50),
+                "n": rng.randint(10, 500), "conf_level": rng.choice([0.9, 0.95, 0.99])}
+    if kernel == "proportions_ztest":
+        nobs = [rng.randint(50, 500), rng.randint(50, 500)]
+        return {"count": [rng.randint(1, nobs[0] - 1), rng.randint(1, nobs[1] - 1)], "nobs": nobs}
+    if kernel == "binomial_pvalue":
+        trials = rng.randint(5, 200)
+        return {"successes": rng.randint(0, trials), "trials": trials}
+    return {"innocence_mean": 0, "guilt_mean": rng.randint(1, 40) / 10,
+            "variability": rng.randint(5, 20) / 10, "alpha": rng.choice([0.01, 0.05, 0.1])}
+
+
+class Workload:
+    def __init__(self, unique, seed):
+        self.unique = unique
+        self.rng = random.Random(seed)
+        self.seen = {kernel: [] for kernel in KERNELS}
+
+    def params(self, kernel):
+        # A repeat of earlier parameters with probability 1 - unique
+        seen = self.seen[kernel]
+        if seen and self.rng.random() >= self.unique:
+            return self.rng.choice(seen)
+        params = random_params(kernel, self.rng)
+        seen.append(params)
+        return params
+
+
+async def post(reader, writer, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        field, _, value = line.decode().partition(":")
+        if field.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, workload, counter, batch_size, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while counter[0] > 0:
+            counter[0] -= 1
+            kernel = workload.rng.choice(KERNELS)
+            if batch_size > 1:
+                payload = {"batch": [workload.params(kernel) for _ in range(batch_size)]}
+            else:
+                payload = {"params": workload.params(kernel)}
+            start = time.perf_counter()
+            status, _ = await post(reader, writer, f"/v1/{kernel}", payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def get_json(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return json.loads(raw.split(b"\r\n\r\n", 1)[1])
+
+
+async def run(port, requests, concurrency, batch_size, unique, seed):
+    workload = Workload(unique, seed)
+    counter = [requests]
+    latencies, errors = [], []
+    before = (await get_json(port, "/health"))["cache"]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, workload, counter, batch_size, latencies, errors)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = (await get_json(port, "/health"))["cache"]
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return np.array(latencies), errors, elapsed, hits / lookups if lookups else 0.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"service did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, help="port of a running service (default: start one)")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=32, help="keep-alive connections")
+    parser.add_argument("--batch-size", type=int, default=1, help="evaluations per request")
+    parser.add_argument("--unique", type=float, default=0.2,
+                        help="share of evaluations with parameters not seen before (default: 0.2)")
+    parser.add_argument("--cache-size", type=int, default=65536, help="cache size of the started service")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    service = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        service = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "kernel_service.py"), "--port", str(port),
+             "--cache-size", str(args.cache_size)],
+            cwd=ROOT, stdout=subprocess.DEVNULL,
+        )
+    try:
+        wait_for(port)
+        latencies, errors, elapsed, hit_rate = asyncio.run(
+            run(port, args.requests, args.concurrency, args.batch_size, args.unique, args.seed))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+    ms = latencies * 1000
+    print(f"{len(latencies):,} requests x {args.batch_size} evaluations, "
+          f"{args.concurrency} connections, {elapsed:.2f}s")
+    print(f"latency ms  p50 {np.percentile(ms, 50):.2f}  p90 {np.percentile(ms, 90):.2f}  "
+          f"p99 {np.percentile(ms, 99):.2f}  max {ms.max():.2f}")
+    print(f"throughput  {len(latencies) / elapsed:,.0f} requests/s, "
+          f"{len(latencies) * args.batch_size / elapsed:,.0f} evaluations/s")
+    print(f"cache hits  {hit_rate:.1%}, non-200 responses: {len(errors)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Startup and first-render benchmark for the Streamlit lessons.
+
+Every script runs in its own fresh interpreter under Streamlit's headless
+AppTest runner, which records:
+
+    import_s     time to execute the script's top-level imports
+    first_run_s  wall time of the first full script run
+    rerun_s      wall time of the rerun after one widget change
+                 (the first slider, else number input, else radio)
+    peak_mb      peak Python heap during both runs (tracemalloc)
+    max_rss_mb   peak resident memory of the worker process
+
+Results are written as JSON. Pass --compare with an earlier file to diff
+against it. The exit status is 1 when any metric regressed by more than
+--threshold (relative) and --min-delta (absolute, same units), or when
+a script fails or raises where the baseline ran cleanly.
+
+    python benchmarks/startup.py --output benchmarks/startup_baseline.json
+    python benchmarks/startup.py --compare benchmarks/startup_baseline.json --threshold 0.25
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from import_time import ROOT, import_statements
+
+SCRIPTS = [
+    "1_confidence_interval.py",
+    "1_introduction_hypothesis_testing.py",
+    "2_hypothesis_testing_keyterms.py",
+    "3_hypothesis_testing_example.py",
+    "3_type_1_2_errors.py",
+    "3_type_1_2_errors_medical.py",
+    "4_one_tailed_two_tailed_test.py",
+    "5_hypothesis_testing_steps.py",
+    "internet_usage_streamlit.py",
+    "medicone_streamlit1.py",
+]
+
+METRICS = ["import_s", "first_run_s", "rerun_s", "peak_mb", "max_rss_mb"]
+
+
+def change_one_widget(at):
+    # Returns the label of the widget that was changed, or None
+    for slider in at.slider:
+        if isinstance(slider.value, (int, float)):
+            step = slider.step or 1
+            slider.set_value(slider.value + step if slider.value + step <= slider.max else slider.value - step)
+            return slider.label
+    for number in at.number_input:
+        number.increment()
+        return number.label
+    for radio in at.radio:
+        options = list(radio.options)
+        if len(options) > 1:
+            radio.set_value(options[(options.index(radio.value) + 1) % len(options)])
+            return radio.label
+    return None
+
+
+def measure(script):
+    path = os.path.join(ROOT, script)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    start = time.perf_counter()
+    for node in import_statements(path):
+        exec(compile(ast.Module(body=[node], type_ignores=[]), path, "exec"), {})
+    import_s = time.perf_counter() - start
+
+    from streamlit.testing.v1 import AppTest
+
+    tracemalloc.start()
+    at = AppTest.from_file(path, default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    first_run_s = time.perf_counter() - start
+
+    widget = change_one_widget(at)
+    start = time.perf_counter()
+    at.run()
+    rerun_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "import_s": import_s,
+        "first_run_s": first_run_s,
+        "rerun_s": rerun_s,
+        "peak_mb": peak / 2**20,
+        "max_rss_mb": max_rss_mb(),
+        "changed_widget": widget,
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def run_worker(script):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", script],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "worker failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def best_of(runs):
+    good = [run for run in runs if "error" not in run]
+    if not good:
+        return runs[0]
+    best = dict(good[0])
+    for metric in METRICS:
+        values = [run[metric] for run in good if run.get(metric) is not None]
+        best[metric] = min(values) if values else None
+    return best
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    print(f"\n{'script':40s} {'metric':12s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for script, current in results.items():
+        previous = baseline.get(script, {})
+        # A script that fails or raises now, but did not before, is a regression too
+        if "error" in current and "error" not in previous:
+            regressions.append((script, "error"))
+            print(f"{script:40s} {'error':12s} {current['error'][:60]}  REGRESSION")
+        elif current.get("exceptions") and not previous.get("exceptions"):
+            regressions.append((script, "exceptions"))
+            print(f"{script:40s} {'exceptions':12s} {'; '.join(current['exceptions'])[:60]}  REGRESSION")
+        if not previous or "error" in current or "error" in previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > threshold and new - old > min_delta:
+                flag = "  REGRESSION"
+                regressions.append((script, metric))
+            print(f"{script:40s} {metric:12s} {old:10.3f} {new:10.3f} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "startup_results.json"))
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="ignore regressions smaller than this absolute amount")
+    parser.add_argument("--repeat", type=int, default=1, help="fresh workers per script, best run kept")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker)))
+        return 0
+
+    results = {}
+    print(f"{'script':40s} {'import':>8s} {'first run':>10s} {'rerun':>8s} {'peak MB':>8s} {'RSS MB':>8s}")
+    for script in args.scripts:
+        results[script] = best_of([run_worker(script) for _ in range(args.repeat)])
+        r = results[script]
+        if "error" in r:
+            print(f"{script:40s} error: {r['error']}")
+            continue
+        print(f"{script:40s} {r['import_s']:8.3f} {r['first_run_s']:10.3f} {r['rerun_s']:8.3f} "
+              f"{r['peak_mb']:8.1f} {r['max_rss_mb'] or 0:8.1f}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Chi-square, F and ANOVA tests for large tables and grouped data.
+
+These are the tests in the selection guide of
+5_hypothesis_testing_steps.py that go beyond z and t:
+
+    chi2_independence   Pearson's test on r x c contingency tables;
+                        expected counts come from the margins. Any
+                        leading axes are a batch of tables tested at once.
+    chi2_goodness_of_fit  observed counts against expected proportions
+    f_test              ratio of two sample variances, from summaries,
+                        raw arrays, or arrays of variances and sizes for
+                        many comparisons at once
+    anova               one-way ANOVA, from grouped_tests
+
+None of them needs the raw rows once the data is reduced, so each has a
+streaming front end that reads its `source` in chunks. The source is a
+DataFrame, a CSV path or an uploaded file object:
+
+    crosstab(source, row, col)           counts per category pair
+    group_summary(source, value, by)     n, mean, M2 per group
+
+Millions of rows therefore never need to be in memory at once.
+p-values use scipy.special (chdtrc, fdtr, fdtrc), imported on first use.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import grouped_tests
+import hypothesis_tests
+
+CHUNKSIZE = 1_000_000
+
+Chi2Result = namedtuple("Chi2Result", ["statistic", "pvalue", "df", "expected"])
+FTestResult = namedtuple("FTestResult", ["statistic", "pvalue", "df_num", "df_den"])
+
+
+def iter_chunks(source, columns, chunksize=CHUNKSIZE):
+    # DataFrame slices, or CSV chunks limited to the needed columns
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize][columns]
+        return
+    if hasattr(source, "seek"):
+        source.seek(0)
+    yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+
+
+def crosstab(source, row, col, chunksize=CHUNKSIZE):
+    # Contingency table of counts, accumulated chunk by chunk
+    total = None
+    for chunk in iter_chunks(source, [row, col], chunksize):
+        counts = chunk.groupby([row, col], sort=False, observed=True).size()
+        total = counts if total is None else total.add(counts, fill_value=0)
+    if total is None:
+        return pd.DataFrame()
+    return total.unstack(fill_value=0).sort_index().sort_index(axis=1).astype(np.int64)
+
+
+def group_summary(source, value, by, chunksize=CHUNKSIZE):
+    total = grouped_tests.GroupSummary([], [], [], [])
+    for chunk in iter_chunks(source, [value, by], chunksize):
+        total = total.merge(grouped_tests.from_frame(chunk, value, by))
+    return total
+
+
+def chi2_independence(table):
+    # table: (..., r, c) counts; statistic, p-value and df per table
+    from scipy.special import chdtrc
+
+    observed = np.asarray(table, dtype=float)
+    if observed.ndim < 2 or observed.shape[-1] < 2 or observed.shape[-2] < 2:
+        raise ValueError("need at least a 2 x 2 table")
+    rows = observed.sum(axis=-1, keepdims=True)
+    cols = observed.sum(axis=-2, keepdims=True)
+    total = observed.sum(axis=(-2, -1), keepdims=True)
+    expected = rows * cols / total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        statistic = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0).sum(axis=(-2, -1))
+    # Empty rows or columns carry no information
+    r = (rows[..., 0] > 0).sum(axis=-1)
+    c = (cols[..., 0, :] > 0).sum(axis=-1)
+    df = (r - 1) * (c - 1)
+    return Chi2Result(statistic, chdtrc(df, statistic), df, expected)
+
+
+def chi2_goodness_of_fit(observed, proportions=None):
+    # Uniform proportions unless given; they are normalized to sum to 1
+    from scipy.special import chdtrc
+
+    observed = np.asarray(observed, dtype=float)
+    k = observed.shape[-1]
+    p = np.full(k, 1.0 / k) if proportions is None else np.asarray(proportions, dtype=float)
+    if (p < 0).any() or not (p.sum(axis=-1) > 0).all():
+        raise ValueError("proportions must be non-negative with a positive sum")
+    expected = observed.sum(axis=-1, keepdims=True) * p / p.sum(axis=-1, keepdims=True)
+    if not (expected > 0).all():
+        raise ValueError("every category needs a positive expected count (check for zero proportions or empty rows)")
+    statistic = ((observed - expected) ** 2 / expected).sum(axis=-1)
+    return Chi2Result(statistic, chdtrc(k - 1, statistic), k - 1, expected)
+
+
+def f_test(a, b, alternative="two-sided"):
+    # H0: equal variances. a and b are samples or SampleSummaries, or
+    # (variance, n) pairs of arrays to run many tests at once.
+    from scipy.special import fdtr, fdtrc
+
+    def variance_and_n(sample):
+        if isinstance(sample, tuple):
+            var, n = sample
+            return np.asarray(var, dtype=float), np.asarray(n, dtype=float)
+        summary = hypothesis_tests.as_summary(sample)
+        return summary.var, summary.n
+
+    var_a, n_a = variance_and_n(a)
+    var_b, n_b = variance_and_n(b)
+    df_num, df_den = n_a - 1, n_b - 1
+    statistic = var_a / var_b
+    upper = fdtrc(df_num, df_den, statistic)
+    lower = fdtr(df_num, df_den, statistic)
+    if alternative == "two-sided":
+        pvalue = np.minimum(2 * np.minimum(upper, lower), 1.0)
+    elif alternative == "greater":
+        pvalue = upper
+    elif alternative == "less":
+        pvalue = lower
+    else:
+        raise ValueError(f"alternative must be 'two-sided', 'less' or 'greater', got {alternative!r}")
+    return FTestResult(statistic, pvalue, df_num, df_den)
+
+
+def f_test_groups(groups, alternative="two-sided"):
+    # F-test between the two groups of a GroupSummary (first over second)
+    if len(groups) != 2:
+        raise ValueError(f"the F-test compares exactly two groups, found {len(groups)}")
+    var = groups.var
+    return f_test((var[0], groups.n[0]), (var[1], groups.n[1]), alternative)
+
+
+def anova(groups):
+    return grouped_tests.anova(groups)
@@ -0,0 +1,107 @@
+"""CUSUM and EWMA control charts for a stream of measurements.
+
+Both charts monitor the mean of a process against an in-control target
+with known (or phase-I estimated) sigma:
+
+    CUSUM   two-sided tabular CUSUM with reference value k and decision
+            interval h, both in units of sigma. It signals when either
+            cumulative sum exceeds h.
+    EWMA    z_t = lam * x_t + (1 - lam) * z_(t-1), started at the target.
+            It signals when z leaves target +/- L sigma_z(t), using the
+            exact time-varying limits.
+
+Each chart is a small class whose `update` takes one dose in O(1). Its
+`extend` processes a whole batch at once and leaves the chart in the same
+state as calling `update` on each value would:
+
+  * CUSUM: C_t = max(0, C_(t-1) + d_t) is the running sum S_t minus the
+    running minimum of S (floored at -C_0), i.e. one cumsum and one
+    minimum.accumulate.
+  * EWMA: the recursion is a first-order IIR filter, run by
+    scipy.signal.lfilter (scipy is imported on first use).
+
+Signals are not reset, so a chart shows how long a shift persists.
+"""
+import math
+
+import numpy as np
+
+
+class Cusum:
+    def __init__(self, target, sigma, k=0.5, h=5.0):
+        self.target = target
+        self.sigma = sigma
+        self.k = k * sigma
+        self.h = h * sigma
+        self.upper = 0.0
+        self.lower = 0.0
+        self.n = 0
+
+    def update(self, x):
+        self.upper = max(0.0, self.upper + x - self.target - self.k)
+        self.lower = max(0.0, self.lower + self.target - self.k - x)
+        self.n += 1
+        return self.upper, self.lower, self.upper > self.h or self.lower > self.h
+
+    @staticmethod
+    def _run(d, start):
+        # C_t = max(0, C_(t-1) + d_t) with C_0 = start, without a loop
+        s = np.cumsum(d)
+        return s - np.minimum(np.minimum.accumulate(s), -start)
+
+    def extend(self, values):
+        # Returns arrays upper, lower and signal, one entry per value
+        x = np.asarray(values, dtype=float)
+        upper = self._run(x - self.target - self.k, self.upper)
+        lower = self._run(self.target - self.k - x, self.lower)
+        if len(x):
+            self.upper, self.lower = float(upper[-1]), float(lower[-1])
+            self.n += len(x)
+        return {"upper": upper, "lower": lower, "signal": (upper > self.h) | (lower > self.h)}
+
+
+class Ewma:
+    def __init__(self, target, sigma, lam=0.2, L=3.0):
+        self.target = target
+        self.sigma = sigma
+        self.lam = lam
+        self.L = L
+        self.z = target
+        self.n = 0
+
+    def _half_width(self, t):
+        # Exact limit half-width after t observations
+        return self.L * self.sigma * np.sqrt(self.lam / (2 - self.lam) * (1 - (1 - self.lam) ** (2 * t)))
+
+    def update(self, x):
+        self.z = self.lam * x + (1 - self.lam) * self.z
+        self.n += 1
+        half = float(self._half_width(self.n))
+        return self.z, self.target - half, self.target + half, abs(self.z - self.target) > half
+
+    def extend(self, values):
+        # Returns arrays z, lower, upper and signal, one entry per value
+        from scipy.signal import lfilter
+
+        x = np.asarray(values, dtype=float)
+        if not len(x):
+            empty = np.empty(0)
+            return {"z": empty, "lower": empty, "upper": empty, "signal": np.empty(0, dtype=bool)}
+        # y_t = lam * x_t + (1 - lam) * y_(t-1), continuing from the current z
+        z, _ = lfilter([self.lam], [1, -(1 - self.lam)], x, zi=[(1 - self.lam) * self.z])
+        half = self._half_width(np.arange(self.n + 1, self.n + len(x) + 1))
+        self.z = float(z[-1])
+        self.n += len(x)
+        return {"z": z, "lower": self.target - half, "upper": self.target + half,
+                "signal": np.abs(z - self.target) > half}
+
+
+def phase_one(values):
+    # Target and sigma estimated from an in-control reference sample; sigma
+    # from the average moving range (d2 = 1.128), which is robust to drift
+    x = np.asarray(values, dtype=float)
+    if len(x) < 2:
+        raise ValueError("need at least two reference values")
+    moving_range = np.abs(np.diff(x)).mean()
+    sigma = moving_range / 1.128 if moving_range > 0 else x.std(ddof=1)
+    return float(x.mean()), float(sigma) if sigma > 0 else math.nan
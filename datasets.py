@@ -0,0 +1,257 @@
+"""Datasets and heavy resources shared by the lesson pages.
+
+Everything here is cached at module level, so when the lessons run as
+pages of app.py a single server process keeps one copy of each dataset
+no matter how many pages or sessions use it. Paths are resolved against
+the repository, not the working directory, so the pages work wherever
+streamlit is launched from.
+
+Results that are slow to build are also kept on disk by disk_cache, so
+other server processes and restarts load them instead of recomputing.
+File-based entries are keyed on the file's size and modification time.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import acceptance_sampling
+import approximate
+import density
+import disk_cache
+import grouped_tests
+import pvalue_surface
+import quantile_sketch
+import rank_tests
+import sharded_scan
+import stats_core as stats
+import summaries
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+# Files above this size are summarized with the multiprocess scanner
+SHARDED_SCAN_BYTES = 256 * 2**20
+
+
+def _path(name):
+    return os.path.join(DATA_DIR, name)
+
+
+# Raw files are not disk-cached: the CSV already is the on-disk copy, and
+# pickling a large frame only to find it over the size limit costs memory
+@st.cache_data
+def load_internet_usage():
+    return pd.read_csv(_path("InternetMobileTime.csv"))
+
+
+@st.cache_data
+def load_doses():
+    return pd.read_csv(_path("doses.csv"))
+
+
+@disk_cache.memoize(depends=(summaries, sharded_scan, quantile_sketch))
+def _summarize(path, column, token):
+    if os.path.getsize(path) > SHARDED_SCAN_BYTES:
+        # Large usage logs are parsed in parallel across all cores
+        return sharded_scan.scan(path, column)[0]
+    return summaries.from_csv(path, column, sketch=True)
+
+
+# n, mean, M2, min, max and a KLL quantile sketch, built in one chunked pass;
+# the tests and percentile queries run on these instead of the raw column
+@st.cache_data
+def load_internet_usage_summary():
+    path = _path("InternetMobileTime.csv")
+    return _summarize(path, "Minutes", disk_cache.file_token(path))
+
+
+# The exact summary together with a uniform sample index, from one pass
+# (one per core for large logs). The index is also saved as if ingested,
+# so other processes can answer from it while their own scan runs.
+@disk_cache.memoize(depends=(approximate, summaries, sharded_scan, quantile_sketch))
+def _summarize_with_index(path, column, token):
+    if os.path.getsize(path) > SHARDED_SCAN_BYTES:
+        summary, index, _ = sharded_scan.scan_with_index(path, column)
+    else:
+        summary, index = approximate.summarize_csv(path, column)
+    approximate.save_index(index, path, column)
+    return summary, index
+
+
+@st.cache_data
+def _ingested_index(path, column, token):
+    return approximate.load_index(path, column)
+
+
+# The sample index saved at ingestion (python approximate.py ...) for the
+# current version of the file, or None; reading it never scans the log
+def load_internet_usage_ingested_index():
+    path = _path("InternetMobileTime.csv")
+    return _ingested_index(path, "Minutes", disk_cache.file_token(path))
+
+
+# First rows only, for the preview; the tests use the sample and the summary
+@st.cache_data
+def load_internet_usage_head(rows=5):
+    return pd.read_csv(_path("InternetMobileTime.csv"), nrows=rows)
+
+
+# One background scan per file version, shared by every session
+@st.cache_resource
+def _start_scan(path, column, token):
+    return approximate.background(_summarize_with_index, path, column, token)
+
+
+# The Future's result is (summary, sample index); the summary is the one
+# load_internet_usage_summary returns
+def start_internet_usage_scan():
+    path = _path("InternetMobileTime.csv")
+    return _start_scan(path, "Minutes", disk_cache.file_token(path))
+
+
+# Drops a failed scan, so the next run of the page starts it again
+def retry_failed_internet_usage_scan():
+    job = start_internet_usage_scan()
+    if job.done() and job.exception() is not None:
+        _start_scan.clear()
+
+
+@st.cache_data
+def load_doses_summary():
+    path = _path("doses.csv")
+    return _summarize(path, "time_of_effect", disk_cache.file_token(path))
+
+
+@st.cache_data
+def load_doses_serial_summary():
+    path = _path("doses.csv")
+    return _summarize(path, "drug_serial_number", disk_cache.file_token(path))
+
+
+# First rows only, for previews; the analyses use the summaries above
+@st.cache_data
+def load_doses_head(rows=5):
+    return pd.read_csv(_path("doses.csv"), nrows=rows)
+
+
+@disk_cache.memoize(depends=(grouped_tests, summaries, sharded_scan, quantile_sketch))
+def _blocks(path, value, order_by, blocks, token):
+    # Per-block n, mean and M2 of `value` over about equal-count ranges of
+    # `order_by` (cut at its sketch quantiles) in one chunked pass, plus
+    # each block's first `order_by`
+    edges = _summarize(path, order_by, token).sketch.quantile(np.arange(1, blocks) / blocks)
+    total = grouped_tests.GroupSummary([], [], [], [])
+    first = np.full(blocks, np.inf)
+    for chunk in pd.read_csv(path, usecols=[order_by, value], chunksize=summaries.CHUNKSIZE):
+        order = chunk[order_by].to_numpy(dtype=float)
+        block = np.searchsorted(edges, order, side="right")
+        total = total.merge(grouped_tests.from_values(chunk[value].to_numpy(dtype=float), block))
+        np.minimum.at(first, block, order)
+    return total, first[total.labels]
+
+
+# time_of_effect by blocks of consecutive serial numbers; group labels are block indexes
+@st.cache_data
+def load_doses_blocks(blocks):
+    path = _path("doses.csv")
+    return _blocks(path, "time_of_effect", "drug_serial_number", blocks, disk_cache.file_token(path))
+
+
+@disk_cache.memoize(depends=(rank_tests, summaries, sharded_scan, quantile_sketch))
+def _halves_rank_test(path, value, order_by, token):
+    # Mann-Whitney U of `value` below vs above the sketch median of
+    # `order_by`, fed by chunked sources of each half
+    median = float(_summarize(path, order_by, token).sketch.quantile(0.5))
+
+    def half(late):
+        def chunks():
+            for chunk in pd.read_csv(path, usecols=[order_by, value], chunksize=summaries.CHUNKSIZE):
+                keep = (chunk[order_by].to_numpy(dtype=float) > median) == late
+                yield chunk[value].to_numpy(dtype=float)[keep]
+        return chunks
+
+    return rank_tests.mann_whitney_test(half(False), half(True)), median
+
+
+# time_of_effect in the first vs second half of the serial numbers
+@st.cache_data
+def load_doses_halves_rank_test():
+    path = _path("doses.csv")
+    return _halves_rank_test(path, "time_of_effect", "drug_serial_number", disk_cache.file_token(path))
+
+
+@disk_cache.memoize()
+def _ordered_column(path, value, order_by, token):
+    frame = pd.read_csv(path, usecols=[order_by, value])
+    return frame.sort_values(order_by)[value].to_numpy(dtype=float)
+
+
+# time_of_effect in serial-number (test) order, for the control charts
+@st.cache_data
+def load_dose_series():
+    path = _path("doses.csv")
+    return _ordered_column(path, "time_of_effect", "drug_serial_number", disk_cache.file_token(path))
+
+
+@disk_cache.memoize(depends=(density,))
+def _bin_density(path, column, token):
+    return density.from_csv(path, column)
+
+
+# Binned time_of_effect: bar counts, fitted normal and KDE come from this
+@st.cache_data
+def load_doses_density():
+    path = _path("doses.csv")
+    return _bin_density(path, "time_of_effect", disk_cache.file_token(path))
+
+
+# Binomial p-values for every speeding-example setting, memory-mapped once per process
+@st.cache_resource
+def load_speeding_surface():
+    return pvalue_surface.load_surface()
+
+
+# Producer's and consumer's risk for every sampling plan on the grid
+@st.cache_data
+@disk_cache.memoize(depends=(acceptance_sampling,))
+def load_acceptance_tables(n_max, c_max, aql, ltpd, lot_size, model):
+    return acceptance_sampling.risk_tables(n_max, c_max, aql, ltpd, lot_size, model)
+
+
+# pmf, cdf and sf (P(X > k)) of Binomial(n, p) over k = 0..n. This and the
+# normal curve are cheap and keyed on slider values, so they stay in memory
+# rather than adding a disk entry for every setting
+@st.cache_data
+def load_binomial_table(n, p):
+    k = np.arange(n + 1)
+    return k, stats.binom.pmf(k, n, p), stats.binom.cdf(k, n, p), stats.binom.sf(k, n, p)
+
+
+# Normal density on an evenly spaced grid, for the lessons' curve plots
+@st.cache_data
+def load_normal_curve(mean, sd, x_min, x_max, points=1000):
+    x = np.linspace(x_min, x_max, points)
+    return x, stats.norm.pdf(x, mean, sd)
+
+
+# Simulated survey for the selection guide's examples, one column pair per
+# test: gender x flavor (chi-square), method -> crop_yield (F), sector ->
+# salary (ANOVA). The effects are small, so with a million rows they are
+# detectable but far from obvious. Categoricals keep it at a few MB.
+@st.cache_data
+def load_selection_guide_example(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    gender = rng.integers(0, 2, rows)
+    # Flavor preference shifts slightly with gender
+    flavor_p = np.array([[0.30, 0.25, 0.25, 0.20], [0.295, 0.255, 0.25, 0.20]])
+    flavor = (rng.random(rows)[:, None] > flavor_p.cumsum(axis=1)[gender]).sum(axis=1)
+    method = rng.integers(0, 2, rows)
+    sector = rng.integers(0, 5, rows)
+    return pd.DataFrame({
+        "gender": pd.Categorical.from_codes(gender, ["Female", "Male"]),
+        "flavor": pd.Categorical.from_codes(np.minimum(flavor, 3), ["Vanilla", "Chocolate", "Strawberry", "Mint"]),
+        "method": pd.Categorical.from_codes(method, ["Conventional", "Organic"]),
+        "crop_yield": rng.normal(50.0, np.where(method == 1, 5.03, 5.0)),
+        "sector": pd.Categorical.from_codes(sector, ["Education", "Finance", "Health", "Retail", "Tech"]),
+        "salary": rng.normal(np.array([60.0, 60.1, 60.0, 59.9, 60.05])[sector] * 1000.0, 12_000.0),
+    })
@@ -0,0 +1,154 @@
+"""Binned density estimates that do not grow with the number of rows.
+
+A column is reduced once to fixed-width counts on a fine grid (FINE_BINS
+bins between its min and max) plus its count, mean and standard
+deviation. Everything the chart needs is derived from that summary:
+
+    bars      the fine counts merged into DISPLAY_BINS histogram bars
+    normal    the fitted normal pdf on the grid, scaled to bar counts
+    kde       a Gaussian KDE of the binned counts, computed as one FFT
+              convolution with a Silverman bandwidth
+
+`from_csv` builds the summary in two chunked passes (range and moments,
+then counts), so a dose history far larger than memory costs two reads
+of one column and a few kilobytes of state.
+
+    binned = density.from_values(drug["time_of_effect"])
+    fig.add_traces(density.traces(binned))
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+DISPLAY_BINS = 30
+FINE_BINS = DISPLAY_BINS * 32
+CHUNKSIZE = 1_000_000
+
+BinnedSample = namedtuple("BinnedSample", ["edges", "counts", "n", "mean", "std"])
+
+
+def _bin(chunks, lo, hi, bins):
+    edges = np.linspace(lo, hi, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for chunk in chunks:
+        counts += np.histogram(chunk, bins=edges)[0]
+    return edges, counts
+
+
+def _finish(edges, counts, n, mean, m2):
+    # m2 is the sum of squared deviations from the mean
+    std = math.sqrt(max(m2, 0.0) / (n - 1)) if n > 1 else 0.0
+    return BinnedSample(edges, counts, n, float(mean), std)
+
+
+def from_values(values, bins=FINE_BINS):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    lo, hi = values.min(), values.max()
+    if hi == lo:
+        hi = lo + 1.0
+    edges, counts = _bin([values], lo, hi, bins)
+    centered = values - values.mean()
+    return _finish(edges, counts, len(values), values.mean(), centered @ centered)
+
+
+def _column_chunks(path, column, chunksize):
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+        values = chunk[column].to_numpy(dtype=float)
+        yield values[np.isfinite(values)]
+
+
+def from_csv(path, column, bins=FINE_BINS, chunksize=CHUNKSIZE):
+    # Pass 1: range and moments. Sums are shifted by the first value to
+    # keep the variance accurate for large offsets.
+    n, shift, total, total_sq = 0, None, 0.0, 0.0
+    lo, hi = math.inf, -math.inf
+    for values in _column_chunks(path, column, chunksize):
+        if not len(values):
+            continue
+        if shift is None:
+            shift = values[0]
+        d = values - shift
+        n += len(values)
+        total += d.sum()
+        total_sq += d @ d
+        lo, hi = min(lo, values.min()), max(hi, values.max())
+    if n == 0:
+        raise ValueError(f"no numeric values in column {column!r} of {path}")
+    if hi == lo:
+        hi = lo + 1.0
+
+    # Pass 2: counts on the fixed grid
+    edges, counts = _bin(_column_chunks(path, column, chunksize), lo, hi, bins)
+    return _finish(edges, counts, n, shift + total / n, total_sq - total * total / n)
+
+
+def quantile(binned, q):
+    # Linear interpolation inside the fine bin holding the q-th quantile
+    cum = np.concatenate([[0], np.cumsum(binned.counts)]) / binned.n
+    return float(np.interp(q, cum, binned.edges))
+
+
+def silverman_bandwidth(binned):
+    iqr = quantile(binned, 0.75) - quantile(binned, 0.25)
+    spread = min(binned.std, iqr / 1.34) if iqr > 0 else binned.std
+    if spread <= 0:
+        spread = binned.edges[1] - binned.edges[0]
+    return 0.9 * spread * binned.n ** -0.2
+
+
+def display_bars(binned, bins=DISPLAY_BINS):
+    # Merge the fine counts into `bins` bars (FINE_BINS is a multiple of it)
+    group = len(binned.counts) // bins
+    counts = binned.counts[:group * bins].reshape(bins, group).sum(axis=1)
+    edges = binned.edges[::group][:bins + 1]
+    return (edges[:-1] + edges[1:]) / 2, counts, np.diff(edges)
+
+
+def _scale(pdf, binned, bar_width):
+    # With a bar width the curve is the expected count per bar, so it sits
+    # on the histogram; otherwise it is a density
+    return pdf * binned.n * bar_width if bar_width else pdf
+
+
+def normal_curve(binned, points=200, bar_width=None):
+    x = np.linspace(binned.edges[0], binned.edges[-1], points)
+    if binned.std == 0:
+        return x, np.zeros_like(x)
+    z = (x - binned.mean) / binned.std
+    pdf = np.exp(-0.5 * z * z) / (binned.std * math.sqrt(2 * math.pi))
+    return x, _scale(pdf, binned, bar_width)
+
+
+def kde_curve(binned, bandwidth=None, bar_width=None):
+    h = bandwidth or silverman_bandwidth(binned)
+    dx = binned.edges[1] - binned.edges[0]
+    centers = (binned.edges[:-1] + binned.edges[1:]) / 2
+
+    # Gaussian kernel sampled on the bin grid out to 4 bandwidths
+    half = int(np.ceil(4 * h / dx))
+    offsets = np.arange(-half, half + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / h) ** 2) / (h * math.sqrt(2 * math.pi))
+
+    # Linear (zero-padded) convolution via FFT; the result also covers the
+    # tails that extend past the data range
+    size = len(binned.counts) + len(kernel) - 1
+    nfft = 1 << (size - 1).bit_length()
+    smoothed = np.fft.irfft(np.fft.rfft(binned.counts, nfft) * np.fft.rfft(kernel, nfft), nfft)[:size]
+    x = np.concatenate([centers[0] + offsets[:half], centers, centers[-1] + offsets[half + 1:]])
+    return x, _scale(np.clip(smoothed, 0, None) / binned.n, binned, bar_width)
+
+
+def traces(binned, bins=DISPLAY_BINS, name="Observed"):
+    x, counts, widths = display_bars(binned, bins)
+    bar_width = widths[0]
+    normal_x, normal_y = normal_curve(binned, bar_width=bar_width)
+    kde_x, kde_y = kde_curve(binned, bar_width=bar_width)
+    return [
+        go.Bar(x=x, y=counts, width=widths, name=name, marker_line_width=0, opacity=0.75),
+        go.Scatter(x=normal_x, y=normal_y, mode="lines", name="Fitted Normal"),
+        go.Scatter(x=kde_x, y=kde_y, mode="lines", name="Kernel Density", line=dict(dash="dot")),
+    ]
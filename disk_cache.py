@@ -0,0 +1,243 @@
+"""Result cache on disk, shared by every app process and kept across restarts.
+
+st.cache_data lives in one process's memory, so each Streamlit worker
+and each restart computes the same tables again. `memoize` keeps results
+in a SQLite database in WAL mode instead. WAL lets any number of
+processes read while one writes. Put it under st.cache_data, so the
+in-memory cache answers repeats inside a process and the disk answers
+the first call in a new one:
+
+    @st.cache_data
+    @disk_cache.memoize(ttl=24 * 3600)
+    def binomial_table(n, p):
+        ...
+
+An entry's key is the function's module and name, a hash of its source
+(so editing the function invalidates its entries), plus the source of
+any modules listed in `depends` that compute the value, and a hash of the
+arguments, which are bound to the signature first so defaults,
+keywords and 5 vs 5.0 all map to the same key. Entries expire after
+`ttl` seconds. Once the file holds more than DISK_CACHE_MAX_MB of
+results, the least recently used entries are evicted. A result whose
+arrays alone exceed that limit is not stored (nor pickled).
+
+Values are pickled, so the database must be trusted like any other local
+file. The cache is an optimization only: if the database cannot be
+opened or written (a read-only checkout, a full disk), the function just
+runs.
+
+    DISK_CACHE_PATH    database file (default results.sqlite3 in
+                       HT_CACHE_DIR, the cache directory pvalue_surface
+                       also uses; empty disables the cache)
+    DISK_CACHE_MAX_MB  size limit for stored results (default 256)
+"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+
+import numpy as np
+
+CACHE_DIR = os.environ.get(
+    "HT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+DEFAULT_PATH = os.path.join(CACHE_DIR, "results.sqlite3")
+# Last-access times are only rewritten when older than this, so hits stay reads
+ACCESS_RESOLUTION = 60.0
+# Eviction trims to this share of the limit, so it does not run on every write
+EVICT_TO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    value BLOB NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def _estimated_bytes(value):
+    # Lower bound on the pickled size of numpy and pandas values (and
+    # tuples of them); 0 for anything else
+    if isinstance(value, tuple):
+        return sum(_estimated_bytes(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage) and hasattr(value, "to_numpy"):
+        usage = memory_usage(index=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    return 0
+
+
+class DiskCache:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread and process; sqlite3 connections must not
+        # cross threads, and must not survive a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        # (True, value) on a live hit, else (False, None)
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires, accessed FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        value, expires, accessed = row
+        now = time.time()
+        if expires is not None and expires <= now:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return False, None
+        if now - accessed > ACCESS_RESOLUTION:
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(value)
+
+    def put(self, key, name, value, ttl=None):
+        # Arrays and frames that are already too big are skipped before
+        # pickling them in memory
+        if _estimated_bytes(value) > self.max_bytes:
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (key, name, blob, len(blob), now, now + ttl if ttl else None, now))
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+        if total > self.max_bytes:
+            self.evict(int(self.max_bytes * EVICT_TO))
+
+    def evict(self, target_bytes):
+        # Drop expired entries, then the least recently used until the rest fit
+        conn = self._connection()
+        conn.execute("DELETE FROM results WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        conn.execute("""
+            DELETE FROM results WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(bytes) OVER (ORDER BY accessed DESC, created DESC) AS kept
+                    FROM results
+                ) WHERE kept > ?
+            )""", (target_bytes,))
+
+    def clear(self, name=None):
+        conn = self._connection()
+        if name is None:
+            conn.execute("DELETE FROM results")
+        else:
+            conn.execute("DELETE FROM results WHERE name = ?", (name,))
+
+    def stats(self):
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    # The process-wide cache, or None when disabled by DISK_CACHE_PATH=""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = os.environ.get("DISK_CACHE_PATH", DEFAULT_PATH)
+            if not path:
+                return None
+            max_mb = float(os.environ.get("DISK_CACHE_MAX_MB", 256))
+            _cache = DiskCache(path, int(max_mb * 2**20))
+        return _cache
+
+
+def _canonical(value):
+    # A picklable stand-in that is equal for arguments that should share a key
+    if isinstance(value, (bool, str, bytes)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.dtype.str, value.shape, np.ascontiguousarray(value).tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    return value
+
+
+def _source_hash(func, depends=()):
+    digest = hashlib.sha256()
+    for obj in (func, *depends):
+        try:
+            digest.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            # No source available (e.g. a compiled module); fall back to bytecode or name
+            digest.update(obj.__code__.co_code if hasattr(obj, "__code__") else obj.__name__.encode())
+    return digest.hexdigest()[:16]
+
+
+def memoize(ttl=None, namespace=None, depends=()):
+    # depends: modules the result is computed by, e.g. (summaries,); a
+    # change to their source invalidates the entries like a change to func
+    def decorate(func):
+        # The file name rather than __module__, which is "__main__" under streamlit run
+        module = os.path.splitext(os.path.basename(inspect.getfile(func)))[0]
+        name = namespace or f"{module}.{func.__qualname__}"
+        version = _source_hash(func, depends)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = pickle.dumps(_canonical(dict(bound.arguments)), protocol=4)
+            key = f"{name}:{version}:{hashlib.sha256(arguments).hexdigest()}"
+            try:
+                hit, value = cache.get(key)
+            except (sqlite3.Error, OSError, pickle.UnpicklingError, EOFError) as e:
+                warnings.warn(f"disk cache read failed for {name}: {e}", RuntimeWarning)
+                hit = False
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            try:
+                cache.put(key, name, value, ttl)
+            except (sqlite3.Error, OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+                warnings.warn(f"disk cache write failed for {name}: {e}", RuntimeWarning)
+            return value
+
+        wrapper.cache_name = name
+        return wrapper
+    return decorate
+
+
+def file_token(path):
+    # Size and modification time, to pass to a memoized loader so that its
+    # entries follow the file rather than outliving an edit
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
@@ -0,0 +1,151 @@
+"""Rolling-window drift tests for a stream of usage minutes.
+
+Each window of the stream is tested against a reference mean: a z-test
+when the population sigma is known, and always a one-sample t-test. A
+window raises an alert when its two-sided test rejects at alpha. Windows
+are either the last `window` observations or, when timestamps are
+given, the observations in the half-open interval (t - window, t].
+
+Two engines share these definitions:
+
+    RollingWindowTest   streaming. add() updates running sums in O(1)
+                        (append one value, evict the expired ones) and
+                        returns the result for the window ending there.
+    backfill            batch. All windows over a history come from two
+                        cumulative sums in a handful of numpy passes;
+                        alerts compare against critical values computed
+                        once, so p-values are optional. This runs at
+                        millions of windows per second. p-values come
+                        from log_pvalues, with their logs alongside, so
+                        extreme windows do not all read as p = 0.
+
+Sums are kept relative to the reference mean, which keeps the variance
+accurate when the data sit far from zero.
+"""
+import math
+from collections import deque, namedtuple
+
+import numpy as np
+
+import log_pvalues
+import stats_core as stats
+
+WindowResult = namedtuple("WindowResult", ["end", "n", "mean", "std", "z", "t", "alert"])
+
+# The streaming sums are rebuilt from the window this often, so rounding
+# error cannot accumulate over very long streams
+RESYNC_EVERY = 1_000_000
+
+
+def _critical_values(alpha, df):
+    z_crit = stats.norm.isf(alpha / 2)
+    t_crit = stats.t.isf(alpha / 2, df) if df >= 1 else math.inf
+    return z_crit, t_crit
+
+
+class RollingWindowTest:
+    def __init__(self, window, popmean, sigma=None, alpha=0.05, timed=False):
+        self.window = window
+        self.popmean = popmean
+        self.sigma = sigma
+        self.alpha = alpha
+        self.timed = timed
+        self._items = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._updates = 0
+        self._critical = {}
+
+    def _evict(self, now):
+        while self._items and (len(self._items) > self.window if not self.timed
+                               else self._items[0][0] <= now - self.window):
+            _, d = self._items.popleft()
+            self._sum -= d
+            self._sum_sq -= d * d
+
+    def add(self, value, timestamp=None):
+        if self.timed and timestamp is None:
+            raise ValueError("a time-based window needs a timestamp for every value")
+        now = timestamp if self.timed else self._updates
+        d = value - self.popmean
+        self._items.append((now, d))
+        self._sum += d
+        self._sum_sq += d * d
+        self._evict(now)
+
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._sum = math.fsum(d for _, d in self._items)
+            self._sum_sq = math.fsum(d * d for _, d in self._items)
+
+        if not self.timed and len(self._items) < self.window:
+            return None
+        return self._result(now)
+
+    def _result(self, end):
+        n = len(self._items)
+        shift = self._sum / n
+        var = max(self._sum_sq - n * shift * shift, 0.0) / (n - 1) if n > 1 else math.nan
+        std = math.sqrt(var)
+        z = shift / (self.sigma / math.sqrt(n)) if self.sigma else math.nan
+        t = shift / (std / math.sqrt(n)) if std > 0 else math.nan
+
+        if n not in self._critical:
+            self._critical[n] = _critical_values(self.alpha, n - 1)
+        z_crit, t_crit = self._critical[n]
+        alert = bool(abs(t) > t_crit) if not math.isnan(t) else False
+        if self.sigma:
+            alert = alert or bool(abs(z) > z_crit)
+        return WindowResult(end, n, self.popmean + shift, std, z, t, alert)
+
+
+def backfill(values, window, popmean, sigma=None, alpha=0.05, timestamps=None, p_values=False):
+    # Returns a dict of arrays with one entry per window: end (index or
+    # timestamp), n, mean, std, z, t, alert, plus p_z and p_t and their
+    # natural logs log_p_z and log_p_t on request.
+    # Count windows start once `window` values are seen; time windows
+    # (timestamps sorted ascending) end at every observation.
+    d = np.asarray(values, dtype=float) - popmean
+    c1 = np.concatenate([[0.0], np.cumsum(d)])
+    c2 = np.concatenate([[0.0], np.cumsum(d * d)])
+
+    if timestamps is None:
+        if len(d) < window:
+            ends = np.empty(0, dtype=int)
+        else:
+            ends = np.arange(window, len(d) + 1)
+        starts = ends - window
+        end_labels = ends - 1
+    else:
+        timestamps = np.asarray(timestamps)
+        ends = np.arange(1, len(d) + 1)
+        starts = np.searchsorted(timestamps, timestamps - window, side="right")
+        end_labels = timestamps
+
+    n = (ends - starts).astype(float)
+    s = c1[ends] - c1[starts]
+    ss = c2[ends] - c2[starts]
+    shift = s / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.maximum(ss - n * shift * shift, 0.0) / (n - 1)
+        std = np.sqrt(var)
+        t = shift / (std / np.sqrt(n))
+        z = shift / (sigma / np.sqrt(n)) if sigma else np.full_like(shift, np.nan)
+
+    # Alerts against critical values, computed once per distinct window size
+    sizes, inverse = np.unique(n.astype(int), return_inverse=True)
+    critical = np.array([_critical_values(alpha, size - 1) for size in sizes]).reshape(-1, 2)
+    with np.errstate(invalid="ignore"):
+        alert = np.abs(t) > critical[inverse, 1]
+        if sigma:
+            alert |= np.abs(z) > critical[inverse, 0]
+
+    result = {"end": end_labels, "n": n.astype(int), "mean": popmean + shift, "std": std,
+              "z": z, "t": t, "alert": alert}
+    if p_values:
+        result["log_p_z"] = log_pvalues.log_p_value(z)
+        with np.errstate(invalid="ignore"):
+            result["log_p_t"] = log_pvalues.log_p_value(t, df=n - 1)
+        result["p_z"] = np.exp(result["log_p_z"])
+        result["p_t"] = np.exp(result["log_p_t"])
+    return result
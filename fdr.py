@@ -0,0 +1,228 @@
+"""False discovery rate control for large batches of tests.
+
+Benjamini-Hochberg (BH) rejects the k smallest of m p-values, where k is
+the largest rank with
+
+    p_(k) <= alpha * k / m                          (method="bh")
+    p_(k) <= alpha * k / (m * c_m),  c_m = sum 1/i  (method="by")
+
+Benjamini-Yekutieli (BY) holds under any dependence between the tests.
+
+Arrays that fit in memory use `qvalues` / `reject`. For batches larger
+than memory, `threshold` finds the cutoff without sorting, from a
+re-iterable `source` of chunks:
+
+    pass 1   count m, and histogram log p on a fixed grid of bins
+    pass 2   walk the bins from the top: the count below each bin's upper
+             edge bounds every rank inside it, so only the highest bin
+             that can hold the cutoff is loaded, sorted and solved
+             exactly (a bin over `budget` values is histogrammed again
+             over its own range first)
+
+Everything works on natural-log p-values (log=True), the form
+log_pvalues produces. p-values that underflow to 0 still keep their
+order. `decisions` then streams the reject flags chunk by chunk.
+
+    source = fdr.npy_chunks("screen_log_p.npy")
+    cut = fdr.threshold(source, alpha=0.05, method="by", log=True)
+    print(cut.rejected, "of", cut.m, "rejected")
+
+    python fdr.py screen_log_p.npy --log --alpha 0.05 --method by
+"""
+import argparse
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("bh", "by")
+# Histogram grid for log p; anything lower shares the first bin
+LOG_P_FLOOR = -800.0
+BINS = 4096
+# Most values loaded at once when solving a bin exactly
+BUDGET = 2_000_000
+CHUNKSIZE = 1_000_000
+
+FdrThreshold = namedtuple("FdrThreshold", ["m", "rejected", "log_p_cutoff", "method", "alpha"])
+
+
+def _log_c(m, method):
+    # log of the BY correction c_m = sum_{i<=m} 1/i (0 for BH)
+    if method == "bh":
+        return 0.0
+    if method != "by":
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    if m < 1000:
+        return math.log(math.fsum(1.0 / i for i in range(1, m + 1)))
+    return math.log(math.log(m) + 0.5772156649015329 + 1 / (2 * m) - 1 / (12 * m * m))
+
+
+def _as_log(values, log):
+    values = np.asarray(values, dtype=float)
+    if log:
+        return values
+    with np.errstate(divide="ignore"):
+        return np.log(values)
+
+
+def qvalues(p, method="bh", log=False):
+    # Adjusted p-values (q-values) in the input order; with log=True both
+    # the input and the output are natural logs
+    x = _as_log(p, log).ravel()
+    m = x.size
+    if m == 0:
+        return x.copy()
+    order = np.argsort(x, kind="stable")
+    ranks = np.arange(1, m + 1)
+    # q_(i) = min_{j >= i} p_(j) * m * c_m / j, as a reversed running minimum
+    scaled = x[order] + math.log(m) + _log_c(m, method) - np.log(ranks)
+    adjusted = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 0.0)
+    out = np.empty(m)
+    out[order] = adjusted
+    out = out.reshape(np.shape(p))
+    return out if log else np.exp(out)
+
+
+def reject(p, alpha=0.05, method="bh", log=False):
+    # Boolean rejections in the input order
+    return qvalues(p, method, log) <= (math.log(alpha) if log else alpha)
+
+
+# Sources: functions returning a fresh iterator of 1-D chunks on each call
+
+def array_chunks(values, chunksize=CHUNKSIZE):
+    values = np.asarray(values, dtype=float).ravel()
+    return lambda: (values[i:i + chunksize] for i in range(0, len(values), chunksize))
+
+
+def npy_chunks(path, chunksize=CHUNKSIZE):
+    # A 1-D .npy file, memory-mapped, so only one chunk is resident
+    def chunks():
+        values = np.load(path, mmap_mode="r")
+        for i in range(0, len(values), chunksize):
+            yield np.asarray(values[i:i + chunksize], dtype=float)
+    return chunks
+
+
+def csv_chunks(path, column, chunksize=CHUNKSIZE):
+    def chunks():
+        for frame in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+            yield frame[column].to_numpy(dtype=float)
+    return chunks
+
+
+def _in_range(x, lo, hi, closed):
+    return (x >= lo) & ((x <= hi) if closed else (x < hi))
+
+
+def _histogram(source, log, edges, lo, hi, closed):
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in source():
+        x = _as_log(chunk, log)
+        x = x[_in_range(x, lo, hi, closed)]
+        index = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(counts) - 1)
+        counts += np.bincount(index, minlength=len(counts))
+    return counts
+
+
+def _collect(source, log, lo, hi, closed):
+    parts = []
+    for chunk in source():
+        x = _as_log(chunk, log)
+        parts.append(x[_in_range(x, lo, hi, closed)])
+    return np.sort(np.concatenate(parts)) if parts else np.empty(0)
+
+
+def _descend(source, log, edges, counts, below, closed, level, budget):
+    # (log p cutoff, rank) of the largest rank meeting the BH condition
+    # among the values in these bins, or None. `below` counts the values
+    # under edges[0]; only the top bin includes its upper edge if closed.
+    upper = below + np.cumsum(counts)
+    for b in range(len(counts) - 1, -1, -1):
+        if counts[b] == 0 or edges[b] > level(upper[b]):
+            continue
+        lo, hi = edges[b], edges[b + 1]
+        bin_closed = closed and b == len(counts) - 1
+        start = upper[b] - counts[b]
+        if counts[b] <= budget or hi - lo <= abs(hi) * 1e-12:
+            x = _collect(source, log, lo, hi, bin_closed)
+            ranks = start + np.arange(1, len(x) + 1)
+            ok = np.flatnonzero(x <= level(ranks))
+            if len(ok):
+                return x[ok[-1]], int(ranks[ok[-1]])
+        else:
+            sub_edges = np.linspace(lo, hi, BINS + 1)
+            sub_counts = _histogram(source, log, sub_edges, lo, hi, bin_closed)
+            found = _descend(source, log, sub_edges, sub_counts, start, bin_closed, level, budget)
+            if found is not None:
+                return found
+    return None
+
+
+def threshold(source, alpha=0.05, method="bh", log=False, budget=BUDGET):
+    # Cutoff for a batch too large for memory; reject every p <= exp(log_p_cutoff)
+    m = 0
+    zeros = 0
+    x_min = 0.0
+    edges = np.linspace(LOG_P_FLOOR, 0.0, BINS + 1)
+    counts = np.zeros(BINS, dtype=np.int64)
+    for chunk in source():
+        x = _as_log(chunk, log)
+        if np.isnan(x).any():
+            raise ValueError("p-values must not be NaN")
+        m += x.size
+        finite = x[np.isfinite(x)]
+        zeros += x.size - finite.size
+        if finite.size:
+            x_min = min(x_min, float(finite.min()))
+            index = np.clip(np.searchsorted(edges, finite, side="right") - 1, 0, BINS - 1)
+            counts += np.bincount(index, minlength=BINS)
+    if m == 0:
+        return FdrThreshold(0, 0, -math.inf, method, alpha)
+
+    # The first bin also holds everything under the floor
+    edges[0] = min(edges[0], x_min)
+    offset = math.log(alpha) - math.log(m) - _log_c(m, method)
+
+    def level(rank):
+        return offset + np.log(rank)
+
+    found = _descend(source, log, edges, counts, zeros, True, level, budget)
+    if found is None:
+        # p = 0 always meets the condition, so zeros are rejected regardless
+        return FdrThreshold(m, zeros, -math.inf, method, alpha)
+    cutoff, rank = found
+    return FdrThreshold(m, rank, float(cutoff), method, alpha)
+
+
+def decisions(source, cut, log=False):
+    # Reject flags chunk by chunk, in the source's order
+    for chunk in source():
+        yield _as_log(chunk, log) <= cut.log_p_cutoff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help=".npy array or CSV file of p-values")
+    parser.add_argument("--column", help="CSV column holding the p-values")
+    parser.add_argument("--log", action="store_true", help="values are natural-log p-values")
+    parser.add_argument("--alpha", type=float, default=0.05, help="target FDR (default: 0.05)")
+    parser.add_argument("--method", choices=METHODS, default="bh")
+    args = parser.parse_args()
+
+    if args.path.endswith(".npy"):
+        source = npy_chunks(args.path)
+    else:
+        if not args.column:
+            parser.error("--column is required for CSV input")
+        source = csv_chunks(args.path, args.column)
+    cut = threshold(source, args.alpha, args.method, args.log)
+    print(f"{args.method.upper()} at FDR {args.alpha:g}: {cut.rejected:,} of {cut.m:,} rejected, "
+          f"cutoff log p = {cut.log_p_cutoff:.6g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
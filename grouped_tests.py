@@ -0,0 +1,136 @@
+"""Welch t-tests between every pair of groups, and one-way ANOVA.
+
+Both tests need only n, the mean and M2 (the sum of squared deviations)
+of each group. `from_frame` gets them for all groups in one groupby pass;
+`from_csv` does the same chunk by chunk and merges the chunks per group
+with Chan et al.'s update, as summaries does for a single column.
+
+The tests are then vectorized over groups rather than looped:
+
+    pairwise_welch   all k (k - 1) / 2 pairs at once from np.triu_indices:
+                     t = (mean_i - mean_j) / sqrt(v_i / n_i + v_j / n_j),
+                     Welch-Satterthwaite df, p-values from log_pvalues,
+                     and Benjamini-Hochberg q-values across the pairs
+    anova            between- and within-group sums of squares from the
+                     group arrays; F-test p-value
+
+Thousands of groups (millions of pairs) take a few array passes. Groups
+with fewer than two values have no variance; their pairs get NaN.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import fdr
+import log_pvalues
+
+CHUNKSIZE = 1_000_000
+
+AnovaResult = namedtuple("AnovaResult", ["statistic", "pvalue", "df_between", "df_within"])
+
+
+class GroupSummary:
+    def __init__(self, labels, n, mean, m2):
+        self.labels = np.asarray(labels)
+        self.n = np.asarray(n, dtype=float)
+        self.mean = np.asarray(mean, dtype=float)
+        self.m2 = np.asarray(m2, dtype=float)
+
+    def __repr__(self):
+        return f"GroupSummary({len(self.labels)} groups, {int(self.n.sum())} values)"
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def var(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    def to_frame(self):
+        return pd.DataFrame({"n": self.n.astype(int), "mean": self.mean, "std": np.sqrt(self.var)},
+                            index=pd.Index(self.labels, name="group"))
+
+    def merge(self, other):
+        # Groups present in both are combined exactly; returns a new summary.
+        # An empty side (such as the seed of a chunked merge) is skipped so
+        # its float index cannot change the labels' dtype
+        if not len(self):
+            return GroupSummary(other.labels, other.n, other.mean, other.m2)
+        if not len(other):
+            return GroupSummary(self.labels, self.n, self.mean, self.m2)
+        left = pd.DataFrame({"n": self.n, "mean": self.mean, "m2": self.m2}, index=self.labels)
+        right = pd.DataFrame({"n": other.n, "mean": other.mean, "m2": other.m2}, index=other.labels)
+        index = left.index.union(right.index)
+        left = left.reindex(index, fill_value=0.0)
+        right = right.reindex(index, fill_value=0.0)
+        n = left["n"].to_numpy() + right["n"].to_numpy()
+        delta = right["mean"].to_numpy() - left["mean"].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(n > 0, right["n"].to_numpy() / n, 0.0)
+        mean = left["mean"].to_numpy() + delta * share
+        m2 = left["m2"].to_numpy() + right["m2"].to_numpy() + delta * delta * left["n"].to_numpy() * share
+        return GroupSummary(index.to_numpy(), n, mean, m2)
+
+
+def from_frame(frame, value, by):
+    # One groupby pass over the frame; NaN values are ignored
+    stats = frame.groupby(by, sort=True)[value].agg(["count", "mean", "var"])
+    stats = stats[stats["count"] > 0]
+    n = stats["count"].to_numpy(dtype=float)
+    m2 = np.where(n > 1, stats["var"].to_numpy() * (n - 1), 0.0)
+    return GroupSummary(stats.index.to_numpy(), n, stats["mean"].to_numpy(), m2)
+
+
+def from_values(values, groups):
+    return from_frame(pd.DataFrame({"value": values, "group": groups}), "value", "group")
+
+
+def from_csv(path, value, by, chunksize=CHUNKSIZE):
+    total = GroupSummary([], [], [], [])
+    for chunk in pd.read_csv(path, usecols=[value, by], chunksize=chunksize):
+        total = total.merge(from_frame(chunk, value, by))
+    return total
+
+
+def pairwise_welch(groups, alternative="two-sided", fdr_method="bh"):
+    # One row per pair (i < j in label order): mean difference i - j, t,
+    # Welch df, p-value, its natural log and the q-value across all pairs
+    i, j = np.triu_indices(len(groups), k=1)
+    n, mean, var = groups.n, groups.mean, groups.var
+    a, b = var[i] / n[i], var[j] / n[j]
+    diff = mean[i] - mean[j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se2 = a + b
+        t = diff / np.sqrt(se2)
+        df = se2 * se2 / (a * a / (n[i] - 1) + b * b / (n[j] - 1))
+        log_p = np.full(len(t), np.nan)
+        ok = np.isfinite(t) & np.isfinite(df) & (df > 0)
+        log_p[ok] = log_pvalues.log_p_value(t[ok], alternative, df[ok])
+
+    log_q = np.full(len(t), np.nan)
+    if ok.any():
+        log_q[ok] = fdr.qvalues(log_p[ok], fdr_method, log=True)
+    return pd.DataFrame({
+        "group_a": groups.labels[i], "group_b": groups.labels[j],
+        "mean_diff": diff, "t": t, "df": df,
+        "pvalue": np.exp(log_p), "log_pvalue": log_p, "qvalue": np.exp(log_q),
+    })
+
+
+def anova(groups):
+    # Classical one-way ANOVA (equal variances) over the groups with data
+    keep = groups.n > 0
+    n, mean, m2 = groups.n[keep], groups.mean[keep], groups.m2[keep]
+    k, total = len(n), n.sum()
+    if k < 2 or total <= k:
+        raise ValueError("ANOVA needs at least two groups and more values than groups")
+    grand = (n * mean).sum() / total
+    between = (n * (mean - grand) ** 2).sum()
+    within = m2.sum()
+    df_between, df_within = k - 1, total - k
+    statistic = (between / df_between) / (within / df_within) if within > 0 else math.inf
+    from scipy.special import fdtrc
+    return AnovaResult(float(statistic), float(fdtrc(df_between, df_within, statistic)), df_between, int(df_within))
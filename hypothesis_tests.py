@@ -0,0 +1,164 @@
+"""Test kernels shared by the lessons, the batch runner and the service.
+
+The one-sample tests take a `sample` that is either a
+summaries.SampleSummary or raw data (a Series, an array, or a DataFrame
+together with `column=`). Raw data is summarized first, so a summary
+merged from shards gives the same results as the full column:
+
+    summary = datasets.load_internet_usage_summary()
+    z, p = hypothesis_tests.z_test(summary, 144, sigma=110)
+    t_stat, p = hypothesis_tests.t_test(data["Minutes"], 144)
+
+The remaining kernels take plain numbers, as in the lessons they come
+from: calculate_ci (1_confidence_interval), proportions_ztest
+(1_introduction_hypothesis_testing), binomial_pvalue
+(2_hypothesis_testing_keyterms) and error_rates (3_type_1_2_errors).
+
+Tails always come from survival functions, never 1 - cdf. Arrays of
+statistics are handed to log_pvalues in one vectorized call, and
+log_p=True (or log_p_values for a whole screen) returns natural-log
+p-values that stay finite far beyond where p underflows to 0. A screen
+of many such tests is then corrected with fdr.qvalues, or fdr.threshold
+when the p-values do not fit in memory.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import log_pvalues
+import stats_core as stats
+import summaries
+
+
+def as_summary(sample, column=None):
+    if isinstance(sample, summaries.SampleSummary):
+        return sample
+    if isinstance(sample, pd.DataFrame):
+        if column is None:
+            numeric = sample.select_dtypes("number").columns
+            if len(numeric) != 1:
+                raise ValueError("pass column= to choose one of the DataFrame's columns")
+            column = numeric[0]
+        sample = sample[column]
+    return summaries.from_values(sample)
+
+
+def log_p_values(statistics, alternative="two-sided", df=None):
+    # Natural-log p-values for an array of z (df=None) or t statistics
+    return log_pvalues.log_p_value(statistics, alternative, df)
+
+
+def _p_value(statistic, alternative, df=None, log_p=False):
+    # Standard normal reference distribution, or Student t with df. Arrays
+    # and log p-values go through the vectorized log-space engine.
+    if log_p:
+        return float(log_p_values(statistic, alternative, df)) if np.ndim(statistic) == 0 \
+            else log_p_values(statistic, alternative, df)
+    if np.ndim(statistic):
+        return np.exp(log_p_values(statistic, alternative, df))
+    sf = stats.norm.sf if df is None else (lambda x: stats.t.sf(x, df))
+    cdf = stats.norm.cdf if df is None else (lambda x: stats.t.cdf(x, df))
+    if alternative == "two-sided":
+        return 2 * sf(abs(statistic))
+    if alternative == "greater":
+        return sf(statistic)
+    if alternative == "less":
+        return cdf(statistic)
+    raise ValueError(f"alternative must be 'two-sided', 'less' or 'greater', got {alternative!r}")
+
+
+def _standardize(summary, popmean, scale):
+    # (mean - popmean) / (scale / sqrt(n)) with numpy's inf and nan, as
+    # stats.ttest_1samp returns them: +-inf for a constant sample off
+    # popmean, nan on popmean or for an empty sample
+    if not summary.n:
+        return math.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(summary.mean - popmean) / (np.float64(scale) / np.sqrt(summary.n)))
+
+
+def z_test(sample, popmean, sigma, alternative="two-sided", column=None, log_p=False):
+    # Known population standard deviation sigma; returns (z, p-value), or
+    # (z, log p-value) with log_p=True
+    summary = as_summary(sample, column)
+    z = _standardize(summary, popmean, sigma)
+    return z, _p_value(z, alternative, log_p=log_p)
+
+
+def t_test(sample, popmean, alternative="two-sided", column=None, log_p=False):
+    # Same result as stats.ttest_1samp on the raw values; with log_p=True
+    # the pvalue field holds the natural log of the p-value
+    summary = as_summary(sample, column)
+    df = summary.n - 1
+    statistic = _standardize(summary, popmean, summary.std)
+    return stats.TtestResult(statistic, _p_value(statistic, alternative, df, log_p), df)
+
+
+def t_interval(sample, confidence, column=None):
+    # Two-sided confidence interval for the mean; a single point for a
+    # constant sample, nan with fewer than two values
+    summary = as_summary(sample, column)
+    if summary.n < 2:
+        return math.nan, math.nan
+    return stats.t.interval(confidence, df=summary.n - 1, loc=summary.mean,
+                            scale=summary.std / math.sqrt(summary.n))
+
+
+def calculate_ci(mean, std, n, conf_level):
+    # z interval for the mean: mean +/- z * std / sqrt(n)
+    se = std / np.sqrt(n)
+    z_score = stats.norm.ppf((1 + conf_level) / 2)
+    margin_of_error = z_score * se
+    return mean - margin_of_error, mean + margin_of_error
+
+
+def proportions_ztest(count, nobs, value=None, alternative='two-sided', prop_var=False):
+    # Pooled two-sample z-test for proportions, statsmodels' conventions.
+    # count and nobs of shape (2, k) run k tests at once and return arrays,
+    # ready for fdr.reject
+    count = np.asarray(count)
+    nobs = np.asarray(nobs)
+    if count.shape != nobs.shape or count.ndim == 0 or len(count) != 2:
+        raise ValueError(f"count and nobs must both have 2 rows (one per sample), got shapes {count.shape} and {nobs.shape}")
+
+    prop = count / nobs
+    value = 0 if value is None else value
+
+    p_pool = np.sum(count, axis=0) / np.sum(nobs, axis=0)
+    var = p_pool * (1 - p_pool) * np.sum(1 / nobs, axis=0)
+
+    z_stat = (prop[0] - prop[1] - value) / np.sqrt(var)
+
+    if alternative == 'two-sided':
+        p_value = 2 * stats.norm.sf(np.abs(z_stat))
+    elif alternative == 'larger':
+        p_value = stats.norm.sf(z_stat)
+    elif alternative == 'smaller':
+        p_value = stats.norm.cdf(z_stat)
+    else:
+        raise ValueError('alternative must be "two-sided", "larger" or "smaller"')
+
+    return z_stat, p_value
+
+
+def binomial_pvalue(successes, trials, p=0.5):
+    # One-sided exact binomial test: P(X >= successes), X ~ Binomial(trials, p)
+    if np.ndim(successes) or np.ndim(trials) or np.ndim(p):
+        return np.exp(binomial_log_pvalue(successes, trials, p))
+    return stats.binom.sf(successes - 1, trials, p)
+
+
+def binomial_log_pvalue(successes, trials, p=0.5):
+    # log P(X >= successes), vectorized and finite deep in the upper tail
+    return log_pvalues.binom_logsf(np.asarray(successes) - 1, trials, p)
+
+
+def error_rates(innocence_mean, guilt_mean, variability, alpha):
+    # Threshold at the innocent distribution's upper alpha point; returns
+    # (threshold, type I rate, type II rate, power)
+    z_crit = stats.norm.ppf(1 - alpha)
+    threshold = innocence_mean + z_crit * variability
+    type_1 = stats.norm.sf(threshold, innocence_mean, variability)
+    type_2 = stats.norm.cdf(threshold, guilt_mean, variability)
+    return threshold, type_1, type_2, 1 - type_2
@@ -1,13 +1,24 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from scipy import stats
+import stats_core as stats
+import approximate
+import datasets
+import drift_monitor
+import hypothesis_tests
+import navigation
+import permutation_tests
+import profiling
+import rank_tests
+import trace_reduction
 
 st.set_page_config(layout="wide", page_title="Mobile Internet Usage Analysis")
 
+profiling.start()
+
 # Custom CSS for improved visual appeal and tooltips
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     .main {
         padding: 2rem 3rem;
@@ -59,7 +70,7 @@ st.markdown("""
         opacity: 1;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Function to create tooltips
 def tooltip(text, code):
@@ -71,58 +82,30 @@ def tooltip(text, code):
 
 st.title("Mobile Internet Usage Analysis")
 
-# Create tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Context", "📈 Analysis & Visualization", "🧮 Solved Examples", "🧠 Quiz"])
-
-with tab1:
-    st.header("Context")
-    st.markdown("""
-    ExperienceMyServices reported that a typical American spends an average of 144 minutes (2.4 hours) per day accessing the Internet via a mobile device with a standard deviation of 110 minutes.
-
-    To test the validity of this statement, you collected 30 samples from friends and family. The results for the time spent per day accessing the Internet via a mobile device (in minutes) are stored in "InternetMobileTime.csv".
-
-    ## Key Question:
-    Is there enough statistical evidence to conclude that the population mean time spent per day accessing the Internet via mobile device is different from the hypothesized mean? Use the p-value approach and a level of significance of 0.05.
-
-    **Note:** We can assume that the samples are randomly selected, independent, and come from a normally distributed population.
-    """)
-
-with tab2:
-    st.header("Analysis & Visualization")
-    
-    # Load data
-    @st.cache_data
-    def load_data():
-        return pd.read_csv('InternetMobileTime.csv')
-
-    data = load_data()
-
-    st.subheader("Data Preview")
-    st.write(data.head())
-    st.markdown(tooltip(f"Data shape: {data.shape}", "data.shape"), unsafe_allow_html=True)
-
+# Widget changes in this panel rerun only the panel, not the whole page
+@st.fragment
+def hypothesis_test_panel(summary):
     st.subheader("Hypothesis Testing")
 
     col1, col2 = st.columns([1, 2])
 
     with col1:
-        alpha = st.number_input("Significance Level (α)", value=0.05, step=0.01, format="%.2f")
+        alpha = st.number_input("Significance Level (α)", step=0.01, format="%.2f", key="usage_alpha")
 
     with col2:
-        hypothesized_mean = st.slider("Hypothesized mean (minutes)", min_value=60, max_value=240, value=144, step=1)
+        hypothesized_mean = st.slider("Hypothesized mean (minutes)", min_value=60, max_value=240, step=1, key="usage_popmean")
 
-    # Calculations
-    sample_mean = data["Minutes"].mean()
-    sample_std = data["Minutes"].std()
-    n = len(data)
+    # Calculations run on the cached summary (n, mean, std, min, max)
+    sample_mean = summary.mean
+    sample_std = summary.std
+    n = summary.n
     sigma = 110
 
     # Z-test
-    z_stat = (sample_mean - hypothesized_mean) / (sigma / np.sqrt(n))
-    p_value_z = 2 * (1 - stats.norm.cdf(abs(z_stat)))
+    z_stat, p_value_z = hypothesis_tests.z_test(summary, hypothesized_mean, sigma)
 
     # T-test
-    t_stat, p_value_t = stats.ttest_1samp(data["Minutes"], popmean=hypothesized_mean)
+    t_stat, p_value_t = hypothesis_tests.t_test(summary, hypothesized_mean)
 
     # Visualization
     confidence_level = 1 - alpha
@@ -135,8 +118,7 @@ with tab2:
     fig = go.Figure()
 
     # Generate normal distribution
-    x = np.linspace(0, 300, 1000)
-    y = stats.norm.pdf(x, sample_mean, sample_std)
+    x, y = datasets.load_normal_curve(sample_mean, sample_std, 0, 300)
 
     fig.add_trace(go.Scatter(
         x=x, y=y,
@@ -168,8 +150,8 @@ with tab2:
         hovermode="x"
     )
 
-    x_min = max(0, min(data["Minutes"].min(), hypothesized_mean, ci_lower) - 50)
-    x_max = max(data["Minutes"].max(), hypothesized_mean, ci_upper) + 50
+    x_min = max(0, min(summary.min, hypothesized_mean, ci_lower) - 50)
+    x_max = max(summary.max, hypothesized_mean, ci_upper) + 50
     fig.update_xaxes(range=[x_min, x_max])
 
     # Add custom hover text
@@ -191,19 +173,19 @@ with tab2:
 
     fig.data[0].text = hover_text
 
-    st.plotly_chart(fig, use_container_width=True)
+    trace_reduction.plotly_chart(fig, use_container_width=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Z-test Results")
         st.markdown(tooltip(f"Z-statistic: {z_stat:.4f}", "z_stat = (sample_mean - hypothesized_mean) / (sigma / np.sqrt(n))"), unsafe_allow_html=True)
-        st.markdown(tooltip(f"p-value: {p_value_z:.4f}", "p_value_z = 2 * (1 - stats.norm.cdf(abs(z_stat)))"), unsafe_allow_html=True)
+        st.markdown(tooltip(f"p-value: {p_value_z:.4f}", "z_stat, p_value_z = hypothesis_tests.z_test(summary, hypothesized_mean, sigma)"), unsafe_allow_html=True)
 
     with col2:
         st.subheader("T-test Results")
-        st.markdown(tooltip(f"T-statistic: {t_stat:.4f}", "t_stat, p_value_t = stats.ttest_1samp(data['Minutes'], popmean=hypothesized_mean)"), unsafe_allow_html=True)
-        st.markdown(tooltip(f"p-value: {p_value_t:.4f}", "t_stat, p_value_t = stats.ttest_1samp(data['Minutes'], popmean=hypothesized_mean)"), unsafe_allow_html=True)
+        st.markdown(tooltip(f"T-statistic: {t_stat:.4f}", "t_stat, p_value_t = hypothesis_tests.t_test(summary, hypothesized_mean)"), unsafe_allow_html=True)
+        st.markdown(tooltip(f"p-value: {p_value_t:.4f}", "t_stat, p_value_t = hypothesis_tests.t_test(summary, hypothesized_mean)"), unsafe_allow_html=True)
 
     decision_z = "Reject" if p_value_z < alpha else "Fail to reject"
     decision_t = "Reject" if p_value_t < alpha else "Fail to reject"
@@ -229,7 +211,256 @@ with tab2:
     This means that there is {"" if decision_t == "Reject" else "not"} enough statistical evidence to conclude that the population mean time spent per day accessing the Internet via mobile device is different from {hypothesized_mean} minutes.
     """)
 
-with tab3:
+
+# Shown while the exact summary is still being scanned: the same tests from
+# the ingestion-time sample, with bounds on what the exact answer can be.
+# The panel polls the scan and swaps in the exact results when it finishes.
+@st.fragment(run_every=1.0)
+def approximate_test_panel(index, job):
+    # A failed scan stays on the sample instead of rerunning into its error
+    if job.done() and job.exception() is None:
+        st.rerun()
+
+    st.subheader("Hypothesis Testing (approximate)")
+    if index is None:
+        if job.done():
+            st.error(f"The exact scan failed ({job.exception()}). Reload the page to try again.")
+        else:
+            st.info("Scanning the usage log in the background. No sample index was saved when this version of the "
+                    "file was ingested, so the tests appear when the scan finishes; `python approximate.py "
+                    "InternetMobileTime.csv --column Minutes` saves one at ingestion.")
+        return
+    if job.done():
+        st.error(f"The exact scan failed ({job.exception()}), so the tests below use a uniform sample of "
+                 f"{len(index.sample):,} values. Reload the page to try the scan again.")
+    else:
+        st.info(f"Scanning all {index.population:,} values in the background; until the scan finishes, the tests below "
+                f"use a uniform sample of {len(index.sample):,} values. Each range holds the exact result with 99% confidence.")
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        alpha = st.number_input("Significance Level (α)", step=0.01, format="%.2f", key="usage_alpha")
+    with col2:
+        hypothesized_mean = st.slider("Hypothesized mean (minutes)", min_value=60, max_value=240, step=1, key="usage_popmean")
+
+    z_result = approximate.z_test(index, hypothesized_mean, 110, ci_level=1 - alpha)
+    t_result = approximate.t_test(index, hypothesized_mean, ci_level=1 - alpha)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Mean (minutes)", f"{t_result.mean:.2f}", f"exact within {t_result.mean_bounds[0]:.2f} – {t_result.mean_bounds[1]:.2f}",
+                delta_color="off")
+    col2.metric("Z-test p-value", f"{z_result.pvalue:.4f}", f"exact within {z_result.pvalue_bounds[0]:.4f} – {z_result.pvalue_bounds[1]:.4f}",
+                delta_color="off")
+    col3.metric("T-test p-value", f"{t_result.pvalue:.4f}", f"exact within {t_result.pvalue_bounds[0]:.4f} – {t_result.pvalue_bounds[1]:.4f}",
+                delta_color="off")
+
+    ci_lower, ci_upper = t_result.ci
+    st.markdown(tooltip(f"{1 - alpha:.0%} CI: ({ci_lower:.2f}, {ci_upper:.2f}) ± {t_result.ci_error:.2f} minutes",
+                        "approximate.t_test(index, hypothesized_mean, ci_level=1 - alpha)"), unsafe_allow_html=True)
+
+    for name, result in [("Z-test", z_result), ("T-test", t_result)]:
+        low, high = result.pvalue_bounds
+        if high < alpha:
+            decision = "Reject the null hypothesis"
+        elif low >= alpha:
+            decision = "Fail to reject the null hypothesis"
+        else:
+            decision = "Too close to call from the sample; waiting for the exact scan"
+        st.markdown(tooltip(f"{name} decision: {decision}", "result.pvalue_bounds vs alpha"), unsafe_allow_html=True)
+
+
+@st.fragment
+def percentile_panel(summary):
+    st.subheader("Empirical vs Normal Percentiles")
+    sketch = summary.sketch
+    sample_mean = summary.mean
+    sample_std = summary.std
+
+    percentile = st.slider("Percentile", min_value=1, max_value=99, value=90, step=1)
+    empirical = sketch.quantile(percentile / 100)
+    normal = stats.norm.ppf(percentile / 100, sample_mean, sample_std)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(tooltip(f"Empirical {percentile}th percentile: {empirical:.1f} minutes", "sketch.quantile(percentile / 100)"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(tooltip(f"Normal {percentile}th percentile: {normal:.1f} minutes", "stats.norm.ppf(percentile / 100, sample_mean, sample_std)"), unsafe_allow_html=True)
+
+    levels = np.array([5, 10, 25, 50, 75, 90, 95])
+    st.table({
+        "Percentile": [f"{p}th" for p in levels],
+        "Empirical (minutes)": np.round(sketch.quantile(levels / 100), 1),
+        "Normal (minutes)": np.round(stats.norm.ppf(levels / 100, sample_mean, sample_std), 1),
+    })
+
+
+@st.fragment
+def permutation_panel(index, summary):
+    st.subheader("Permutation Test")
+    st.markdown("""
+    The z-test assumes σ = 110 and the t-test assumes normal data, yet the usage minutes are clearly skewed.
+    The **sign-flip permutation test** drops both assumptions: under H₀ the deviations from μ₀ are symmetric,
+    so flipping their signs at random shows how large a mean deviation chance alone produces.
+    The **Wilcoxon signed-rank test** makes the same symmetry assumption but uses only the ranks of |x − μ₀|,
+    so the few very heavy users cannot dominate it.
+    """)
+    # Both tests run on the uniform sample, which holds every value unless
+    # the log is larger than the sample
+    minutes = index.sample
+    if index.population > len(minutes):
+        st.info(f"The log has {index.population:,} values, so the permutation and Wilcoxon tests run on a uniform "
+                f"sample of {len(minutes):,} of them; the z- and t-tests use all values.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        popmean = st.slider("Hypothesized mean (minutes)", min_value=60, max_value=240, value=144, step=1, key="perm_popmean")
+    with col2:
+        permutations = st.select_slider("Permutations", options=[10_000, 100_000, 1_000_000], value=100_000)
+    with col3:
+        perm_alpha = st.number_input("Significance Level (α)", value=0.05, step=0.01, format="%.2f", key="perm_alpha")
+        early_stop = st.checkbox("Stop once the decision is clear", value=True)
+
+    result = permutation_tests.sign_flip_test(minutes, popmean, permutations=permutations, alpha=perm_alpha,
+                                              early_stop=early_stop, seed=0)
+    _, p_value_z = hypothesis_tests.z_test(summary, popmean, 110)
+    _, p_value_t = hypothesis_tests.t_test(summary, popmean)
+    signed_rank = rank_tests.signed_rank_test(minutes, popmean)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Permutation p-value", f"{result.pvalue:.4f}")
+    col2.metric("Permutations used", f"{result.permutations:,}", "stopped early" if result.stopped_early else None, delta_color="off")
+    col3.metric("99% CI for the p-value", f"{result.ci[0]:.4f} – {result.ci[1]:.4f}")
+    st.markdown(tooltip(f"Decision at α = {perm_alpha:.2f}: {'reject H₀' if result.pvalue < perm_alpha else 'fail to reject H₀'}",
+                        "permutation_tests.sign_flip_test(minutes, popmean, permutations=permutations, alpha=perm_alpha)"),
+                unsafe_allow_html=True)
+
+    st.table({
+        "Test": ["Z-test (σ = 110)", "T-test", "Sign-flip permutation", "Wilcoxon signed-rank"],
+        "Assumes": ["known σ, normal mean", "normal data", "symmetry under H₀", "symmetry under H₀"],
+        "p-value": [f"{p_value_z:.4f}", f"{p_value_t:.4f}", f"{result.pvalue:.4f}", f"{signed_rank.pvalue:.4f}"],
+    })
+
+
+# Stands in for the drift monitor until its values are ready, polling the job
+# without holding up the rest of the page
+@st.fragment(run_every=1.0)
+def drift_monitor_waiting(job):
+    if job.done() and job.exception() is None:
+        st.rerun()
+    if job.done():
+        st.error(f"The scan of the usage log failed ({job.exception()}). Reload the page to try again.")
+    else:
+        st.info("The monitor resamples a uniform sample of the usage log, which the background scan is still "
+                "drawing; it appears here as soon as the sample is ready.")
+
+
+@st.fragment
+def drift_monitor_panel(minutes):
+    st.markdown("""
+    The survey gives one static sample, but in operation usage arrives every day. This monitor runs a t-test on a
+    **rolling window** of recent days against a reference mean (by default the survey's sample mean) and raises an
+    alert whenever the window's two-sided test rejects H₀.
+
+    The dataset has no dates, so the daily stream below is simulated by resampling the observed values,
+    with a shift in usage injected part-way through.
+    """)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        days = st.slider("Days of history", min_value=60, max_value=730, value=365, step=5)
+        window = st.slider("Window (days)", min_value=7, max_value=90, value=30, step=1)
+    with col2:
+        drift_day = st.slider("Drift starts on day", min_value=1, max_value=days, value=min(days, 200), step=1)
+        drift = st.slider("Drift size (minutes)", min_value=-100, max_value=200, value=100, step=5)
+    with col3:
+        reference_mean = st.number_input("Reference mean (minutes)", value=int(round(minutes.mean())), step=1)
+        monitor_alpha = st.number_input("Alert level (α)", value=0.01, step=0.01, format="%.2f", key="drift_alpha")
+
+    rng = np.random.default_rng(7)
+    stream = rng.choice(minutes, size=days, replace=True).astype(float)
+    stream[drift_day - 1:] += drift
+
+    # Window t-tests: the daily spread is estimated from each window
+    result = drift_monitor.backfill(stream, window, reference_mean, alpha=monitor_alpha)
+    day = result["end"] + 1
+    alerts = result["alert"]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.arange(1, days + 1), y=stream, mode='markers', name='Daily minutes',
+                             marker=dict(color='lightgray', size=4)))
+    fig.add_trace(go.Scatter(x=day, y=result["mean"], mode='lines', name=f'{window}-day mean',
+                             line=dict(color='royalblue', width=2)))
+    fig.add_trace(go.Scatter(x=day[alerts], y=result["mean"][alerts], mode='markers', name='Alert',
+                             marker=dict(color='red', size=6, symbol='x')))
+    fig.add_hline(y=reference_mean, line_dash="dash", line_color="green",
+                  annotation_text=f"Reference: {reference_mean}")
+    fig.add_vline(x=drift_day, line_dash="dot", line_color="orange", annotation_text="Drift starts")
+    fig.update_layout(title="Rolling-Window Test of Daily Usage", xaxis_title="Day", yaxis_title="Minutes",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    trace_reduction.plotly_chart(fig, use_container_width=True)
+
+    first_alert = int(day[alerts & (day >= drift_day)][0]) if (alerts & (day >= drift_day)).any() else None
+    false_alerts = int((alerts & (day < drift_day)).sum())
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Windows tested", f"{len(day):,}")
+    col2.metric("Days to detect drift", "not detected" if first_alert is None else f"{first_alert - drift_day}")
+    col3.metric("Alerts before the drift", f"{false_alerts}")
+
+
+# Create tabs
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Context", "📈 Analysis & Visualization", "📡 Drift Monitor", "🧮 Solved Examples", "🧠 Quiz"])
+
+with tab1, profiling.section("Context"):
+    st.header("Context")
+    st.markdown("""
+    ExperienceMyServices reported that a typical American spends an average of 144 minutes (2.4 hours) per day accessing the Internet via a mobile device with a standard deviation of 110 minutes.
+
+    To test the validity of this statement, you collected 30 samples from friends and family. The results for the time spent per day accessing the Internet via a mobile device (in minutes) are stored in "InternetMobileTime.csv".
+
+    ## Key Question:
+    Is there enough statistical evidence to conclude that the population mean time spent per day accessing the Internet via mobile device is different from the hypothesized mean? Use the p-value approach and a level of significance of 0.05.
+
+    **Note:** We can assume that the samples are randomly selected, independent, and come from a normally distributed population.
+    """)
+
+with tab2, profiling.section("Analysis & Visualization"):
+    st.header("Analysis & Visualization")
+    
+    # One background pass gives the exact summary and the sample index; an
+    # index saved at ingestion answers until then. Only the preview rows are read here
+    scan = datasets.start_internet_usage_scan()
+    datasets.retry_failed_internet_usage_scan()
+    exact = approximate.ready(scan, timeout=0.5) and scan.exception() is None
+    index = scan.result()[1] if exact else datasets.load_internet_usage_ingested_index()
+
+    st.subheader("Data Preview")
+    head = datasets.load_internet_usage_head()
+    st.write(head)
+    if index is not None:
+        shape = (index.population, head.shape[1])
+        st.markdown(tooltip(f"Data shape: {shape}", "(index.population, head.shape[1])"), unsafe_allow_html=True)
+
+    navigation.keep_widget_state({"usage_alpha": 0.05, "usage_popmean": 144})
+    if exact:
+        summary = scan.result()[0]
+        hypothesis_test_panel(summary)
+
+        permutation_panel(index, summary)
+
+        percentile_panel(summary)
+    else:
+        approximate_test_panel(index, scan)
+
+with tab3, profiling.section("Drift Monitor"):
+    st.header("Drift Monitor")
+
+    # Resamples the uniform sample (all values when the log is small)
+    if index is not None:
+        drift_monitor_panel(index.sample)
+    else:
+        drift_monitor_waiting(scan)
+
+with tab4, profiling.section("Solved Examples"):
     st.header("Solved Numerical Examples")
 
     st.markdown("""
@@ -278,7 +509,7 @@ with tab3:
     Therefore, we can be 95% confident that the true population mean falls between 115.77 and 194.23 minutes.
     """)
 
-with tab4:
+with tab5, profiling.section("Quiz"):
     st.header("Quiz")
 
     def check_answer(question, correct_answer, user_answer, explanation):
@@ -327,3 +558,5 @@ st.sidebar.markdown("""
 """)
 
 st.sidebar.info("This app performs hypothesis testing on mobile internet usage data.")
+
+profiling.report()
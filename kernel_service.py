@@ -0,0 +1,246 @@
+"""Local JSON service for the lessons' test kernels.
+
+The kernels from hypothesis_tests that take plain numbers are served over
+HTTP/1.1 with keep-alive, so other tools (dashboards, notebooks, load
+tests) can reuse them without importing Streamlit:
+
+    GET  /health            status and cache counters
+    GET  /v1                the kernels and their parameters
+    POST /v1/<kernel>       {"params": {...}}            one evaluation
+                            {"batch": [{...}, {...}]}    many in one request
+
+Every evaluation goes through an in-process LRU cache. Its key is the
+kernel name plus the parameters bound to the kernel's signature with
+defaults filled in, numbers as floats and lists as tuples, so
+{"n": 30} and {"n": 30.0, "conf_level": ...} in any order hit the same
+entry. A batch answers each item separately; one bad item does not fail
+the others.
+
+    python kernel_service.py --port 8765
+    curl -d '{"params": {"successes": 8, "trials": 10}}' localhost:8765/v1/binomial_pvalue
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import sys
+from collections import OrderedDict
+from http import HTTPStatus
+
+import numpy as np
+
+import hypothesis_tests
+
+KERNELS = {
+    "calculate_ci": hypothesis_tests.calculate_ci,
+    "proportions_ztest": hypothesis_tests.proportions_ztest,
+    "binomial_pvalue": hypothesis_tests.binomial_pvalue,
+    "error_rates": hypothesis_tests.error_rates,
+}
+
+SIGNATURES = {name: inspect.signature(kernel) for name, kernel in KERNELS.items()}
+
+MAX_BODY_BYTES = 8 * 2**20
+
+
+class ResultCache:
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    raise TypeError(f"unsupported parameter type {type(value).__name__}")
+
+
+def cache_key(name, params):
+    # Raises TypeError when params do not fit the kernel's signature
+    bound = SIGNATURES[name].bind(**params)
+    bound.apply_defaults()
+    return (name,) + tuple((k, _normalize(v)) for k, v in bound.arguments.items())
+
+
+def _jsonable(value):
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (np.floating, float)):
+        value = float(value)
+        # Strict JSON has no NaN or infinity
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def evaluate(name, params, cache):
+    # Returns (result, cached)
+    if not isinstance(params, dict):
+        raise TypeError("params must be an object")
+    key = cache_key(name, params)
+    try:
+        return cache.get(key), True
+    except KeyError:
+        pass
+    result = _jsonable(KERNELS[name](**params))
+    cache.put(key, result)
+    return result, False
+
+
+def handle(method, path, body, cache):
+    # Returns (status, payload)
+    path = path.split("?", 1)[0].rstrip("/")
+    if path == "/health":
+        return HTTPStatus.OK, {"status": "ok", "cache": cache.stats()}
+    if path == "/v1" and method == "GET":
+        return HTTPStatus.OK, {"kernels": {name: list(sig.parameters) for name, sig in SIGNATURES.items()}}
+    if not path.startswith("/v1/"):
+        return HTTPStatus.NOT_FOUND, {"error": f"no route {path}"}
+
+    name = path[len("/v1/"):]
+    if name not in KERNELS:
+        return HTTPStatus.NOT_FOUND, {"error": f"unknown kernel {name!r}; see GET /v1"}
+    if method != "POST":
+        return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "kernels are evaluated with POST"}
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError as e:
+        return HTTPStatus.BAD_REQUEST, {"error": f"invalid JSON: {e}"}
+    if not isinstance(request, dict):
+        return HTTPStatus.BAD_REQUEST, {"error": "the request body must be a JSON object"}
+
+    if "batch" in request:
+        if not isinstance(request["batch"], list):
+            return HTTPStatus.BAD_REQUEST, {"error": "batch must be a list of parameter objects"}
+        results, cached = [], 0
+        for params in request["batch"]:
+            try:
+                result, hit = evaluate(name, params, cache)
+            except Exception as e:
+                # Any failure is reported against its own item only
+                results.append({"error": f"{type(e).__name__}: {e}"})
+                continue
+            results.append({"result": result})
+            cached += hit
+        return HTTPStatus.OK, {"results": results, "cached": cached}
+
+    try:
+        result, hit = evaluate(name, request.get("params", {}), cache)
+    except Exception as e:
+        return HTTPStatus.BAD_REQUEST, {"error": f"{type(e).__name__}: {e}"}
+    return HTTPStatus.OK, {"result": result, "cached": hit}
+
+
+async def _read_request(reader):
+    # (method, path, version, headers, body), or None at end of stream
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, version = request_line.decode("latin-1").split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        field, _, value = line.decode("latin-1").partition(":")
+        headers[field.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError(f"request body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, version, headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def make_handler(cache):
+    async def serve_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    writer.write(_response(HTTPStatus.BAD_REQUEST, {"error": str(e) or "bad request"}, False))
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+                try:
+                    status, payload = handle(method, path, body, cache)
+                except Exception as e:
+                    # Answer rather than drop the connection
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return serve_connection
+
+
+async def serve(host="127.0.0.1", port=8765, cache_size=65536, ready=None):
+    server = await asyncio.start_server(make_handler(ResultCache(cache_size)), host, port)
+    bound = server.sockets[0].getsockname()
+    print(f"Serving {', '.join(KERNELS)} on http://{bound[0]}:{bound[1]}", flush=True)
+    if ready is not None:
+        ready(bound)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=65536, help="LRU entries; 0 disables the cache")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
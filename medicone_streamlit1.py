@@ -2,12 +2,25 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from scipy.stats import norm, t, binom
+from stats_core import norm
+import acceptance_sampling
+import control_charts
+import datasets
+import density
+import grouped_tests
+import hypothesis_tests
+import profiling
+import summaries
+import trace_reduction
+import navigation
 
 st.set_page_config(layout="wide", page_title="Medicon Dose Analysis")
 
+profiling.start()
+
 # CSS for tooltips and improved visual appeal
-st.markdown("""
+with profiling.section("CSS"):
+    st.markdown("""
 <style>
     .main {
         padding: 2rem 3rem;
@@ -59,7 +72,7 @@ st.markdown("""
         opacity: 1;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
 # Function to create tooltips
 def tooltip(text, code):
@@ -69,18 +82,22 @@ def tooltip(text, code):
     </div>
     """
 
-# Function to load data
-@st.cache_data
-def load_data():
-    return pd.read_csv('doses.csv')
-
 # Main title
 st.title("Medicon Dose Testing Analysis")
 
-# Create tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Context", "📈 Probability Distribution", "⏱️ Time of Effect Analysis", "🧮 Numerical Examples", "🧠 Quiz"])
+# Sidebar navigation: only the selected section runs on each rerun
+sections = ["📊 Context", "📈 Probability Distribution", "⏱️ Time of Effect Analysis", "🚦 Process Control", "📦 Lot Acceptance", "🧮 Numerical Examples", "🧠 Quiz"]
+section = navigation.section_picker(sections, sidebar=True)
 
-with tab1:
+# Keep slider settings while their section is hidden
+navigation.keep_widget_state({"doses_n": 100, "dose_p": 0.09, "shade_type": "Exactly",
+                              "threshold": 11.5, "percentile": 90, "confidence_level": 0.95, "serial_blocks": 4,
+                              "baseline_doses": 20, "cusum_k": 0.5, "cusum_h": 5.0, "ewma_lambda": 0.2,
+                              "simulated_doses": 0, "simulated_shift": 1.0,
+                              "aql": 2.0, "ltpd": 9.0, "producer_risk": 0.05, "consumer_risk": 0.10,
+                              "lot_model": "Hypergeometric (finite lot)", "max_sample": 1000, "max_accept": 99})
+
+if section == sections[0]:
     st.header("Context")
     st.write("""
     ## Context
@@ -93,17 +110,16 @@ with tab1:
     You are working with the quality assurance team of Medicon to understand the quality of the sixth batch.
     """)
 
-with tab2:
+elif section == sections[1]:
     st.header("Probability Distribution of Unsatisfactory Doses")
 
     col1, col2 = st.columns(2)
     with col1:
-        n = st.slider("Number of doses", 10, 1000, 100)
+        n = st.slider("Number of doses", 10, 1000, key="doses_n")
     with col2:
-        p = st.slider("Probability of unsatisfactory dose", 0.01, 0.20, 0.09, 0.01)
+        p = st.slider("Probability of unsatisfactory dose", 0.01, 0.20, step=0.01, key="dose_p")
     
-    k = np.arange(0, n+1)
-    binomial = binom.pmf(k=k, n=n, p=p)
+    k, binomial, cumulative, survival = datasets.load_binomial_table(n, p)
 
     fig = go.Figure()
     fig.add_trace(go.Bar(x=k, y=binomial, name='Binomial Distribution'))
@@ -116,73 +132,230 @@ with tab2:
 
     col1, col2 = st.columns(2)
     with col1:
-        shade_type = st.radio("Select shading type:", ["Exactly", "At most", "At least"])
+        shade_type = st.radio("Select shading type:", ["Exactly", "At most", "At least"], key="shade_type")
     with col2:
         shade_value = st.slider(f"Number of doses to shade ({shade_type})", 0, n, 3)
 
     if shade_type == "Exactly":
         fig.add_trace(go.Bar(x=[shade_value], y=[binomial[shade_value]], marker_color='red', name='Shaded'))
-        prob = binom.pmf(k=shade_value, n=n, p=p)
+        prob = binomial[shade_value]
         st.markdown(tooltip(f"Probability of exactly {shade_value} unsatisfactory doses: {prob:.6f}", "prob = binom.pmf(k=shade_value, n=n, p=p)"), unsafe_allow_html=True)
     elif shade_type == "At most":
         fig.add_trace(go.Bar(x=k[:shade_value+1], y=binomial[:shade_value+1], marker_color='red', name='Shaded'))
-        prob = binom.cdf(k=shade_value, n=n, p=p)
+        prob = cumulative[shade_value]
         st.markdown(tooltip(f"Probability of at most {shade_value} unsatisfactory doses: {prob:.6f}", "prob = binom.cdf(k=shade_value, n=n, p=p)"), unsafe_allow_html=True)
     else:  # "At least"
         fig.add_trace(go.Bar(x=k[shade_value:], y=binomial[shade_value:], marker_color='red', name='Shaded'))
-        prob = 1 - binom.cdf(k=shade_value-1, n=n, p=p)
-        st.markdown(tooltip(f"Probability of at least {shade_value} unsatisfactory doses: {prob:.6f}", "prob = 1 - binom.cdf(k=shade_value-1, n=n, p=p)"), unsafe_allow_html=True)
+        prob = survival[shade_value-1] if shade_value > 0 else 1.0
+        st.markdown(tooltip(f"Probability of at least {shade_value} unsatisfactory doses: {prob:.6f}", "prob = binom.sf(k=shade_value-1, n=n, p=p)"), unsafe_allow_html=True)
 
-    st.plotly_chart(fig)
+    trace_reduction.plotly_chart(fig)
 
-with tab3:
+elif section == sections[2]:
     st.header("Analysis of Time of Effect")
 
-    drug = load_data()
+    summary = datasets.load_doses_summary()
 
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Sample Data")
-        st.write(drug.head())
+        st.write(datasets.load_doses_head())
     with col2:
         st.subheader("Summary Statistics")
-        st.write(drug.describe())
+        st.write(pd.DataFrame({"drug_serial_number": summaries.describe(datasets.load_doses_serial_summary()),
+                               "time_of_effect": summaries.describe(summary)}))
 
-    mu = drug['time_of_effect'].mean()
-    sigma = drug['time_of_effect'].std()
+    mu = summary.mean
+    sigma = summary.std
 
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown(tooltip(f"Estimated mean: {mu:.2f}", "mu = drug['time_of_effect'].mean()"), unsafe_allow_html=True)
+        st.markdown(tooltip(f"Estimated mean: {mu:.2f}", "mu = summary.mean"), unsafe_allow_html=True)
     with col2:
-        st.markdown(tooltip(f"Estimated standard deviation: {sigma:.2f}", "sigma = drug['time_of_effect'].std()"), unsafe_allow_html=True)
+        st.markdown(tooltip(f"Estimated standard deviation: {sigma:.2f}", "sigma = summary.std"), unsafe_allow_html=True)
 
-    fig = go.Figure()
-    fig.add_trace(go.Histogram(x=drug['time_of_effect'], nbinsx=30, name='Time of Effect'))
-    fig.add_trace(go.Scatter(x=drug['time_of_effect'], y=norm.pdf(drug['time_of_effect'], mu, sigma),
-                             mode='lines', name='Normal Distribution'))
-    fig.update_layout(title='Distribution of Time of Effect',
+    # Binned once and cached: 30 bars plus fitted normal and KDE curves
+    fig = go.Figure(density.traces(datasets.load_doses_density(), name='Time of Effect'))
+    fig.update_layout(title='Distribution of Time of Effect', bargap=0,
                       xaxis_title='Time (hours)',
                       yaxis_title='Frequency')
-    st.plotly_chart(fig)
+    trace_reduction.plotly_chart(fig)
 
     col1, col2 = st.columns(2)
     with col1:
-        threshold = st.slider("Time threshold (hours)", float(drug['time_of_effect'].min()), float(drug['time_of_effect'].max()), 11.5)
+        threshold = st.slider("Time threshold (hours)", float(summary.min), float(summary.max), key="threshold")
         prob = norm.cdf(threshold, mu, sigma)
         st.markdown(tooltip(f"Probability that time of effect is less than {threshold} hours: {prob:.4f}", "prob = norm.cdf(threshold, mu, sigma)"), unsafe_allow_html=True)
     with col2:
-        percentile = st.slider("Percentile", 1, 99, 90)
+        percentile = st.slider("Percentile", 1, 99, key="percentile")
         perc_value = norm.ppf(percentile/100, mu, sigma)
         st.markdown(tooltip(f"The {percentile}th percentile of time of effect: {perc_value:.2f} hours", "perc_value = norm.ppf(percentile/100, mu, sigma)"), unsafe_allow_html=True)
+        empirical_value = summary.sketch.quantile(percentile/100)
+        st.markdown(tooltip(f"Empirical {percentile}th percentile (from the data): {empirical_value:.2f} hours", "empirical_value = summary.sketch.quantile(percentile/100)"), unsafe_allow_html=True)
 
     st.subheader("Confidence Interval Estimation")
-    confidence_level = st.slider("Confidence Level", 0.80, 0.99, 0.95, 0.01)
-    n = len(drug)
-    ci = t.interval(confidence_level, df=n-1, loc=mu, scale=sigma/np.sqrt(n))
-    st.markdown(tooltip(f"{confidence_level*100:.0f}% Confidence Interval for mean time of effect: ({ci[0]:.2f}, {ci[1]:.2f})", "ci = t.interval(confidence_level, df=n-1, loc=mu, scale=sigma/np.sqrt(n))"), unsafe_allow_html=True)
+    confidence_level = st.slider("Confidence Level", 0.80, 0.99, step=0.01, key="confidence_level")
+    ci = hypothesis_tests.t_interval(summary, confidence_level)
+    st.markdown(tooltip(f"{confidence_level*100:.0f}% Confidence Interval for mean time of effect: ({ci[0]:.2f}, {ci[1]:.2f})", "ci = hypothesis_tests.t_interval(summary, confidence_level)"), unsafe_allow_html=True)
+
+    st.subheader("Comparing Production Blocks")
+    st.markdown("""
+    Does time of effect differ between parts of production? The dataset records no batch or line, so here the
+    doses are split into blocks of consecutive serial numbers as a stand-in. With real batch labels the same
+    tests run on them unchanged: a one-way **ANOVA** across all blocks, and **Welch t-tests** between every pair
+    (no equal-variance assumption), with Benjamini-Hochberg q-values for the multiple comparisons.
+    """)
+    blocks = st.slider("Number of serial-number blocks", 2, 10, key="serial_blocks")
+    # Grouped on the block index so blocks stay in numeric order, then labelled
+    groups, first_serial = datasets.load_doses_blocks(blocks)
+    groups = grouped_tests.GroupSummary([f"Block {b + 1} (from #{s:.0f})" for b, s in zip(groups.labels, first_serial)],
+                                        groups.n, groups.mean, groups.m2)
+
+    result = grouped_tests.anova(groups)
+    st.markdown(tooltip(f"ANOVA across {blocks} blocks: F = {result.statistic:.3f}, p-value = {result.pvalue:.4f}", "grouped_tests.anova(groups)"), unsafe_allow_html=True)
+
+    table = groups.to_frame()
+    fig = go.Figure(go.Bar(x=table.index, y=table['mean'], error_y=dict(type='data', array=table['std'] / np.sqrt(table['n'])),
+                           marker_color='steelblue'))
+    fig.update_layout(title='Mean Time of Effect by Block (± 1 standard error)', xaxis_title='Block', yaxis_title='Time (hours)')
+    trace_reduction.plotly_chart(fig)
+
+    pairs = grouped_tests.pairwise_welch(groups)
+    st.dataframe(pairs[['group_a', 'group_b', 'mean_diff', 't', 'df', 'pvalue', 'qvalue']].round(4), hide_index=True)
+
+    st.markdown("""
+    Times of effect are skewed, so the t-tests lean on large blocks. The **Mann-Whitney U test** compares the
+    first and second half of production on ranks instead, with no normality assumption (exact for small samples).
+    """)
+    rank_result, median_serial = datasets.load_doses_halves_rank_test()
+    st.markdown(tooltip(f"Serial numbers up to #{median_serial:.0f} vs later: U = {rank_result.statistic:.1f}, "
+                        f"z = {rank_result.z:.3f}, p-value = {rank_result.pvalue:.4f}",
+                        "rank_tests.mann_whitney_test(early, late)"), unsafe_allow_html=True)
+
+elif section == sections[3]:
+    st.header("Statistical Process Control")
+
+    st.markdown("""
+    Instead of treating the doses as one static sample, QA can chart **time of effect** as doses are tested and
+    react as soon as the process mean shifts:
+
+    - **CUSUM** accumulates deviations from the target beyond a slack of k·σ and signals when either sum passes h·σ.
+    - **EWMA** smooths the doses with weight λ and signals when the average leaves its 3σ control limits.
+
+    The target and σ are estimated from the first doses (phase I, in serial-number order). Long production
+    histories can be simulated below; the charts are downsampled before they are sent to the browser.
+    """)
+
+    times = datasets.load_dose_series()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        baseline = st.slider("Baseline doses (phase I)", 5, len(times), key="baseline_doses")
+        lam = st.slider("EWMA weight λ", 0.05, 0.5, step=0.05, key="ewma_lambda")
+    with col2:
+        k = st.slider("CUSUM slack k (σ)", 0.25, 1.5, step=0.25, key="cusum_k")
+        h = st.slider("CUSUM decision interval h (σ)", 2.0, 8.0, step=0.5, key="cusum_h")
+    with col3:
+        extra = st.number_input("Simulated production doses to append", 0, 1_000_000, step=1000, key="simulated_doses")
+        shift = st.slider("Mean shift in simulated doses (hours)", -5.0, 5.0, step=0.25, key="simulated_shift")
+
+    target, sd = control_charts.phase_one(times[:baseline])
+    st.markdown(tooltip(f"Phase I target: {target:.2f} hours, σ: {sd:.2f} hours", "target, sd = control_charts.phase_one(times[:baseline])"), unsafe_allow_html=True)
+
+    observed = len(times)
+    if extra:
+        rng = np.random.default_rng(11)
+        times = np.concatenate([times, rng.normal(target + shift, sd, int(extra))])
+    dose = np.arange(1, len(times) + 1)
+
+    cusum = control_charts.Cusum(target, sd, k=k, h=h).extend(times)
+    ewma = control_charts.Ewma(target, sd, lam=lam).extend(times)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dose, y=cusum["upper"], mode='lines', name='Upper CUSUM (slower)'))
+    fig.add_trace(go.Scatter(x=dose, y=cusum["lower"], mode='lines', name='Lower CUSUM (faster)'))
+    fig.add_hline(y=h * sd, line_dash="dash", line_color="red", annotation_text="Decision interval h")
+    if extra:
+        fig.add_vline(x=observed + 0.5, line_dash="dot", line_color="gray", annotation_text="Simulated doses")
+    fig.update_layout(title='CUSUM Chart of Time of Effect', xaxis_title='Dose (test order)', yaxis_title='Cumulative sum (hours)')
+    trace_reduction.plotly_chart(fig, use_container_width=True)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dose, y=ewma["z"], mode='lines', name='EWMA'))
+    fig.add_trace(go.Scatter(x=dose, y=ewma["upper"], mode='lines', name='Upper control limit', line=dict(color='red', dash='dash')))
+    fig.add_trace(go.Scatter(x=dose, y=ewma["lower"], mode='lines', name='Lower control limit', line=dict(color='red', dash='dash')))
+    fig.add_hline(y=target, line_dash="dot", line_color="green", annotation_text="Target")
+    if extra:
+        fig.add_vline(x=observed + 0.5, line_dash="dot", line_color="gray", annotation_text="Simulated doses")
+    fig.update_layout(title='EWMA Chart of Time of Effect', xaxis_title='Dose (test order)', yaxis_title='Time of effect (hours)')
+    trace_reduction.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    for col, name, signal in [(col1, "CUSUM", cusum["signal"]), (col2, "EWMA", ewma["signal"])]:
+        first = f"dose {int(np.argmax(signal)) + 1:,}" if signal.any() else "none"
+        col.metric(f"{name}: first signal", first)
+        col.metric(f"{name}: doses out of control", f"{int(signal.sum()):,}")
 
-with tab4:
+elif section == sections[4]:
+    st.header("Lot Acceptance Sampling for the 40,000-Dose Batch")
+
+    st.markdown("""
+    Testing every dose of the batch is impractical. A **sampling plan (n, c)** tests n randomly chosen doses and
+    accepts the batch if at most c of them are unsatisfactory. Two quality levels define what the plan must do:
+
+    - **AQL** (acceptable quality level): a batch this good should be accepted; rejecting it is the **producer's risk** α.
+    - **LTPD** (lot tolerance percent defective): a batch this bad should be rejected; accepting it is the **consumer's risk** β.
+
+    The planner evaluates every plan on the grid below at once and picks the smallest sample size meeting both risks.
+    """)
+
+    lot_size = 40000
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        aql = st.slider("AQL (% unsatisfactory)", 0.5, 10.0, step=0.5, key="aql")
+        ltpd = st.slider("LTPD (% unsatisfactory)", 1.0, 20.0, step=0.5, key="ltpd")
+    with col2:
+        alpha = st.slider("Producer's risk target α", 0.01, 0.20, step=0.01, key="producer_risk")
+        beta = st.slider("Consumer's risk target β", 0.01, 0.20, step=0.01, key="consumer_risk")
+    with col3:
+        model = st.radio("Model", ["Hypergeometric (finite lot)", "Binomial"], key="lot_model")
+        n_max = st.select_slider("Largest sample size searched", [250, 500, 1000, 2000, 4000], key="max_sample")
+        c_max = st.select_slider("Largest acceptance number searched", [24, 49, 99, 199], key="max_accept")
+
+    model_name = "binomial" if model == "Binomial" else "hypergeometric"
+    if ltpd <= aql:
+        st.warning("LTPD must be worse (higher) than AQL.")
+    else:
+        producer, consumer = datasets.load_acceptance_tables(n_max, c_max, aql / 100, ltpd / 100, lot_size, model_name)
+        plan = acceptance_sampling.minimal_plan(producer, consumer, alpha, beta)
+        st.markdown(tooltip(f"Searched {producer.size:,} plans (n ≤ {n_max:,}, c ≤ {c_max})", "producer, consumer = acceptance_sampling.risk_tables(n_max, c_max, aql, ltpd, lot_size, model)"), unsafe_allow_html=True)
+
+        if plan is None:
+            st.error("No plan on this grid meets both risk targets. Widen the search or relax the targets.")
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Sample size n", f"{plan.n:,}")
+            col2.metric("Acceptance number c", f"{plan.c}")
+            col3.metric("Producer's risk α", f"{plan.producer_risk:.3f}")
+            col4.metric("Consumer's risk β", f"{plan.consumer_risk:.3f}")
+
+            rates = np.linspace(0, min(1.0, 2.5 * ltpd / 100), 200)
+            accept = acceptance_sampling.oc_curve(plan.n, plan.c, rates, lot_size, model_name)
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=rates * 100, y=accept, mode='lines', name=f'Plan n={plan.n}, c={plan.c}'))
+            fig.add_vline(x=aql, line_dash="dash", line_color="green", annotation_text="AQL")
+            fig.add_vline(x=ltpd, line_dash="dash", line_color="red", annotation_text="LTPD")
+            fig.add_trace(go.Scatter(x=[aql, ltpd], y=[1 - plan.producer_risk, plan.consumer_risk], mode='markers',
+                                     name='Risk points', marker=dict(size=10, color=['green', 'red'])))
+            fig.add_vline(x=9, line_dash="dot", line_color="gray", annotation_text="Historical 9%", annotation_position="bottom right")
+            fig.update_layout(title='Operating Characteristic (OC) Curve', xaxis_title='Unsatisfactory doses in batch (%)',
+                              yaxis_title='Probability of accepting the batch', yaxis=dict(range=[0, 1.05]))
+            trace_reduction.plotly_chart(fig, use_container_width=True)
+
+            accept_at_9 = acceptance_sampling.oc_curve(plan.n, plan.c, [0.09], lot_size, model_name)[0]
+            st.markdown(tooltip(f"A batch with the historical 9% unsatisfactory rate would be accepted with probability {accept_at_9:.4f}", "acceptance_sampling.oc_curve(plan.n, plan.c, [0.09], lot_size, model)"), unsafe_allow_html=True)
+
+elif section == sections[5]:
     st.header("Numerical Examples")
 
     st.markdown("""
@@ -228,7 +401,7 @@ with tab4:
     Therefore, we can be 95% confident that the true population mean time of effect falls between 10.083 and 10.917 hours.
     """)
 
-with tab5:
+elif section == sections[6]:
     st.header("Quiz")
 
     def check_answer(question, correct_answer, user_answer, explanation):
@@ -271,16 +444,9 @@ with tab5:
 
 
 # Sidebar
-st.sidebar.markdown("""
-## Navigation
-- [📊 Context](#context)
-- [📈 Probability Distribution](#probability-distribution-of-unsatisfactory-doses)
-- [⏱️ Time of Effect Analysis](#analysis-of-time-of-effect)
-- [🧮 Numerical Examples](#numerical-examples)
-- [🧠 Quiz](#quiz)
-""")
-
 st.sidebar.info("This app analyzes the quality and time of effect for Medicon's COVID-19 vaccine doses.")
 st.sidebar.markdown("---")
 st.sidebar.markdown("Created by [Your Name]")
-st.sidebar.markdown("Data Source: Medicon Pharmaceutical Company")
\ No newline at end of file
+st.sidebar.markdown("Data Source: Medicon Pharmaceutical Company")
+
+profiling.report()
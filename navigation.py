@@ -0,0 +1,35 @@
+"""Section navigation that only runs the visible section.
+
+`st.tabs` executes every tab body, including all of its Plotly figures,
+on each rerun even though the user sees one tab. `section_picker` shows
+the same labels as a radio, either horizontal above the content or in
+the sidebar like 3_type_1_2_errors_medical.py. It returns the selected
+label so the app runs just that branch:
+
+    SECTIONS = ["📚 Introduction", "🧠 Quiz"]
+    section = navigation.section_picker(SECTIONS)
+
+    if section == SECTIONS[0]:
+        ...
+    elif section == SECTIONS[1]:
+        ...
+
+Streamlit drops the state of widgets that were not rendered in a run.
+Values that must survive while their section is hidden, or that another
+section reads, go through `keep_widget_state`.
+"""
+import streamlit as st
+
+
+def section_picker(labels, key="section", sidebar=False):
+    if sidebar:
+        st.sidebar.header("Navigation")
+        return st.sidebar.radio("Choose a section", labels, key=key)
+    return st.radio("Choose a section", labels, key=key, horizontal=True, label_visibility="collapsed")
+
+
+def keep_widget_state(defaults):
+    # Writing the values back through the Session State API keeps them
+    # alive (and seeds the defaults); create those widgets with key= only
+    for key, default in defaults.items():
+        st.session_state[key] = st.session_state.get(key, default)
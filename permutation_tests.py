@@ -0,0 +1,230 @@
+"""Monte Carlo permutation tests for one- and two-sample means.
+
+Neither test assumes normality or a known sigma:
+
+    sign_flip_test   H0: the distribution of x - popmean is symmetric
+                     about 0. Each permutation flips the sign of every
+                     deviation at random; statistic mean(x) - popmean.
+    two_sample_test  H0: a and b are exchangeable. Each permutation
+                     reassigns the pooled values to groups of the same
+                     sizes; statistic mean(a) - mean(b).
+
+Permutations are drawn a chunk at a time as batched matrices, and the
+chunk's statistics come from one matrix operation:
+
+  * sign flips: a (B, n) 0/1 matrix unpacked from random bytes, times the
+    deviations (float32 matmul; flipped sum = 2 * bits @ d - sum d)
+  * two samples: a (B, N) membership matrix marking a random m of the N
+    pooled values in each row (the m smallest of N random keys, found
+    with np.partition; m = the smaller group), times the pooled values
+
+Chunks start at MIN_PERMUTATIONS and double up to a memory cap, so the
+stopping rule below can fire after the first thousand permutations.
+Chunks run in a process pool (workers > 1). Chunk i always draws from
+SeedSequence(seed, spawn_key=(i,)), and results are consumed in chunk
+order, so a seeded run gives the same answer for any number of workers.
+
+p = (k + 1) / (B + 1) for k of B permutations at least as extreme as the
+observed statistic. With early stopping, the run ends as soon as the
+Clopper-Pearson interval for the exceedance probability (at
+`confidence`) lies entirely above or below alpha. Clear-cut decisions
+then need a few thousand permutations instead of the full budget.
+"""
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import stats_core as stats
+
+PermutationResult = namedtuple(
+    "PermutationResult", ["statistic", "pvalue", "permutations", "exceed", "ci", "stopped_early"]
+)
+
+ALTERNATIVES = ("two-sided", "greater", "less")
+# Elements of the (B, n) sign or index matrix per chunk
+CHUNK_ELEMENTS = 2**23
+MIN_PERMUTATIONS = 1000
+# Exceedance slack relative to the sum of |deviations|, for float32 ties
+TIE_TOLERANCE = 1e-6
+
+
+class _SignFlip:
+    def __init__(self, deviations, alternative):
+        self.d = np.asarray(deviations, dtype=np.float32)
+        self.total = float(np.sum(deviations, dtype=float))
+        self.observed = self.total
+        # Flipped sums are symmetric about 0 under H0
+        self.center = 0.0
+        self.alternative = alternative
+        self.tol = TIE_TOLERANCE * float(np.abs(deviations).sum())
+        self.row_bytes = (len(self.d) + 7) // 8
+
+    def statistics(self, rng, size):
+        raw = np.frombuffer(rng.bytes(size * self.row_bytes), dtype=np.uint8).reshape(size, self.row_bytes)
+        bits = np.unpackbits(raw, axis=1, count=len(self.d)).astype(np.float32)
+        return 2.0 * (bits @ self.d).astype(float) - self.total
+
+
+class _TwoSample:
+    def __init__(self, a, b, alternative):
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        self.pooled = np.concatenate([a, b])
+        self.n_a, self.n = len(a), len(a) + len(b)
+        # Track the sum of the smaller group; mean(a) - mean(b) is affine in it
+        self.m = min(len(a), len(b))
+        self.small_is_a = len(a) <= len(b)
+        self.grand = float(self.pooled.sum())
+        self.observed = float(a.sum() if self.small_is_a else b.sum())
+        self.center = self.grand * self.m / self.n
+        self.alternative = alternative if self.small_is_a else _mirror(alternative)
+        self.tol = TIE_TOLERANCE * float(np.abs(self.pooled).sum())
+
+    def statistics(self, rng, size):
+        keys = rng.random((size, self.n))
+        kth = np.partition(keys, self.m - 1, axis=1)[:, self.m - 1:self.m]
+        members = keys <= kth
+        sums = members.astype(np.float32) @ self.pooled.astype(np.float32)
+        # A tie at the kth key would select too many; redo those rows by index
+        bad = np.flatnonzero(members.sum(axis=1) != self.m)
+        if len(bad):
+            index = np.argpartition(keys[bad], self.m - 1, axis=1)[:, :self.m]
+            sums[bad] = self.pooled[index].sum(axis=1)
+        return sums.astype(float)
+
+    def mean_difference(self, small_sum):
+        other = self.grand - small_sum
+        if self.small_is_a:
+            return small_sum / self.n_a - other / (self.n - self.n_a)
+        return other / self.n_a - small_sum / (self.n - self.n_a)
+
+
+def _mirror(alternative):
+    return {"greater": "less", "less": "greater"}.get(alternative, alternative)
+
+
+def _exceed(engine, values):
+    # Permuted statistics at least as extreme as the observed one
+    if engine.alternative == "greater":
+        return int(np.count_nonzero(values >= engine.observed - engine.tol))
+    if engine.alternative == "less":
+        return int(np.count_nonzero(values <= engine.observed + engine.tol))
+    observed = abs(engine.observed - engine.center)
+    return int(np.count_nonzero(np.abs(values - engine.center) >= observed - engine.tol))
+
+
+_engine = None
+
+
+def _init_worker(engine):
+    global _engine
+    _engine = engine
+
+
+def _run_chunk(args):
+    index, size, seed = args
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    return _exceed(_engine, _engine.statistics(rng, size))
+
+
+def clopper_pearson(k, n, confidence):
+    tail = (1 - confidence) / 2
+    lower = stats.beta.ppf(tail, k, n - k + 1) if k > 0 else 0.0
+    upper = stats.beta.ppf(1 - tail, k + 1, n - k) if k < n else 1.0
+    return float(lower), float(upper)
+
+
+def _chunk_sizes(permutations, width, chunk=None):
+    # A fixed chunk if given; otherwise start at MIN_PERMUTATIONS and double
+    # up to the memory cap, so early stopping gets a chance after each of
+    # the first few thousand permutations instead of only after the first cap
+    cap = max(64, min(CHUNK_ELEMENTS // max(width, 1), 100_000))
+    size = chunk or min(MIN_PERMUTATIONS, cap)
+    sizes, done = [], 0
+    while done < permutations:
+        sizes.append(min(size, permutations - done))
+        done += sizes[-1]
+        if chunk is None:
+            size = min(2 * size, cap)
+    return sizes
+
+
+def _run(engine, width, permutations, alpha, confidence, early_stop, workers, seed, chunk):
+    sizes = _chunk_sizes(permutations, width, chunk)
+    seed = np.random.SeedSequence(seed).entropy
+    jobs = [(i, size, seed) for i, size in enumerate(sizes)]
+
+    done = exceed = 0
+    stopped = False
+
+    def decided():
+        if not early_stop or done < MIN_PERMUTATIONS or done == permutations:
+            return False
+        lower, upper = clopper_pearson(exceed, done, confidence)
+        return upper < alpha or lower > alpha
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        _init_worker(engine)
+        for job in jobs:
+            exceed += _run_chunk(job)
+            done += job[1]
+            if decided():
+                stopped = True
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+            pending = deque()
+            queue = iter(jobs)
+            for job in queue:
+                pending.append((job[1], pool.submit(_run_chunk, job)))
+                if len(pending) < 2 * workers:
+                    continue
+                # Consume in chunk order, keeping the pool busy
+                size, future = pending.popleft()
+                exceed += future.result()
+                done += size
+                if decided():
+                    stopped = True
+                    break
+            while pending and not stopped:
+                size, future = pending.popleft()
+                exceed += future.result()
+                done += size
+                stopped = decided()
+            for _, future in pending:
+                future.cancel()
+
+    ci = clopper_pearson(exceed, done, confidence)
+    return (exceed + 1) / (done + 1), done, exceed, ci, stopped
+
+
+def sign_flip_test(sample, popmean=0.0, alternative="two-sided", permutations=1_000_000, alpha=0.05,
+                   confidence=0.99, early_stop=True, workers=1, seed=None, chunk=None):
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"alternative must be one of {ALTERNATIVES}, got {alternative!r}")
+    x = np.asarray(sample, dtype=float)
+    x = x[~np.isnan(x)]
+    if len(x) < 2:
+        raise ValueError("need at least two values")
+    engine = _SignFlip(x - popmean, alternative)
+    pvalue, done, exceed, ci, stopped = _run(engine, len(x), permutations, alpha, confidence,
+                                             early_stop, workers, seed, chunk)
+    return PermutationResult(engine.total / len(x), pvalue, done, exceed, ci, stopped)
+
+
+def two_sample_test(a, b, alternative="two-sided", permutations=1_000_000, alpha=0.05,
+                    confidence=0.99, early_stop=True, workers=1, seed=None, chunk=None):
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"alternative must be one of {ALTERNATIVES}, got {alternative!r}")
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+    if not len(a) or not len(b):
+        raise ValueError("both samples need at least one value")
+    engine = _TwoSample(a, b, alternative)
+    pvalue, done, exceed, ci, stopped = _run(engine, engine.n, permutations, alpha, confidence,
+                                             early_stop, workers, seed, chunk)
+    return PermutationResult(engine.mean_difference(engine.observed), pvalue, done, exceed, ci, stopped)
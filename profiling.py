@@ -0,0 +1,141 @@
+"""Opt-in per-rerun profiling for the lesson apps.
+
+Turn it on with `?profile=1` in the app URL or `HT_PROFILE=1` in the
+environment. When it is off every call below is a cheap no-op.
+
+    profiling.start()                      # right after st.set_page_config
+    with profiling.section("CSS"):
+        st.markdown(...)
+    with tab1, profiling.section("Context"):
+        ...
+    with profiling.section("Calculations"):  # any block, nested is fine
+        ...
+    profiling.report()                     # last line of the script
+
+If the page raises before report(), the next start() disables the
+profiler that was left running. report() shows a collapsible breakdown
+of the named sections together with the cProfile top-N of the rerun. It
+also appends the timings as one JSON line to HT_PROFILE_LOG (default
+.cache/profile_timings.jsonl) for offline aggregation.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+LOG_PATH = os.environ.get(
+    "HT_PROFILE_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profile_timings.jsonl"),
+)
+TOP_N = int(os.environ.get("HT_PROFILE_TOP", "15"))
+
+_STATE_KEY = "_profiling_run"
+
+# Enabled profilers by script thread, until report() disables them
+_enabled = {}
+_enabled_lock = threading.Lock()
+
+
+def enabled():
+    if os.environ.get("HT_PROFILE", "0") not in ("", "0"):
+        return True
+    return st.query_params.get("profile", "0") not in ("", "0")
+
+
+def _disable_leftovers():
+    # A run that raised before report() leaves its profiler enabled. Stop
+    # the one left on this thread and those of threads that have exited;
+    # other live threads may still be profiling a run of their own.
+    alive = {thread.ident for thread in threading.enumerate()}
+    current = threading.get_ident()
+    with _enabled_lock:
+        for ident in [ident for ident in _enabled if ident == current or ident not in alive]:
+            _enabled.pop(ident).disable()
+
+
+def start():
+    _disable_leftovers()
+    if not enabled():
+        st.session_state[_STATE_KEY] = None
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this interpreter
+        profiler = None
+    else:
+        with _enabled_lock:
+            _enabled[threading.get_ident()] = profiler
+
+    script = sys._getframe(1).f_globals.get("__file__", "")
+    st.session_state[_STATE_KEY] = {
+        "script": os.path.basename(script),
+        "timestamp": time.time(),
+        "start": time.perf_counter(),
+        "profiler": profiler,
+        "stack": [],
+        "sections": [],
+    }
+
+
+@contextmanager
+def section(name):
+    run = st.session_state.get(_STATE_KEY)
+    if run is None:
+        yield
+        return
+
+    run["stack"].append(name)
+    full_name = " / ".join(run["stack"])
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["sections"].append((full_name, time.perf_counter() - begin))
+        run["stack"].pop()
+
+
+def report():
+    run = st.session_state.get(_STATE_KEY)
+    if run is None:
+        return
+
+    total = time.perf_counter() - run["start"]
+    profiler = run["profiler"]
+    if profiler is not None:
+        profiler.disable()
+        with _enabled_lock:
+            _enabled.pop(threading.get_ident(), None)
+
+    sections = [{"section": name, "ms": round(elapsed * 1000, 2)} for name, elapsed in run["sections"]]
+
+    with st.expander(f"⏱️ Profile of this rerun: {total * 1000:.0f} ms"):
+        st.table(sections)
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(TOP_N)
+            st.code(out.getvalue(), language="text")
+
+    record = {
+        "timestamp": run["timestamp"],
+        "script": run["script"],
+        "total_ms": round(total * 1000, 2),
+        "sections": {item["section"]: item["ms"] for item in sections},
+    }
+    try:
+        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+    st.session_state[_STATE_KEY] = None
@@ -0,0 +1,69 @@
+"""Precomputed p-value surface for the speeding-camera example.
+
+The "Real Example" tab of 2_hypothesis_testing_keyterms.py only ever asks
+for P(X >= speeders) with X ~ Binomial(cars, rate / 100), and every slider
+is discrete:
+
+    usual speeding rate   5 .. 50 %
+    cars observed         50 .. 500
+    speeders observed     0 .. cars
+
+So the whole tensor (46 x 451 x 501 float32, about 41 MB) is computed once
+with vectorized survival functions, written to disk as a .npy file and
+memory-mapped afterwards. A slider change becomes a single array lookup.
+"""
+import os
+
+import numpy as np
+
+RATES = np.arange(5, 51)
+CARS = np.arange(50, 501)
+SPEEDERS = np.arange(0, CARS[-1] + 1)
+
+CACHE_DIR = os.environ.get(
+    "HT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+SURFACE_PATH = os.path.join(CACHE_DIR, "speeding_pvalues.npy")
+
+
+def build_surface(path=SURFACE_PATH):
+    # scipy is only needed when the surface is (re)built
+    from scipy.stats import binom
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    surface = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.float32, shape=(len(RATES), len(CARS), len(SPEEDERS))
+    )
+
+    n = CARS[:, None]
+    k = SPEEDERS[None, :]
+    for i, rate in enumerate(RATES):
+        # P(X >= k) = sf(k - 1); entries with k > n come out as exactly 0
+        surface[i] = binom.sf(k - 1, n, rate / 100)
+
+    surface.flush()
+    del surface
+    # Atomic swap so concurrent app processes never see a half-written file
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_surface(path=SURFACE_PATH):
+    if not os.path.exists(path):
+        build_surface(path)
+    surface = np.load(path, mmap_mode="r")
+    if surface.shape != (len(RATES), len(CARS), len(SPEEDERS)):
+        # Stale file from a different grid definition
+        build_surface(path)
+        surface = np.load(path, mmap_mode="r")
+    return surface
+
+
+def p_value(surface, rate, cars, speeders):
+    return float(surface[rate - RATES[0], cars - CARS[0], speeders])
+
+
+def reject_region(surface, cars, alpha):
+    # rows: usual speeding rate, columns: speeders observed (0 .. cars)
+    return surface[:, cars - CARS[0], : cars + 1] < alpha
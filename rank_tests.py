@@ -0,0 +1,251 @@
+"""Wilcoxon signed-rank and Mann-Whitney U tests for skewed data.
+
+Both tests replace the values by their ranks, so a few very large values
+(the usage minutes run 48, 72, 144 ... 400+) cannot dominate them:
+
+    signed_rank_test    H0: x - popmean is symmetric about 0. Ranks the
+                        |x - popmean| (zeros dropped); W = sum of the ranks
+                        of the positive deviations.
+    mann_whitney_test   H0: a and b come from the same distribution.
+                        Ranks the pooled values; U = R_a - n_a (n_a + 1) / 2.
+
+Ranking sorts once. Ties get the average of the ranks they span, from
+run-length logic on the sorted values (run starts where the value
+changes); the same runs give the tie correction sum(t^3 - t) that
+shrinks the variance. For large samples the p-value is the normal
+approximation without continuity correction, from log_pvalues, so it
+stays finite for any n:
+
+    W: mean n (n + 1) / 4,  var n (n + 1) (2 n + 1) / 24 - sum(t^3 - t) / 48
+    U: mean n_a n_b / 2,    var n_a n_b / 12 ((N + 1) - sum(t^3 - t) / (N (N - 1)))
+
+Up to EXACT_MAX_N values with no ties, the p-value comes from the exact
+null distribution instead, as scipy's method="auto" does. The counts of
+W are the coefficients of prod (1 + x^i), and the counts of U follow
+c(i, j, u) = c(i - 1, j, u - j) + c(i, j - 1, u).
+
+Inputs are arrays or, for data larger than memory, sources as in fdr
+(functions returning a fresh iterator of 1-D chunks, e.g.
+fdr.npy_chunks). A source with more than `budget` values is ranked by an
+external bucket sort:
+
+    pass 1   count the values and keep every 64th as a sample
+    pass 2   cut the sample at its quantiles into buckets of about
+             budget / 2 values each, and append every chunk's values to
+             its bucket's temporary file
+    pass 3   load, sort and rank one bucket at a time; the count of all
+             earlier buckets offsets its ranks
+
+Equal values always land in the same bucket, so ties never straddle two
+(and a value repeated more than `budget` times is loaded as one bucket).
+"""
+import math
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+import log_pvalues
+
+ALTERNATIVES = ("two-sided", "greater", "less")
+# Most values ranked in memory at once
+BUDGET = 20_000_000
+SAMPLE_STRIDE = 64
+# Largest tie-free sample (pooled, for U) tested against the exact null distribution
+EXACT_MAX_N = 50
+
+RankResult = namedtuple("RankResult", ["statistic", "z", "pvalue", "log_pvalue", "n"])
+
+_RECORD = np.dtype([("value", "f8"), ("flag", "?")])
+
+
+def _runs(sorted_values):
+    # Start, length and average (1-based) rank of each run of equal values
+    change = np.flatnonzero(sorted_values[1:] != sorted_values[:-1]) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [len(sorted_values)]])
+    return starts, ends - starts, (starts + ends + 1) / 2.0
+
+
+def rankdata(values):
+    # Tie-averaged ranks in the input order
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(values, kind="stable")
+    _, counts, average = _runs(values[order])
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(average, counts)
+    return ranks
+
+
+def _flagged_rank_sum(values, flags):
+    # Sum of the ranks of the flagged values and sum(t^3 - t) over ties
+    if not len(values):
+        return 0.0, 0.0
+    order = np.argsort(values, kind="stable")
+    starts, counts, average = _runs(values[order])
+    flagged = np.add.reduceat(flags[order].astype(np.int64), starts)
+    t = counts.astype(float)
+    return float(np.dot(flagged, average)), float(np.sum(t * t * t - t))
+
+
+def _external_rank_sum(source, n, sample, budget, tmpdir):
+    buckets = math.ceil(2 * n / budget)
+    edges = np.unique(np.quantile(sample, np.linspace(0, 1, buckets + 1)[1:-1]))
+    with tempfile.TemporaryDirectory(dir=tmpdir, prefix="rank_tests-") as workdir:
+        paths = [os.path.join(workdir, f"{b}.bin") for b in range(len(edges) + 1)]
+        files = [open(path, "wb") for path in paths]
+        try:
+            for values, flags in source():
+                bucket = np.searchsorted(edges, values, side="right")
+                order = np.argsort(bucket, kind="stable")
+                records = np.empty(len(values), dtype=_RECORD)
+                records["value"] = values[order]
+                records["flag"] = flags[order]
+                bounds = np.concatenate([[0], np.cumsum(np.bincount(bucket, minlength=len(files)))])
+                for b, handle in enumerate(files):
+                    if bounds[b + 1] > bounds[b]:
+                        records[bounds[b]:bounds[b + 1]].tofile(handle)
+        finally:
+            for handle in files:
+                handle.close()
+
+        offset = 0
+        rank_sum = tie_term = 0.0
+        for path in paths:
+            records = np.fromfile(path, dtype=_RECORD)
+            os.remove(path)
+            part_sum, part_ties = _flagged_rank_sum(records["value"], records["flag"])
+            rank_sum += part_sum + offset * float(np.count_nonzero(records["flag"]))
+            tie_term += part_ties
+            offset += len(records)
+    return rank_sum, tie_term
+
+
+def _rank_sum(source, budget, tmpdir):
+    # source() yields (values, flags) chunks; returns n, flagged count,
+    # rank sum of the flagged values and the tie term, over all chunks
+    n = n_flagged = 0
+    sample = []
+    # The chunks are kept while they fit in the budget, so data that fits
+    # in memory is read only once
+    kept = []
+    for values, flags in source():
+        n += len(values)
+        n_flagged += int(np.count_nonzero(flags))
+        sample.append(values[::SAMPLE_STRIDE])
+        if kept is not None and n <= budget:
+            kept.append((values, flags))
+        else:
+            kept = None
+    if kept is not None:
+        values = np.concatenate([v for v, _ in kept]) if kept else np.empty(0)
+        flags = np.concatenate([f for _, f in kept]) if kept else np.empty(0, dtype=bool)
+        rank_sum, tie_term = _flagged_rank_sum(values, flags)
+    else:
+        rank_sum, tie_term = _external_rank_sum(source, n, np.concatenate(sample), budget, tmpdir)
+    return n, n_flagged, rank_sum, tie_term
+
+
+def _as_source(data):
+    if callable(data):
+        return data
+    values = np.asarray(data, dtype=float).ravel()
+    return lambda: iter([values])
+
+
+def _clean(chunk):
+    chunk = np.asarray(chunk, dtype=float).ravel()
+    return chunk[~np.isnan(chunk)]
+
+
+def _signed_rank_counts(n):
+    # Null counts of W = 0 .. n (n + 1) / 2 over the 2^n sign patterns
+    counts = np.zeros(n * (n + 1) // 2 + 1, dtype=np.int64)
+    counts[0] = 1
+    for i in range(1, n + 1):
+        counts[i:] = counts[i:] + counts[:-i].copy()
+    return counts
+
+
+def _mann_whitney_counts(n_a, n_b):
+    # Null counts of U = 0 .. n_a n_b over the C(n_a + n_b, n_a) orderings:
+    # the largest value is either an a (beating all j b's) or a b
+    rows = [np.ones(1, dtype=np.int64) for _ in range(n_b + 1)]
+    for i in range(1, n_a + 1):
+        current = [np.ones(1, dtype=np.int64)]
+        for j in range(1, n_b + 1):
+            counts = np.zeros(i * j + 1, dtype=np.int64)
+            counts[j:j + len(rows[j])] += rows[j]
+            counts[:len(current[j - 1])] += current[j - 1]
+            current.append(counts)
+        rows = current
+    return rows[n_b]
+
+
+def _exact_p_value(statistic, counts, alternative):
+    # statistic is an integer for untied data; the null is symmetric
+    k = int(round(statistic))
+    total = counts.sum()
+    upper = counts[k:].sum() / total
+    lower = counts[:k + 1].sum() / total
+    if alternative == "greater":
+        return upper
+    if alternative == "less":
+        return lower
+    return min(1.0, 2 * min(upper, lower))
+
+
+def _result(statistic, mean, var, alternative, n, exact_counts=None):
+    z = (statistic - mean) / math.sqrt(var) if var > 0 else 0.0
+    if exact_counts is not None:
+        p = float(_exact_p_value(statistic, exact_counts, alternative))
+        return RankResult(float(statistic), z, p, math.log(p), n)
+    log_p = float(log_pvalues.log_p_value(z, alternative))
+    return RankResult(float(statistic), z, math.exp(log_p), log_p, n)
+
+
+def signed_rank_test(sample, popmean=0.0, alternative="two-sided", budget=BUDGET, tmpdir=None):
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"alternative must be one of {ALTERNATIVES}, got {alternative!r}")
+    data = _as_source(sample)
+
+    def source():
+        for chunk in data():
+            d = _clean(chunk) - popmean
+            d = d[d != 0]
+            yield np.abs(d), d > 0
+
+    n, _, w, tie_term = _rank_sum(source, budget, tmpdir)
+    if n == 0:
+        raise ValueError("every value equals popmean")
+    mean = n * (n + 1) / 4
+    var = n * (n + 1) * (2 * n + 1) / 24 - tie_term / 48
+    exact = _signed_rank_counts(n) if n <= EXACT_MAX_N and tie_term == 0 else None
+    return _result(w, mean, var, alternative, n, exact)
+
+
+def mann_whitney_test(a, b, alternative="two-sided", budget=BUDGET, tmpdir=None):
+    # U counts the pairs with a > b (ties count 1/2); "greater" means a
+    # tends to be larger
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"alternative must be one of {ALTERNATIVES}, got {alternative!r}")
+    data_a, data_b = _as_source(a), _as_source(b)
+
+    def source():
+        for chunk in data_a():
+            chunk = _clean(chunk)
+            yield chunk, np.ones(len(chunk), dtype=bool)
+        for chunk in data_b():
+            chunk = _clean(chunk)
+            yield chunk, np.zeros(len(chunk), dtype=bool)
+
+    n, n_a, rank_sum, tie_term = _rank_sum(source, budget, tmpdir)
+    n_b = n - n_a
+    if not n_a or not n_b:
+        raise ValueError("both samples need at least one value")
+    u = rank_sum - n_a * (n_a + 1) / 2
+    mean = n_a * n_b / 2
+    var = n_a * n_b / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    exact = _mann_whitney_counts(n_a, n_b) if n <= EXACT_MAX_N and tie_term == 0 else None
+    return _result(u, mean, var, alternative, n, exact)
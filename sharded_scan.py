@@ -0,0 +1,151 @@
+"""Parallel scan of a large CSV column into a SampleSummary.
+
+The file is cut into one shard per worker at newline-aligned byte
+offsets. Each worker parses only its byte range, block by block, and
+returns a summaries.SampleSummary; the shard summaries are merged into the
+exact result. Parsing is the bottleneck for multi-GB usage logs, so the
+scan scales with the number of cores until the disk becomes the limit.
+
+Shards are split on raw newlines, so quoted fields must not contain line
+breaks. That holds for the numeric usage and dose logs this is meant for.
+
+    python sharded_scan.py InternetMobileTime.csv --column Minutes --workers 8
+
+    summary, report = sharded_scan.scan("usage.csv", "Minutes")
+    hypothesis_tests.t_test(summary, 144)
+
+scan_with_index also draws approximate's sample index in the same pass:
+each shard samples with its own seed and the shard indexes are merged.
+"""
+import argparse
+import functools
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import approximate
+import quantile_sketch
+import summaries
+
+BLOCK_BYTES = 64 * 2**20
+
+
+def _next_line_start(f, offset):
+    # First byte of the line that follows the one containing offset - 1
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def shard_offsets(path, shards):
+    # [(start, end), ...] byte ranges covering the data rows, header excluded
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        cuts = [data_start]
+        for i in range(1, shards):
+            cuts.append(max(_next_line_start(f, data_start + (size - data_start) * i // shards), cuts[-1]))
+        cuts.append(size)
+    return [(start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+
+
+def _scan_shard(path, start, end, names, column, sketch, sample=0, seed=0):
+    # The shard's summary, or (summary, sample index) when sample > 0
+    total = summaries.SampleSummary(sketch=quantile_sketch.KLLSketch() if sketch else None)
+    rng = np.random.default_rng(seed)
+    index = approximate.empty_index()
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            block = f.read(min(BLOCK_BYTES, end - position))
+            if position + len(block) < end:
+                # Finish the partial last line so every block parses alone
+                block += f.readline()
+            position += len(block)
+            frame = pd.read_csv(io.BytesIO(block), header=None, names=names, usecols=[column])
+            values = frame[column].to_numpy(dtype=float)
+            total = total.merge(summaries.from_values(values, sketch=sketch))
+            if sample:
+                index = approximate.add(index, values, rng, sample)
+    return (total, index) if sample else total
+
+
+def _scan_range(args):
+    return _scan_shard(*args)
+
+
+def scan(path, column, workers=None, sketch=True):
+    # Returns the merged summary and a report with rows, wall time,
+    # rows per second and the shards/workers used
+    summary, _, report = _scan(path, column, workers, sketch, 0)
+    return summary, report
+
+
+def scan_with_index(path, column, size=approximate.SAMPLE_SIZE, workers=None, sketch=True):
+    # Returns the merged summary, the sample index of up to size values and the report
+    return _scan(path, column, workers, sketch, size)
+
+
+def _scan(path, column, workers, sketch, sample):
+    workers = workers or os.cpu_count() or 1
+    names = list(pd.read_csv(path, nrows=0).columns)
+    if column not in names:
+        raise ValueError(f"column {column!r} not in {path} (columns: {', '.join(names)})")
+
+    begin = time.perf_counter()
+    ranges = shard_offsets(path, workers)
+    # Shard i samples with seed i, so the shard indexes merge
+    jobs = [(path, start, end, names, column, sketch, sample, i) for i, (start, end) in enumerate(ranges)]
+    if workers == 1 or len(jobs) <= 1:
+        parts = [_scan_range(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(_scan_range, jobs))
+    index = None
+    if sample:
+        parts, indexes = [part for part, _ in parts], [index for _, index in parts]
+        index = functools.reduce(lambda a, b: approximate.merge(a, b, sample), indexes, approximate.empty_index())
+    empty = summaries.SampleSummary(sketch=quantile_sketch.KLLSketch() if sketch else None)
+    summary = functools.reduce(summaries.SampleSummary.merge, parts, empty)
+    seconds = time.perf_counter() - begin
+
+    report = {
+        "rows": summary.n,
+        "seconds": seconds,
+        "rows_per_sec": summary.n / seconds if seconds > 0 else float("inf"),
+        "shards": len(jobs),
+        "workers": min(workers, max(len(jobs), 1)),
+        "bytes": os.path.getsize(path),
+    }
+    return summary, index, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--column", required=True)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--no-sketch", action="store_true", help="skip the quantile sketch")
+    args = parser.parse_args()
+
+    summary, report = scan(args.path, args.column, args.workers, sketch=not args.no_sketch)
+    print(summary)
+    if summary.sketch is not None and summary.n:
+        q = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+        print("quantiles:", ", ".join(f"{p:.0%}={v:.6g}" for p, v in zip(q, summary.sketch.quantile(q))))
+    print(f"{report['rows']:,} rows in {report['seconds']:.2f}s with {report['workers']} worker(s): "
+          f"{report['rows_per_sec']:,.0f} rows/s, {report['bytes'] / 2**20 / report['seconds']:.1f} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""Lightweight distributions for the lesson apps.
+
+`from scipy import stats` dominates the cold start of every app, yet the
+apps only need a handful of normal, t and binomial functions. This module
+implements those with `math` and numpy and is a drop-in replacement:
+
+    import stats_core as stats
+    stats.norm.pdf(x, loc, scale)
+
+Anything not implemented here (other distributions, other tests, or
+methods such as `norm.logsf`) is forwarded to scipy.stats, which is only
+imported the first time such a name is used.
+
+Error bounds, double precision, measured against scipy.stats:
+
+    norm.pdf / cdf / sf   math.exp / math.erfc, relative error < 2e-14
+                          for |z| < 8 and < 5e-13 out to |z| = 38
+    norm.ppf              Acklam's rational approximation (relative error
+                          < 1.15e-9) refined by one Halley step on erfc,
+                          relative error < 1e-13 for 1e-300 < q < 1 - 1e-16
+    t.pdf / cdf / sf      regularized incomplete beta by Lentz continued
+                          fraction, relative error < 2e-13 for df <= 1e3 and
+                          < 5e-10 up to df = 1e7; above that the normal
+                          limit is used (absolute error < 1e-9)
+    t.ppf                 closed form for df = 1, 2, otherwise Newton steps
+                          on log sf, relative error < 1e-10
+    binom.pmf             lgamma form, relative error < 5e-12 for n <= 1e3,
+                          growing with lgamma(n) to ~2e-7 at n = 1e5
+    binom.cdf / sf        summation of the shorter tail, absolute error
+                          < 1e-13 with relative accuracy kept in the tail;
+                          an array of k reads both tails from one cumulative
+                          sum of the pmf table, O(n) instead of O(n^2)
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+SQRT2 = math.sqrt(2.0)
+SQRT2PI = math.sqrt(2.0 * math.pi)
+
+
+class TtestResult(namedtuple("TtestResult", ["statistic", "pvalue"])):
+    # Unpacks to (statistic, pvalue) like scipy's result, with df attached
+    def __new__(cls, statistic, pvalue, df):
+        result = super().__new__(cls, statistic, pvalue)
+        result.df = df
+        return result
+
+
+def scipy_stats():
+    from scipy import stats as _scipy_stats
+    return _scipy_stats
+
+
+def __getattr__(name):
+    # Rarely used names are served by scipy.stats, imported on first use
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return getattr(scipy_stats(), name)
+
+
+def _scalar_or_array(values):
+    values = np.asarray(values, dtype=float)
+    return values[()] if values.ndim == 0 else values
+
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+_lgamma = np.vectorize(math.lgamma, otypes=[float])
+
+
+# Normal distribution
+
+# Coefficients of Acklam's inverse normal approximation
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+_P_LOW = 0.02425
+
+
+def _norm_ppf_scalar(q):
+    if math.isnan(q) or q < 0.0 or q > 1.0:
+        return math.nan
+    if q == 0.0:
+        return -math.inf
+    if q == 1.0:
+        return math.inf
+
+    if q < _P_LOW:
+        r = math.sqrt(-2.0 * math.log(q))
+        x = ((((((_C[0] * r + _C[1]) * r + _C[2]) * r + _C[3]) * r + _C[4]) * r + _C[5]) /
+             ((((_D[0] * r + _D[1]) * r + _D[2]) * r + _D[3]) * r + 1.0))
+    elif q <= 1.0 - _P_LOW:
+        r = q - 0.5
+        s = r * r
+        x = ((((((_A[0] * s + _A[1]) * s + _A[2]) * s + _A[3]) * s + _A[4]) * s + _A[5]) * r /
+             (((((_B[0] * s + _B[1]) * s + _B[2]) * s + _B[3]) * s + _B[4]) * s + 1.0))
+    else:
+        r = math.sqrt(-2.0 * math.log1p(-q))
+        x = -((((((_C[0] * r + _C[1]) * r + _C[2]) * r + _C[3]) * r + _C[4]) * r + _C[5]) /
+              ((((_D[0] * r + _D[1]) * r + _D[2]) * r + _D[3]) * r + 1.0))
+
+    # One Halley step; refine against the nearer tail to keep precision
+    if x < 0:
+        e = 0.5 * math.erfc(-x / SQRT2) - q
+    else:
+        e = (1.0 - q) - 0.5 * math.erfc(x / SQRT2)
+    u = e * SQRT2PI * math.exp(0.5 * x * x)
+    return x - u / (1.0 + 0.5 * x * u)
+
+
+_norm_ppf = np.vectorize(_norm_ppf_scalar, otypes=[float])
+
+
+class _Normal:
+    name = "norm"
+
+    def pdf(self, x, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(np.exp(-0.5 * z * z) / (SQRT2PI * scale))
+
+    def cdf(self, x, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(0.5 * _erfc(-z / SQRT2))
+
+    def sf(self, x, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(0.5 * _erfc(z / SQRT2))
+
+    def ppf(self, q, loc=0, scale=1):
+        return _scalar_or_array(loc + scale * _norm_ppf(q))
+
+    def isf(self, q, loc=0, scale=1):
+        return _scalar_or_array(loc - scale * _norm_ppf(q))
+
+    def interval(self, confidence, loc=0, scale=1):
+        alpha = (1 - np.asarray(confidence, dtype=float)) / 2
+        return self.ppf(alpha, loc, scale), self.isf(alpha, loc, scale)
+
+    def __getattr__(self, name):
+        return getattr(getattr(scipy_stats(), self.name), name)
+
+
+# Student's t distribution
+
+_T_NORMAL_DF = 1e7
+
+
+def _betacf(a, b, x):
+    # Modified Lentz evaluation of the incomplete beta continued fraction
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 20000):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((a + m2 - 1.0) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return h
+
+
+def _log_gamma_half_ratio(a):
+    # log(Gamma(a + 1/2) / Gamma(a)); the asymptotic series avoids the
+    # cancellation of two large lgamma values when df is large
+    if a < 50:
+        return math.lgamma(a + 0.5) - math.lgamma(a)
+    inv = 1.0 / a
+    inv2 = inv * inv
+    return (0.5 * math.log(a) - inv / 8 +
+            inv * inv2 * (1 / 192 - inv2 / 640 + 17 * inv2 * inv2 / 14336))
+
+
+def _t_sf_scalar(x, df):
+    if math.isnan(x) or math.isnan(df) or df <= 0:
+        return math.nan
+    if math.isinf(x):
+        return 0.0 if x > 0 else 1.0
+    if df > _T_NORMAL_DF:
+        return 0.5 * math.erfc(x / SQRT2)
+    if x == 0.0:
+        return 0.5
+
+    # I_w(df/2, 1/2) with w = df / (df + x^2) is the two-sided tail mass
+    a, b = 0.5 * df, 0.5
+    x2 = x * x
+    w = df / (df + x2)
+    one_minus_w = x2 / (df + x2)
+    log_front = (_log_gamma_half_ratio(a) - 0.5 * math.log(math.pi) -
+                 a * math.log1p(x2 / df) + b * math.log(one_minus_w))
+    front = math.exp(log_front)
+    if w < (a + 1.0) / (a + b + 2.0):
+        tail = front * _betacf(a, b, w) / a
+    else:
+        tail = 1.0 - front * _betacf(b, a, one_minus_w) / b
+    return 0.5 * tail if x > 0 else 1.0 - 0.5 * tail
+
+
+def _t_pdf_scalar(x, df):
+    if df > _T_NORMAL_DF:
+        return math.exp(-0.5 * x * x) / SQRT2PI
+    log_norm = _log_gamma_half_ratio(0.5 * df) - 0.5 * math.log(df * math.pi)
+    return math.exp(log_norm - 0.5 * (df + 1) * math.log1p(x * x / df))
+
+
+def _t_isf_upper(p, df):
+    # Solve sf(x) = p for p <= 0.5 by Newton steps on log sf, which
+    # converge quickly even in the polynomial tails of small df
+    if df == 1:
+        return 1.0 / math.tan(math.pi * p)
+    if df == 2:
+        return (1 - 2 * p) / math.sqrt(2 * p * (1 - p))
+
+    z = -_norm_ppf_scalar(p)
+    if df > _T_NORMAL_DF:
+        return z
+    x = z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df * df)
+    for _ in range(100):
+        sf = _t_sf_scalar(x, df)
+        if sf <= 0.0:
+            break
+        step = math.log(sf / p) * sf / _t_pdf_scalar(x, df)
+        x += step
+        if abs(step) <= 1e-13 * (1.0 + abs(x)):
+            return x
+    return float(scipy_stats().t.isf(p, df))
+
+
+def _t_ppf_scalar(q, df):
+    if math.isnan(q) or math.isnan(df) or df <= 0 or q < 0.0 or q > 1.0:
+        return math.nan
+    if q == 0.0:
+        return -math.inf
+    if q == 1.0:
+        return math.inf
+    if q < 0.5:
+        return -_t_isf_upper(q, df)
+    return _t_isf_upper(1.0 - q, df)
+
+
+_t_sf = np.vectorize(_t_sf_scalar, otypes=[float])
+_t_pdf = np.vectorize(_t_pdf_scalar, otypes=[float])
+_t_ppf = np.vectorize(_t_ppf_scalar, otypes=[float])
+
+
+class _StudentT:
+    name = "t"
+
+    def pdf(self, x, df, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(_t_pdf(z, df) / scale)
+
+    def cdf(self, x, df, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(_t_sf(-z, df))
+
+    def sf(self, x, df, loc=0, scale=1):
+        z = (np.asarray(x, dtype=float) - loc) / scale
+        return _scalar_or_array(_t_sf(z, df))
+
+    def ppf(self, q, df, loc=0, scale=1):
+        return _scalar_or_array(loc + scale * _t_ppf(q, df))
+
+    def isf(self, q, df, loc=0, scale=1):
+        return _scalar_or_array(loc - scale * _t_ppf(q, df))
+
+    def interval(self, confidence, df, loc=0, scale=1):
+        alpha = (1 - np.asarray(confidence, dtype=float)) / 2
+        return self.ppf(alpha, df, loc, scale), self.isf(alpha, df, loc, scale)
+
+    def __getattr__(self, name):
+        return getattr(getattr(scipy_stats(), self.name), name)
+
+
+# Binomial distribution
+
+def _binom_log_pmf(k, n, p):
+    k = np.asarray(k, dtype=float)
+    if p == 0.0:
+        return np.where(k == 0, 0.0, -np.inf)
+    if p == 1.0:
+        return np.where(k == n, 0.0, -np.inf)
+    inside = (k >= 0) & (k <= n) & (k == np.floor(k))
+    kk = np.where(inside, k, 0.0)
+    log_pmf = (math.lgamma(n + 1) - _lgamma(kk + 1) - _lgamma(n - kk + 1) +
+               kk * math.log(p) + (n - kk) * math.log1p(-p))
+    return np.where(inside, log_pmf, -np.inf)
+
+
+def _binom_cdf_scalar(k, n, p):
+    if math.isnan(k) or n < 0 or not 0.0 <= p <= 1.0:
+        return math.nan
+    k = math.floor(k)
+    if k < 0:
+        return 0.0
+    if k >= n:
+        return 1.0
+    if k < n * p:
+        return float(np.exp(_binom_log_pmf(np.arange(0, k + 1), n, p)).sum())
+    return 1.0 - float(np.exp(_binom_log_pmf(np.arange(k + 1, n + 1), n, p)).sum())
+
+
+def _binom_sf_scalar(k, n, p):
+    if math.isnan(k) or n < 0 or not 0.0 <= p <= 1.0:
+        return math.nan
+    k = math.floor(k)
+    if k < 0:
+        return 1.0
+    if k >= n:
+        return 0.0
+    if k >= n * p:
+        return float(np.exp(_binom_log_pmf(np.arange(k + 1, n + 1), n, p)).sum())
+    return 1.0 - float(np.exp(_binom_log_pmf(np.arange(0, k + 1), n, p)).sum())
+
+
+_binom_cdf = np.vectorize(_binom_cdf_scalar, otypes=[float])
+_binom_sf = np.vectorize(_binom_sf_scalar, otypes=[float])
+
+
+def _binom_tables(k, n, p):
+    # True when an array of k shares one valid (n, p), so both tails can
+    # come from a single pmf table instead of a fresh sum per k
+    return bool(np.ndim(k)) and not np.ndim(n) and not np.ndim(p) and n >= 0 and n == math.floor(n) \
+        and 0.0 <= p <= 1.0
+
+
+def _binom_tail_array(k, n, p, upper):
+    # cdf (or sf with upper=True) of every k from cumulative sums of the pmf
+    # in both directions; each k reads the shorter tail, as the scalar
+    # functions sum it
+    n = int(n)
+    k = np.floor(np.asarray(k, dtype=float))
+    pmf = np.exp(_binom_log_pmf(np.arange(n + 1), n, p))
+    at_most = np.cumsum(pmf)
+    at_least = np.append(np.cumsum(pmf[::-1])[::-1], 0.0)
+    i = np.clip(np.nan_to_num(k), 0, max(n - 1, 0)).astype(np.int64)
+    lower_tail = k < n * p
+    cdf = np.where(lower_tail, at_most[i], 1.0 - at_least[i + 1])
+    sf = np.where(lower_tail, 1.0 - at_most[i], at_least[i + 1])
+    values = sf if upper else cdf
+    below, above = (1.0, 0.0) if upper else (0.0, 1.0)
+    values = np.where(k < 0, below, np.where(k >= n, above, values))
+    return np.where(np.isnan(k), np.nan, values)
+
+
+class _Binomial:
+    name = "binom"
+
+    def pmf(self, k, n, p):
+        if np.ndim(n) or np.ndim(p):
+            return getattr(scipy_stats(), self.name).pmf(k, n, p)
+        return _scalar_or_array(np.exp(_binom_log_pmf(k, int(n), float(p))))
+
+    def cdf(self, k, n, p):
+        if _binom_tables(k, n, p):
+            return _binom_tail_array(k, n, float(p), upper=False)
+        return _scalar_or_array(_binom_cdf(k, n, p))
+
+    def sf(self, k, n, p):
+        if _binom_tables(k, n, p):
+            return _binom_tail_array(k, n, float(p), upper=True)
+        return _scalar_or_array(_binom_sf(k, n, p))
+
+    def __getattr__(self, name):
+        return getattr(getattr(scipy_stats(), self.name), name)
+
+
+norm = _Normal()
+t = _StudentT()
+binom = _Binomial()
+
+
+def ttest_1samp(a, popmean, alternative="two-sided"):
+    a = np.asarray(a, dtype=float)
+    n = a.size
+    df = n - 1
+    statistic = (a.mean() - popmean) / (a.std(ddof=1) / math.sqrt(n))
+
+    if alternative == "two-sided":
+        pvalue = 2 * t.sf(abs(statistic), df)
+    elif alternative == "greater":
+        pvalue = t.sf(statistic, df)
+    elif alternative == "less":
+        pvalue = t.cdf(statistic, df)
+    else:
+        raise ValueError('alternative must be "two-sided", "greater" or "less"')
+
+    return TtestResult(statistic, pvalue, df)
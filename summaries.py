@@ -0,0 +1,97 @@
+"""Mergeable sufficient statistics for one numeric column.
+
+A SampleSummary holds n, the mean, M2 (the sum of squared deviations
+from the mean), min and max, plus an optional KLL quantile sketch. That
+is everything the z-test, t-test and t confidence interval need.
+Summaries of disjoint shards combine exactly with `merge`, using Chan et
+al.'s pairwise update, and the merge is associative. Shards can
+therefore be summarized on different cores or machines and reduced in
+any order:
+
+    parts = [summaries.from_values(chunk) for chunk in chunks]
+    total = functools.reduce(summaries.SampleSummary.merge, parts)
+
+Merging two summaries whose means are far apart loses no more precision
+than computing the statistics in one pass would.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import quantile_sketch
+
+CHUNKSIZE = 1_000_000
+
+
+class SampleSummary:
+    def __init__(self, n=0, mean=0.0, m2=0.0, min=math.inf, max=-math.inf, sketch=None):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+        self.sketch = sketch
+
+    def __repr__(self):
+        return (f"SampleSummary(n={self.n}, mean={self.mean:.6g}, std={self.std:.6g}, "
+                f"min={self.min:.6g}, max={self.max:.6g})")
+
+    @property
+    def var(self):
+        # Sample variance (ddof=1), as pandas' Series.var
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    def merge(self, other):
+        # Returns a new summary; neither input is modified
+        if other.n == 0:
+            return self._copy()
+        if self.n == 0:
+            return other._copy()
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.n / n
+        m2 = self.m2 + other.m2 + delta * delta * self.n * other.n / n
+        sketch = None
+        if self.sketch is not None and other.sketch is not None:
+            sketch = quantile_sketch.KLLSketch(self.sketch.k).merge(self.sketch).merge(other.sketch)
+        return SampleSummary(n, mean, m2, min(self.min, other.min), max(self.max, other.max), sketch)
+
+    def _copy(self):
+        sketch = None
+        if self.sketch is not None:
+            sketch = quantile_sketch.KLLSketch(self.sketch.k).merge(self.sketch)
+        return SampleSummary(self.n, self.mean, self.m2, self.min, self.max, sketch)
+
+
+def from_values(values, sketch=False):
+    values = np.asarray(values, dtype=float).ravel()
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return SampleSummary(sketch=quantile_sketch.KLLSketch() if sketch else None)
+    mean = values.mean()
+    centered = values - mean
+    return SampleSummary(
+        len(values), float(mean), float(centered @ centered), float(values.min()), float(values.max()),
+        quantile_sketch.from_values(values) if sketch else None,
+    )
+
+
+def from_csv(path, column, sketch=False, chunksize=CHUNKSIZE):
+    total = SampleSummary(sketch=quantile_sketch.KLLSketch() if sketch else None)
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+        total = total.merge(from_values(chunk[column].to_numpy(dtype=float), sketch=sketch))
+    return total
+
+
+def describe(summary):
+    # The rows of pandas' Series.describe(); quartiles come from the sketch
+    quartiles = summary.sketch.quantile(np.array([0.25, 0.5, 0.75])) if summary.sketch is not None else [math.nan] * 3
+    return pd.Series({
+        "count": summary.n, "mean": summary.mean, "std": summary.std, "min": summary.min,
+        "25%": quartiles[0], "50%": quartiles[1], "75%": quartiles[2], "max": summary.max,
+    })
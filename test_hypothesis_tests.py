@@ -0,0 +1,40 @@
+"""Edge cases of the one-sample kernels: constant and empty samples give
+inf or nan, as stats.ttest_1samp does, instead of raising."""
+import math
+
+import numpy as np
+
+import hypothesis_tests
+
+CONSTANT = np.array([5.0, 5.0, 5.0])
+
+
+def test_t_test_constant_sample_off_popmean_is_infinite():
+    above = hypothesis_tests.t_test(CONSTANT, 4)
+    below = hypothesis_tests.t_test(CONSTANT, 6, alternative="less")
+    assert above.statistic == math.inf and above.pvalue == 0.0
+    assert below.statistic == -math.inf and below.pvalue == 0.0
+
+
+def test_t_test_constant_sample_on_popmean_is_nan():
+    result = hypothesis_tests.t_test(CONSTANT, 5)
+    assert math.isnan(result.statistic) and math.isnan(result.pvalue)
+
+
+def test_t_interval_constant_sample_is_a_point():
+    assert tuple(hypothesis_tests.t_interval(CONSTANT, 0.95)) == (5.0, 5.0)
+
+
+def test_t_interval_single_value_is_nan():
+    assert all(math.isnan(bound) for bound in hypothesis_tests.t_interval(np.array([3.0]), 0.95))
+
+
+def test_z_test_constant_sample_is_finite():
+    z, p = hypothesis_tests.z_test(CONSTANT, 4, sigma=2)
+    assert math.isclose(z, math.sqrt(3) / 2)
+    assert 0 < p < 1
+
+
+def test_z_test_empty_sample_is_nan():
+    z, p = hypothesis_tests.z_test(np.array([]), 4, sigma=2)
+    assert math.isnan(z) and math.isnan(p)
@@ -0,0 +1,164 @@
+"""Bound the size of Plotly figures before they are sent to the browser.
+
+Most curves in the lessons are drawn from `np.linspace(..., 1000)` and
+the Medicon page used to ship its raw samples. `plotly_chart` is a drop-in
+for `st.plotly_chart` that first runs `reduce_figure`:
+
+  * line traces longer than MAX_POINTS are downsampled with
+    Largest-Triangle-Three-Buckets (LTTB), which keeps the visually
+    important points (peaks, kinks, the edges of shaded regions) and
+    always keeps the first and last point. Matching per-point text,
+    hovertext and customdata are subset the same way.
+  * histogram traces are binned here with np.histogram and replaced by a
+    bar trace, so the client receives one count per bin instead of the
+    samples. histnorm, xbins (with a size) and hovertemplate carry over;
+    a histogram whose other settings the bars cannot reproduce
+    (horizontal, cumulative, a histfunc other than count, y values) is
+    sent unchanged.
+
+The payload of a chart is therefore bounded by the number of traces, not
+by the size of the data behind them.
+"""
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+MAX_POINTS = 300
+HISTOGRAM_BINS = 30
+
+_PER_POINT_FIELDS = ("text", "hovertext", "customdata")
+
+
+def lttb(x, y, n_out):
+    # Indices of the n_out points LTTB keeps; x must be sorted
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n - 2 inner points split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # Pick the point forming the largest triangle with the previous
+        # kept point and the next bucket's average
+        area = np.abs((x[a] - cx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def _is_line(trace):
+    if trace.type != "scatter" or trace.x is None or trace.y is None:
+        return False
+    # Without an explicit mode Plotly draws traces of 20+ points as plain lines
+    mode = trace.mode or "lines"
+    return "lines" in mode and "markers" not in mode
+
+
+def _reduce_line(trace, max_points):
+    x = np.asarray(trace.x)
+    y = np.asarray(trace.y)
+    if len(x) <= max_points or len(x) != len(y) or not np.issubdtype(x.dtype, np.number):
+        return
+
+    order = None
+    if np.any(np.diff(x) < 0):
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+
+    keep = lttb(x, y, max_points)
+    # Per-point fields are subset with the same indices (after the sort)
+    updates = {"x": x[keep], "y": y[keep]}
+    for field in _PER_POINT_FIELDS:
+        values = trace[field]
+        if values is not None and not isinstance(values, str) and len(values) == len(trace.x):
+            values = np.asarray(values, dtype=object)
+            if order is not None:
+                values = values[order]
+            updates[field] = values[keep]
+    trace.update(updates)
+
+
+def histogram_bars(values, bins=HISTOGRAM_BINS, histnorm=None, **bar_kwargs):
+    # histnorm as in Plotly: "percent", "probability", "density" or
+    # "probability density"; bins is a count or an array of edges
+    counts, edges = np.histogram(np.asarray(values, dtype=float), bins=bins)
+    heights = counts.astype(float)
+    if histnorm in ("percent", "probability", "probability density"):
+        heights /= max(counts.sum(), 1)
+        if histnorm == "percent":
+            heights *= 100
+    if histnorm in ("density", "probability density"):
+        heights /= np.diff(edges)
+    elif histnorm not in (None, "", "percent", "probability"):
+        raise ValueError(f"unsupported histnorm {histnorm!r}")
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=heights, width=np.diff(edges), **bar_kwargs)
+
+
+def _can_bin(trace):
+    # Only vertical count histograms of x are reproduced by histogram_bars
+    if trace.x is None or trace.y is not None:
+        return False
+    if trace.orientation == "h" or trace.cumulative.enabled or trace.histfunc not in (None, "count"):
+        return False
+    return trace.xbins.size is None or np.isscalar(trace.xbins.size)
+
+
+def _bin_edges(trace, values):
+    # Plotly's xbins: steps of size from start (default: the grid point at
+    # or below the data) until an edge reaches end; otherwise about nbinsx bins
+    xbins = trace.xbins
+    if xbins.size is None:
+        return trace.nbinsx or HISTOGRAM_BINS
+    size = float(xbins.size)
+    start = float(xbins.start) if xbins.start is not None else np.floor(np.nanmin(values) / size) * size
+    end = float(xbins.end) if xbins.end is not None else np.nanmax(values)
+    return start + size * np.arange(max(int(np.ceil((end - start) / size)), 1) + 1)
+
+
+def _histogram_to_bar(trace):
+    bar_kwargs = {"name": trace.name, "marker": trace.marker.to_plotly_json(), "opacity": trace.opacity,
+                  "showlegend": trace.showlegend, "legendgroup": trace.legendgroup,
+                  "hovertemplate": trace.hovertemplate}
+    bar_kwargs = {k: v for k, v in bar_kwargs.items() if v not in (None, {})}
+    values = np.asarray(trace.x, dtype=float)
+    bar = histogram_bars(values, bins=_bin_edges(trace, values), histnorm=trace.histnorm, **bar_kwargs)
+    bar.update(marker_line_width=0)
+    return bar
+
+
+def reduce_figure(fig, max_points=MAX_POINTS):
+    binned = False
+    traces = []
+    for trace in fig.data:
+        if trace.type == "histogram" and _can_bin(trace):
+            traces.append(_histogram_to_bar(trace))
+            binned = True
+            continue
+        if _is_line(trace):
+            _reduce_line(trace, max_points)
+        traces.append(trace)
+
+    if binned:
+        fig.data = ()
+        fig.add_traces(traces)
+        if fig.layout.bargap is None:
+            # Server-side bins touch the way a histogram's bars do
+            fig.update_layout(bargap=0)
+    return fig
+
+
+def plotly_chart(fig, max_points=MAX_POINTS, **kwargs):
+    return st.plotly_chart(reduce_figure(fig, max_points), **kwargs)